@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Entry point for ``python -m ietfbib2bibtex``"""
+
+import sys
+
+from ietfbib2bibtex.cli import main
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+if __name__ == "__main__":
+    sys.exit(main())  # pragma: no cover
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Files that are replaced atomically"""
+
+import os
+import stat
+import tempfile
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+# the umask can only be read by setting it, which is not thread-safe, so it is
+# read once on import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode(path):
+    """The permission bits a file replacing ``path`` should get.
+
+    :param path: Path of the file to be replaced.
+
+    :returns: The permission bits of the existing file, or of a new file created
+              with :py:func:`open` if it does not exist.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+class AtomicFile:
+    """A temporary file next to ``path`` that replaces it atomically once it is
+    committed.
+
+    Unlike :py:class:`tempfile.NamedTemporaryFile`, which is only accessible by
+    its owner, the file gets the permission bits of the file it replaces, see
+    :py:func:`file_mode`.
+
+    Use as context manager to get the temporary file object: On exit, the file is
+    committed, or discarded if the block raised an exception.
+
+    :param path: Path of the file to replace.
+    :param mode: Mode to open the temporary file with.
+    :param kwargs: Further arguments to :py:class:`tempfile.NamedTemporaryFile`,
+                   e.g., ``encoding`` or ``prefix``.
+    """
+
+    def __init__(self, path, mode="wb", **kwargs):
+        self.path = path
+        # pylint: disable-next=consider-using-with
+        self.file = tempfile.NamedTemporaryFile(
+            mode,
+            dir=os.path.dirname(os.path.abspath(path)),
+            delete=False,
+            **kwargs,
+        )
+
+    @property
+    def name(self):
+        """Path of the temporary file."""
+        return self.file.name
+
+    def commit(self):
+        """Close the temporary file and replace :py:attr:`path` with it."""
+        self.file.close()
+        try:
+            os.chmod(self.file.name, file_mode(self.path))
+            os.replace(self.file.name, self.path)
+        except OSError:
+            os.unlink(self.file.name)
+            raise
+
+    def discard(self):
+        """Close and remove the temporary file."""
+        self.file.close()
+        os.unlink(self.file.name)
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
@@ -8,13 +8,31 @@
 
 """Bibliography representation"""
 
+import asyncio
+import datetime
+import functools
+import itertools
 import logging
 import os
+import tempfile
+import time
 
 import pybtex.database
 
+from . import bibfile
+from . import cache
+from . import compact
 from . import config
+from . import filters
+from . import partition
+from . import pipeline
+from . import profiling
+from . import projection
+from . import sinks
+from . import sorting
 from . import sources
+from . import state
+from . import table
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2022 Freie Universität Berlin"
@@ -22,41 +40,723 @@ __license__ = "LGPL v2.1"
 __email__ = "m.lenders@fu-berlin.de"
 
 
-class Bib:
+def _source_key(bib_config: config.Bib):
+    """Identify the source configuration of a bibliography configuration.
+
+    Bibliographies with equal keys can share the same
+    :py:class:`ietfbib2bibtex.sources.Source` object.
+    """
+    for source_type in ("rfc_index", "bibxml_ids"):
+        source_config = getattr(bib_config, source_type)
+        if source_config is not None:
+            return source_type, source_config.model_dump_json()
+    return None
+
+
+def _shared_cache(the_config: config.Config):
+    if the_config.cache is None:
+        return None
+    return cache.Cache.from_config(the_config.cache)
+
+
+def _filter_key(bib_config: config.Bib):
+    if bib_config.filter is None:
+        return None
+    return bib_config.filter.model_dump_json()
+
+
+class Bib:  # pylint: disable=too-many-public-methods
     """Representation of a bibliography."""
 
-    def __init__(self, bib_config: config.Bib, bib_path=None):
+    def __init__(
+        self,
+        bib_config: config.Bib,
+        bib_path=None,
+        source=None,
+        shared_cache=None,
+        quarantine=None,
+        last_mirrors=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self.path = "./" if bib_path is None else bib_path
         self.name = bib_config.name
-        if bib_config.rfc_index is not None:
-            self.source = sources.RFCIndexSource(bib_config.rfc_index)
+        self.config = bib_config
+        self.entry_filter = None
+        if bib_config.filter is not None:
+            self.entry_filter = filters.EntryFilter(bib_config.filter)
+        if source is not None:
+            self.source = source
+        elif bib_config.rfc_index is not None:
+            self.source = sources.RFCIndexSource(
+                bib_config.rfc_index, cache=shared_cache, last_mirrors=last_mirrors
+            )
         elif bib_config.bibxml_ids is not None:
-            self.source = sources.BibXMLIDsSource(bib_config.bibxml_ids)
+            self.source = sources.BibXMLIDsSource(
+                bib_config.bibxml_ids, cache=shared_cache, quarantine=quarantine
+            )
         else:
             raise ValueError(f"No source configured in {bib_config}")
+        unsupported = [
+            field
+            for field in bib_config.fields or ()
+            if field not in self.source.FIELDS
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Fields {', '.join(unsupported)} not supported by the source of "
+                f"{self.name}"
+            )
+
+    @property
+    def bibtex_path(self):
+        """Path to the bibtex file of the bibliography."""
+        return f"{os.path.join(self.path, self.name)}.bib"
+
+    @property
+    def recent_bibtex_path(self):
+        """Path to the overlay bibtex file of the bibliography, see
+        :py:meth:`create_recent_bibtex`."""
+        return f"{os.path.join(self.path, self.name)}-recent.bib"
+
+    def is_due(self, the_state: state.State, check_upstream=False, now=None):
+        """Check if the bibliography is due to be refreshed.
+
+        A bibliography is not due if it was refreshed successfully less than its
+        ``refresh_interval`` ago. It is due if it is older than its ``max_age``.
+        Otherwise, it is due unless ``check_upstream`` is set and its source
+        reports that the remote did not change.
+
+        :py:param the_state: :py:class:`ietfbib2bibtex.state.State` of previous
+                             runs.
+        :py:param check_upstream: Check cheaply whether the remote of the source
+                                  changed.
+        :py:param now: Current time as POSIX timestamp. Defaults to
+                       :py:func:`time.time`.
+
+        :returns: ``True`` if the bibliography is due.
+        """
+        record = the_state["bibs"].get(os.path.abspath(self.bibtex_path))
+        if record is None or not os.path.exists(self.bibtex_path):
+            return True
+        age = datetime.timedelta(
+            seconds=(time.time() if now is None else now) - record["last_success"]
+        )
+        if self.config.refresh_interval is not None:
+            if age < self.config.refresh_interval:
+                return False
+        if self.config.max_age is not None and age >= self.config.max_age:
+            return True
+        if check_upstream:
+            return self.source.is_modified(
+                record.get("validator"), synced=record.get("synced")
+            )
+        return True
+
+    def record_success(self, the_state: state.State, now=None):
+        """Record a successful refresh of the bibliography.
+
+        Besides the time of the refresh, the validator of the remote and, if the
+        source keeps a local copy, the end of its synchronization are recorded, see
+        :py:meth:`create_recent_bibtexs`.
+
+        :py:param the_state: :py:class:`ietfbib2bibtex.state.State` to record to.
+        :py:param now: Current time as POSIX timestamp. Defaults to
+                       :py:func:`time.time`.
+        """
+        record = {
+            "last_success": time.time() if now is None else now,
+            "validator": self.source.validator,
+        }
+        if self.source.synced is not None:
+            record["synced"] = self.source.synced
+        the_state["bibs"][os.path.abspath(self.bibtex_path)] = record
+
+    def iterate(self, refresh=True):
+        """Iterate over all valid entries of the source of the bibliography that
+        pass its filter.
+
+        :py:param refresh: Fetch the remote of the source again.
+        """
+        return self.source.iterate_entries(
+            entry_filter=self.entry_filter, refresh=refresh, fields=self.config.fields
+        )
+
+    def to_table(self, refresh=True, batch_size=table.BATCH_SIZE):
+        """Load the entries of the bibliography into a columnar table for bulk
+        analytics.
+
+        Only the fields needed for the table (see
+        :py:data:`ietfbib2bibtex.table.FIELDS`) are extracted from the source and
+        the entries are added to the table in batches as they are parsed. Entries
+        of drafts under their key without revision are left out, so each revision
+        is contained once.
+
+        :py:param refresh: Fetch the remote of the source again.
+        :py:param batch_size: Number of entries added to the table at once.
+
+        :returns: The :py:class:`ietfbib2bibtex.table.Table`.
+        """
+        entries = self.source.iterate_entries(
+            entry_filter=self.entry_filter, refresh=refresh, fields=table.FIELDS
+        )
+        if isinstance(self.source, sources.BibXMLIDsSource):
+            entries = (
+                (key, entry)
+                for key, entry in entries
+                if sources.DRAFT_NUMBER.match(key)
+            )
+        builder = table.TableBuilder()
+        for batch in iter(lambda: list(itertools.islice(entries, batch_size)), []):
+            builder.add_batch(batch)
+        logging.info("Loaded %d entries of %s into a table", len(builder), self.name)
+        return builder.build()
+
+    def lookup(self, key):
+        """Look up a single entry of the bibliography without building it.
+
+        :py:param key: The key of the entry.
+
+        :returns: A tuple of key and :py:class:`pybtex.database.Entry` or ``None``
+                  if the bibliography has no such entry.
+        """
+        return self.source.lookup(key, self.entry_filter, fields=self.config.fields)
+
+    @classmethod
+    def lookup_all(cls, the_config: config.Config, keys, names=None):
+        """Look up entries in the bibliographies of a configuration.
+
+        Each key is looked up in the bibliographies in configuration order and
+        the first entry found is taken. rfc-indexes are fetched from their last
+        good mirrors recorded in the state file, which is not updated.
+
+        :py:param the_config: :py:class:`ietfbib2bibtex.config.Config` object for
+                              configuration
+        :py:param keys: The keys of the entries.
+        :py:param names: Names of the bibliographies to look in. Defaults to all.
+
+        :returns: A tuple of :py:class:`pybtex.database.BibliographyData` with the
+                  entries found and a list of the keys not found.
+        """
+        shared_cache = _shared_cache(the_config)
+        last_mirrors = state.State(the_config.state_file)["mirrors"]
+        bibs = [
+            cls(
+                bib_config,
+                bib_path=the_config.bibpath,
+                shared_cache=shared_cache,
+                last_mirrors=last_mirrors,
+            )
+            for bib_config in the_config.bibs
+            if names is None or bib_config.name in names
+        ]
+        data = pybtex.database.BibliographyData()
+        missing = []
+        for key in keys:
+            for bib in bibs:
+                entry = bib.lookup(key)
+                if entry is not None:
+                    data.entries[entry[0]] = entry[1]
+                    break
+            else:
+                missing.append(key)
+        return data, missing
+
+    @classmethod
+    def by_name(cls, the_config: config.Config, name, the_state=None):
+        """Get a bibliography of a configuration by its name.
+
+        :py:param the_config: :py:class:`ietfbib2bibtex.config.Config` object for
+                              configuration
+        :py:param name: The name of the bibliography.
+        :py:param the_state: Optional :py:class:`ietfbib2bibtex.state.State` to
+                             quarantine malformed bibxml files and record the
+                             last good mirrors in.
+
+        :raises ValueError: When the configuration has no bibliography ``name``.
+
+        :returns: The :py:class:`Bib`.
+        """
+        for bib_config in the_config.bibs:
+            if bib_config.name == name:
+                return cls(
+                    bib_config,
+                    bib_path=the_config.bibpath,
+                    shared_cache=_shared_cache(the_config),
+                    quarantine=None if the_state is None else the_state["quarantine"],
+                    last_mirrors=None if the_state is None else the_state["mirrors"],
+                )
+        raise ValueError(f"No bibliography {name} configured")
+
+    def create_partial_bibtex(self, index, count, output):
+        """Create a partial bibtex file from one partition of the bibliography source.
+
+        The source is not synchronized. See
+        :py:meth:`ietfbib2bibtex.sources.BibXMLIDsSource.iterate_local`.
+
+        :py:param index: The index of the partition.
+        :py:param count: The number of partitions.
+        :py:param output: Path of the partial bibtex file.
+
+        :raises ValueError: When the source of the bibliography can not be
+                            partitioned or ``index`` is not a partition of
+                            ``count``.
+        """
+        if not isinstance(self.source, sources.BibXMLIDsSource):
+            raise ValueError(f"Source of {self.name} can not be partitioned")
+        if not 0 <= index < count:
+            raise ValueError(f"Invalid partition {index}/{count}")
+        logging.info("Checking out partition %d/%d of %s", index, count, self.name)
+        partition.write_partial(
+            self.source.iterate_local(
+                self.entry_filter, partition=(index, count), fields=self.config.fields
+            ),
+            output,
+        )
+
+    def merge_bibtex(self, partials):
+        """Create bibtex file ``name.bib`` by merging partial bibtex files.
+
+        If the bibliography is configured to be ``compact``, the merged entries are
+        stored with :py:meth:`store`. If it is configured to be sorted, they are
+        sorted with :py:func:`ietfbib2bibtex.sorting.write` instead of merged.
+
+        The merged entries are also pushed to the configured sinks, see
+        :py:class:`ietfbib2bibtex.sinks.Sinks`.
+
+        :py:param partials: Paths of the partial bibtex files, see
+                            :py:meth:`create_partial_bibtex`.
+        """
+        logging.debug("Merging %s to %s", ", ".join(partials), self.bibtex_path)
+        with sinks.Sinks.from_config(self.config.sinks) as the_sinks:
+            if self.config.sort is not None:
+                self._store_sorted(
+                    the_sinks.tee(
+                        entry
+                        for partial in partials
+                        for entry in partition.iterate_entries(partial)
+                    )
+                )
+                return
+            if not self.config.compact:
+                partition.merge(
+                    partials,
+                    self.bibtex_path,
+                    callback=(
+                        # only entries handed to sinks need to be parsed
+                        (lambda k, c: the_sinks.put(k, partition.parse_chunk(k, c)))
+                        if self.config.sinks
+                        else None
+                    ),
+                )
+                return
+            data = pybtex.database.BibliographyData()
+            for key, entry in the_sinks.tee(partition.merge_entries(partials)):
+                data.entries[key] = entry
+            self.store(data)
 
-    def iterate(self):
-        """Iterate over all valid entries of the source of the bibliography."""
-        return self.source.iterate_entries()
+    def create_partitioned_bibtex(
+        self, count, config_file=None, the_state=None, shared_cache=None
+    ):
+        """Create bibtex file ``name.bib`` with ``count`` local worker processes.
+
+        Each worker creates a partial bibtex file of one partition of the already
+        synchronized source, which are then merged.
+
+        :py:param count: The number of partitions and workers.
+        :py:param config_file: The configuration file for the workers.
+        :py:param the_state: Optional :py:class:`ietfbib2bibtex.state.State` the
+                             workers quarantine malformed bibxml files in. It is
+                             reloaded once the workers are done.
+        :py:param shared_cache: Optional :py:class:`ietfbib2bibtex.cache.Cache`
+                                for the workers.
+
+        :raises subprocess.CalledProcessError: When a worker fails.
+        """
+        logging.info("Checking out %s in %d partitions", self.name, count)
+        with tempfile.TemporaryDirectory(dir=self.path) as directory:
+            try:
+                partials = partition.run_workers(
+                    self.name,
+                    count,
+                    directory,
+                    config_file,
+                    state_file=None if the_state is None else the_state.path,
+                    cache_path=None if shared_cache is None else shared_cache.path,
+                )
+            finally:
+                if the_state is not None:
+                    the_state.reload()
+            self.merge_bibtex(partials)
+
+    def create_recent_bibtex(self, since):
+        """Create overlay bibtex file ``name-recent.bib`` with the entries of the
+        drafts added or modified since a point in time.
+
+        The source is not synchronized. See
+        :py:meth:`ietfbib2bibtex.sources.BibXMLIDsSource.iterate_recent`. The file
+        is replaced atomically and is empty if there are no such drafts.
+
+        The entries are also pushed to the configured ``sqlite`` and ``http``
+        sinks, which keep the entries pushed before. ``file`` sinks hold all
+        entries of the bibliography and are only written by full builds.
+
+        :py:param since: The point in time as POSIX timestamp.
+
+        :raises ValueError: When the source of the bibliography has no local
+                            mirror.
+        """
+        if not isinstance(self.source, sources.BibXMLIDsSource):
+            raise ValueError(f"Source of {self.name} has no local mirror")
+        data = pybtex.database.BibliographyData()
+        with sinks.Sinks.from_config(
+            [sink for sink in self.config.sinks if sink.file is None]
+        ) as the_sinks:
+            for key, entry in the_sinks.tee(
+                self.source.iterate_recent(
+                    since, self.entry_filter, fields=self.config.fields
+                )
+            ):
+                data.entries[key] = entry
+        logging.info(
+            "Storing %d recent entries of %s to %s",
+            len(data.entries),
+            self.name,
+            self.recent_bibtex_path,
+        )
+        bibfile.write_serialized(
+            self.recent_bibtex_path,
+            [
+                (key, bibfile.serialize_entry(key, entry))
+                for key, entry in data.entries.items()
+            ],
+        )
+
+    def fold_recent_bibtex(self):
+        """Fold an existing overlay bibtex file into bibtex file ``name.bib`` after
+        it was created.
+
+        The overlay is recreated with only the drafts that changed after the
+        source was synchronized for ``name.bib``, which usually leaves it empty.
+        """
+        if self.source.synced is None or not os.path.exists(self.recent_bibtex_path):
+            return
+        self.create_recent_bibtex(self.source.synced)
+
+    def _create_bibtex_pipelined(self, entries):
+        writer = pipeline.Pipeline(
+            [("serialize", lambda e: (e[0], bibfile.serialize_entry(*e)))],
+            self.source.pipeline_depth,
+        )
+        serialized = {}
+        for key, chunk in writer.run(entries):
+            # as in pybtex.database.BibliographyData, keys are case-insensitive and
+            # a duplicate takes the position of the first
+            serialized[key.lower()] = key, chunk
+        writer.log(self.name)
+        self.store_serialized(list(serialized.values()))
 
     def create_bibtex(self):
-        """Create bibtex file ``name.bib`` from bibliography source."""
+        """Create bibtex file ``name.bib`` from bibliography source.
+
+        If the source produces its entries in a pipeline, they are also serialized
+        in a writer stage of their own, unless the bibliography is ``compact``. If
+        it is configured to be sorted, the entries are streamed to
+        :py:func:`ietfbib2bibtex.sorting.write` without holding them all in memory.
+
+        While the source is iterated, its entries are also pushed to the configured
+        sinks, see :py:class:`ietfbib2bibtex.sinks.Sinks`.
+        """
         logging.info("Checking out %s", self.name)
+        with sinks.Sinks.from_config(self.config.sinks) as the_sinks:
+            entries = the_sinks.tee(self.iterate())
+            if self.config.sort is not None:
+                self._store_sorted(entries)
+                return
+            if self.source.pipeline_depth is not None and not self.config.compact:
+                self._create_bibtex_pipelined(entries)
+                return
+            data = pybtex.database.BibliographyData()
+            for key, entry in entries:
+                data.entries[key] = entry
+            self.store(data)
+
+    async def acreate_bibtex(self, refresh=True):
+        """Asynchronously create bibtex file ``name.bib`` from bibliography source.
+
+        The source is iterated with
+        :py:meth:`ietfbib2bibtex.sources.Source.aiterate_entries` and the bibtex
+        file is written in the default executor of the event loop, so several
+        bibliographies can be created concurrently, e.g., with
+        :py:func:`asyncio.gather`. If the bibliography is configured to be sorted,
+        the entries are streamed to :py:class:`ietfbib2bibtex.sorting.Sorter`
+        without holding them all in memory.
+
+        While the source is iterated, its entries are also pushed to the configured
+        sinks, see :py:class:`ietfbib2bibtex.sinks.Sinks`.
+
+        :py:param refresh: Fetch the remote of the source again.
+        """
+        logging.info("Checking out %s", self.name)
+        loop = asyncio.get_running_loop()
+        add, store = self._collector()
+        the_sinks = sinks.Sinks.from_config(self.config.sinks)
+        # handing entries to the sinks blocks while a sink falls behind, so it is
+        # done in the default executor, as is closing them
+        try:
+            async for key, entry in self.source.aiterate_entries(
+                entry_filter=self.entry_filter,
+                refresh=refresh,
+                fields=self.config.fields,
+            ):
+                if self.config.sinks:
+                    await loop.run_in_executor(None, the_sinks.put, key, entry)
+                add(key, entry)
+            await loop.run_in_executor(None, store)
+        except BaseException:
+            await loop.run_in_executor(
+                None, functools.partial(the_sinks.close, abort=True)
+            )
+            raise
+        await loop.run_in_executor(None, the_sinks.close)
+
+    def store(self, data: pybtex.database.BibliographyData):
+        """Store bibliography data to bibtex file ``name.bib``.
+
+        If the bibliography is configured to be ``incremental``, only the changed
+        entries of an existing bibtex file are rewritten. If it is configured to
+        be ``compact``, it is written with :py:func:`ietfbib2bibtex.compact.write`.
+        If it is configured to be sorted, it is written with
+        :py:func:`ietfbib2bibtex.sorting.write`.
+
+        :py:param data: The bibliography data to store.
+        """
+        if self.config.sort is not None:
+            self._store_sorted(data.entries.items())
+            return
+        logging.debug("Storing %s to %s", self.name, self.bibtex_path)
+        if self.config.compact:
+            compact.write(data, self.bibtex_path)
+        elif self.config.incremental:
+            bibfile.IndexedBibFile(
+                self.bibtex_path, self.config.compact_threshold
+            ).write(data)
+        else:
+            data.to_file(self.bibtex_path, "bibtex")
+
+    def _store_sorted(self, entries):
+        logging.debug(
+            "Storing %s sorted by %s to %s",
+            self.name,
+            self.config.sort,
+            self.bibtex_path,
+        )
+        sorting.write(
+            entries, self.bibtex_path, self.config.sort, self.config.sort_memory
+        )
+
+    def _collector(self):
+        # entries of a sorted bibliography are handed to an external sort, so
+        # they are never all held in memory
+        if self.config.sort is not None:
+            sorter = sorting.Sorter(
+                self.config.sort,
+                self.config.sort_memory,
+                directory=os.path.dirname(os.path.abspath(self.bibtex_path)),
+            )
+            return sorter.add, functools.partial(self._store_sorter, sorter)
         data = pybtex.database.BibliographyData()
-        for entry in self.iterate():
-            data.entries[entry[0]] = entry[1]
+        return data.entries.__setitem__, functools.partial(self.store, data)
+
+    def _store_sorter(self, sorter):
         logging.debug(
-            "Storing %s to %s.bib", self.name, os.path.join(self.path, self.name)
+            "Storing %s sorted by %s to %s",
+            self.name,
+            self.config.sort,
+            self.bibtex_path,
         )
-        data.to_file(f"{os.path.join(self.path, self.name)}.bib", "bibtex")
+        bibfile.write_serialized(self.bibtex_path, sorter.chunks())
+
+    def store_serialized(self, chunks):
+        """Store serialized entries to bibtex file ``name.bib``.
+
+        :py:param chunks: List of tuples of key and entry serialized with
+                          :py:func:`ietfbib2bibtex.bibfile.serialize_entry`.
+        """
+        logging.debug("Storing %s to %s", self.name, self.bibtex_path)
+        if self.config.incremental:
+            bibfile.IndexedBibFile(
+                self.bibtex_path, self.config.compact_threshold
+            ).write_serialized(chunks)
+        else:
+            bibfile.write_serialized(self.bibtex_path, chunks)
+
+    @classmethod
+    def create_shared_bibtexs(cls, bibs):
+        """Create bibtex files for bibliographies that share the same source.
+
+        The source is only fetched once. It is iterated once per distinct filter
+        and field projection in ``bibs`` and each of its entries is handed to all
+        bibliographies with that filter and projection and their sinks. Sorted
+        bibliographies are streamed to :py:class:`ietfbib2bibtex.sorting.Sorter`
+        each, so their entries are not held in memory.
+
+        :py:param bibs: List of :py:class:`Bib` objects with the same
+                        :py:attr:`source`.
+        """
+        if len(bibs) == 1:
+            bibs[0].create_bibtex()
+            return
+        logging.info("Checking out %s", ", ".join(bib.name for bib in bibs))
+        by_filter = {}
+        for bib in bibs:
+            by_filter.setdefault(
+                (
+                    _filter_key(bib.config),
+                    projection.projection_name(bib.config.fields),
+                ),
+                [],
+            ).append(bib)
+        refresh = True
+        for filter_bibs in by_filter.values():
+            # pylint: disable-next=protected-access
+            collectors = [bib._collector() for bib in filter_bibs]
+            with sinks.Sinks.from_config(
+                [sink for bib in filter_bibs for sink in bib.config.sinks]
+            ) as the_sinks:
+                for key, entry in the_sinks.tee(
+                    filter_bibs[0].iterate(refresh=refresh)
+                ):
+                    for add, _ in collectors:
+                        add(key, entry)
+                for _, store in collectors:
+                    store()
+            refresh = False
+
+    @classmethod
+    def create_partitioned_bibtexs(
+        cls, bibs, count, config_file=None, the_state=None, shared_cache=None
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Create bibtex files for bibliographies that share a ``bibxml_ids`` source
+        with ``count`` local worker processes each.
+
+        The source is only synchronized once.
+
+        :py:param bibs: List of :py:class:`Bib` objects with the same
+                        :py:attr:`source`.
+        :py:param count: The number of partitions and workers.
+        :py:param config_file: The configuration file for the workers.
+        :py:param the_state: Optional :py:class:`ietfbib2bibtex.state.State` for
+                             the workers, see :py:meth:`create_partitioned_bibtex`.
+        :py:param shared_cache: Optional :py:class:`ietfbib2bibtex.cache.Cache`
+                                for the workers.
+        """
+        bibs[0].source.sync()
+        for bib in bibs:
+            bib.create_partitioned_bibtex(count, config_file, the_state, shared_cache)
 
     @classmethod
-    def create_all_bibtexs(cls, the_config: config.Config):
+    def create_recent_bibtexs(cls, the_config: config.Config):
+        """Create overlay bibtex files ``name-recent.bib`` for all bibliographies
+        with a ``bibxml_ids`` source in configuration.
+
+        Each source is synchronized once and only the drafts added or modified
+        since the synchronization for the last successful build of ``name.bib``
+        are parsed, see :py:meth:`create_recent_bibtex`. Bibliographies that were
+        never built successfully are skipped. The state file is not updated.
+
+        :py:param the_config: :py:class:`ietfbib2bibtex.config.Config` object for
+                              configuration
+        """
+        the_state = state.State(the_config.state_file)
+        shared_cache = _shared_cache(the_config)
+        shared_sources = {}
+        for bib_config in the_config.bibs:
+            if bib_config.bibxml_ids is None:
+                continue
+            source_key = _source_key(bib_config)
+            bib = cls(
+                bib_config,
+                bib_path=the_config.bibpath,
+                source=shared_sources.get(source_key),
+                shared_cache=shared_cache,
+                quarantine=the_state["quarantine"],
+            )
+            record = the_state["bibs"].get(os.path.abspath(bib.bibtex_path))
+            if record is None or record.get("synced") is None:
+                logging.warning("Skipping %s, it was never built", bib.name)
+                continue
+            if source_key not in shared_sources:
+                bib.source.sync()
+                shared_sources[source_key] = bib.source
+            bib.create_recent_bibtex(record["synced"])
+
+    @classmethod
+    def create_all_bibtexs(
+        cls,
+        the_config: config.Config,
+        due_only=False,
+        check_upstream=False,
+        profile=None,
+        profile_top=10,
+        partitions=None,
+        config_file=None,
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        # pylint: disable=too-many-locals
         """Create bibtex files for all bibliographies in configuration.
 
+        Bibliographies with identical source configurations share their source, so
+        each remote is only fetched and parsed once. Successful runs, malformed
+        bibxml files, and the last good mirrors of rfc-indexes are recorded in the
+        state file of the configuration. Existing overlay bibtex files are folded
+        into the bibtex files, see :py:meth:`fold_recent_bibtex`. If a shared cache
+        is configured, all sources use it and it is pruned to its maximum size
+        afterwards.
+
         :py:param the_config: :py:class:`ietfbib2bibtex.config.Config` object for
                               configuration
+        :py:param due_only: Only create the bibtex files of bibliographies that
+                            are due (see :py:meth:`is_due`).
+        :py:param check_upstream: When ``due_only`` is set, check cheaply
+                                  whether the remote of a source changed before
+                                  refreshing a bibliography.
+        :py:param profile: Profile the creation of the bibtex files, see
+                           :py:func:`ietfbib2bibtex.profiling.profile`.
+        :py:param profile_top: Number of entries in each profiling report.
+        :py:param partitions: Create the bibtex files of ``bibxml_ids`` sources in
+                              this many partitions, see
+                              :py:meth:`create_partitioned_bibtex`.
+        :py:param config_file: The configuration file for partition workers.
         """
+        the_state = state.State(the_config.state_file)
+        shared_cache = _shared_cache(the_config)
+        shared_sources = {}
+        groups = {}
         for bib_config in the_config.bibs:
-            bib = cls(bib_config, bib_path=the_config.bibpath)
-            bib.create_bibtex()
+            source_key = _source_key(bib_config)
+            bib = cls(
+                bib_config,
+                bib_path=the_config.bibpath,
+                source=shared_sources.get(source_key),
+                shared_cache=shared_cache,
+                quarantine=the_state["quarantine"],
+                last_mirrors=the_state["mirrors"],
+            )
+            shared_sources.setdefault(source_key, bib.source)
+            if due_only and not bib.is_due(the_state, check_upstream):
+                logging.info("Skipping %s, it is not due yet", bib.name)
+                continue
+            groups.setdefault(source_key, []).append(bib)
+        for bibs in groups.values():
+            with profiling.profile(profile, bibs, top=profile_top):
+                if partitions and isinstance(bibs[0].source, sources.BibXMLIDsSource):
+                    cls.create_partitioned_bibtexs(
+                        bibs, partitions, config_file, the_state, shared_cache
+                    )
+                else:
+                    cls.create_shared_bibtexs(bibs)
+            for bib in bibs:
+                bib.fold_recent_bibtex()
+                bib.record_success(the_state)
+            the_state.save()
+        if shared_cache is not None:
+            shared_cache.evict()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Incrementally patched bibtex files"""
+
+import functools
+import json
+import logging
+import os
+
+import pybtex.database
+import pybtex.io
+import pybtex.plugin
+
+from .atomic import AtomicFile
+from .cache import digest
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Version of the index format.
+INDEX_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def _writer():
+    # looking up the plugin takes longer than serializing an entry
+    return pybtex.plugin.find_plugin("pybtex.database.output", "bibtex")()
+
+
+def serialize_entry(key: str, entry: pybtex.database.Entry) -> bytes:
+    """Serialize a single entry exactly as it is written in a whole bibtex file.
+
+    :param key: The key of the entry.
+    :param entry: The :py:class:`pybtex.database.Entry`.
+
+    :returns: The encoded entry.
+    """
+    return (
+        _writer()
+        .to_string(pybtex.database.BibliographyData(entries={key: entry}))
+        .encode(pybtex.io.get_default_encoding())
+    )
+
+
+def write_serialized(path: str, chunks):
+    """Write serialized entries to a bibtex file.
+
+    The file is replaced atomically and is byte-identical to the one written by
+    :py:meth:`pybtex.database.BibliographyData.to_file` for the same entries.
+
+    :param path: Path to the bibtex file.
+    :param chunks: List of tuples of key and entry serialized with
+                   :py:func:`serialize_entry`.
+
+    :returns: List of the key, offset, and length of each entry in the file.
+    """
+    ranges = []
+    offset = 0
+    with AtomicFile(path) as bib_file:
+        for i, (key, chunk) in enumerate(chunks):
+            if i:
+                bib_file.write(b"\n")
+                offset += 1
+            bib_file.write(chunk)
+            ranges.append((key, offset, len(chunk)))
+            offset += len(chunk)
+    return ranges
+
+
+def _blank(length: int) -> bytes:
+    # whitespace is ignored between bibtex entries
+    return b" " * (length - 1) + b"\n"
+
+
+class IndexedBibFile:
+    """A bibtex file with a sidecar index of the byte range of each entry.
+
+    Writing bibliography data to an indexed file only rewrites the entries that
+    changed: An entry that keeps its length is overwritten in place. Otherwise, its
+    old byte range is blanked and the entry is appended, as are new entries. Once
+    the blanked bytes exceed ``compact_threshold`` of the file, it is compacted,
+    i.e., rewritten from scratch. A compacted file is byte-identical to
+    :py:meth:`pybtex.database.BibliographyData.to_file`.
+
+    :param path: Path to the bibtex file.
+    :param compact_threshold: Fraction of blanked bytes in the file after which
+                              it is compacted.
+    """
+
+    def __init__(self, path: str, compact_threshold=0.25):
+        self.path = path
+        self.compact_threshold = compact_threshold
+
+    @property
+    def index_path(self) -> str:
+        """Path to the index of the bibtex file."""
+        return f"{self.path}.idx"
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as index_file:
+                index = json.load(index_file)
+            stat = os.stat(self.path)
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(index, dict)
+            or index.get("version") != INDEX_VERSION
+            or index.get("size") != stat.st_size
+            or index.get("mtime_ns") != stat.st_mtime_ns
+        ):
+            # the file was changed by someone else
+            return None
+        return index
+
+    def _save_index(self, entries, garbage):
+        stat = os.stat(self.path)
+        index = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "garbage": garbage,
+            "entries": sorted(entries, key=lambda e: e[1]),
+        }
+        with AtomicFile(self.index_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+
+    def _rewrite(self, chunks):
+        entries = [
+            [key, offset, length, digest(chunk)]
+            for (key, offset, length), (_, chunk) in zip(
+                write_serialized(self.path, chunks), chunks
+            )
+        ]
+        self._save_index(entries, 0)
+        return "rewritten"
+
+    @staticmethod
+    def _patches(index, chunks):
+        old = {entry[0]: entry[1:] for entry in index["entries"]}
+        garbage = index["garbage"]
+        size = index["size"]
+        patches = []
+        entries = []
+        for key, chunk in chunks:
+            chunk_digest = digest(chunk)
+            record = old.pop(key, None)
+            if record is not None and record[2] == chunk_digest:
+                entries.append([key] + record)
+                continue
+            if record is not None and record[1] == len(chunk):
+                patches.append((record[0], chunk))
+                entries.append([key, record[0], len(chunk), chunk_digest])
+                continue
+            if record is not None:
+                patches.append((record[0], _blank(record[1])))
+                garbage += record[1]
+            if size:
+                patches.append((size, b"\n"))
+                size += 1
+            patches.append((size, chunk))
+            entries.append([key, size, len(chunk), chunk_digest])
+            size += len(chunk)
+        for offset, length, _ in old.values():
+            patches.append((offset, _blank(length)))
+            garbage += length
+        return patches, entries, garbage, size
+
+    def write(self, data: pybtex.database.BibliographyData) -> str:
+        """Write bibliography data to the file, only rewriting changed entries.
+
+        :param data: The bibliography data.
+
+        :returns: ``"rewritten"`` if the file was written from scratch,
+                  ``"patched"`` otherwise.
+        """
+        return self.write_serialized(
+            [(key, serialize_entry(key, entry)) for key, entry in data.entries.items()]
+        )
+
+    def write_serialized(self, chunks) -> str:
+        """Write serialized entries to the file, only rewriting changed entries.
+
+        :param chunks: List of tuples of key and entry serialized with
+                       :py:func:`serialize_entry`.
+
+        :returns: ``"rewritten"`` if the file was written from scratch,
+                  ``"patched"`` otherwise.
+        """
+        index = self._load_index()
+        if index is None:
+            return self._rewrite(chunks)
+        patches, entries, garbage, size = self._patches(index, chunks)
+        if size and garbage / size > self.compact_threshold:
+            return self._rewrite(chunks)
+        with open(self.path, "r+b") as bib_file:
+            for offset, patch in patches:
+                bib_file.seek(offset)
+                bib_file.write(patch)
+        self._save_index(entries, garbage)
+        logging.debug("Patched %d ranges in %s", len(patches), self.path)
+        return "patched"
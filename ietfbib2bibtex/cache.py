@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Process-safe cache shared between runs and configurations"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+
+import requests
+
+from . import __version__
+from . import atomic
+from . import config
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Number of hex digits of the key of a memoized value selecting its lock.
+MEMO_LOCK_DIGITS = 2
+
+
+def digest(data) -> str:
+    """The SHA-256 hex digest used to address content in the cache.
+
+    >>> digest(b"test")
+    '9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08'
+
+    :param data: :py:class:`bytes` or :py:class:`str` to digest.
+
+    :returns: The hex digest of ``data``.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextlib.contextmanager
+def flock(path: str, shared=False):
+    """Lock a file for all processes.
+
+    Without :py:mod:`fcntl`, e.g., on Windows, nothing is locked.
+
+    :param path: Path to the lock file. It is created if it does not exist.
+    :param shared: Take a shared lock instead of an exclusive one.
+    """
+    with open(path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_atomically(path, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with atomic.AtomicFile(path) as tmp:
+        tmp.write(data)
+
+
+class Cache:
+    """A content-addressed cache that can be shared by concurrent processes.
+
+    The cache stores raw downloads and parsed entries as objects, addressed by
+    their digest, and synchronized mirrors. Refreshes are single-flight: the
+    first process holding the lock for a resource refreshes it while all others
+    wait for the lock and then reuse its result. Objects are evicted in least
+    recently used order once the cache exceeds its maximum size.
+
+    Objects and refs are created with the default permissions under the umask,
+    so a cache shared between users needs a umask granting them access, e.g.,
+    ``0002`` for a group. Objects that cannot be read are treated as not
+    cached.
+
+    :param path: The directory of the cache.
+    :param max_size: Maximum size of the objects in the cache in bytes.
+    :param ttl: Time in seconds during which a download or mirror is considered
+                fresh and not refreshed.
+    """
+
+    def __init__(self, path: str, max_size=None, ttl=300.0):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls, cache_config: config.Cache):
+        """Create a cache from its configuration.
+
+        :param cache_config: :py:class:`ietfbib2bibtex.config.Cache` object for
+                             configuration.
+
+        :returns: The :py:class:`Cache`.
+        """
+        return cls(
+            cache_config.path,
+            max_size=cache_config.max_size,
+            ttl=cache_config.ttl.total_seconds(),
+        )
+
+    @contextlib.contextmanager
+    def lock(self, name: str, shared=False):
+        """Lock a resource of the cache for all processes.
+
+        :param name: Name of the resource.
+        :param shared: Take a shared lock instead of an exclusive one.
+        """
+        lock_dir = os.path.join(self.path, "locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with flock(os.path.join(lock_dir, f"{name}.lock"), shared=shared):
+            yield
+
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.path, "objects", key[:2], key[2:])
+
+    def _ref_path(self, name: str) -> str:
+        return os.path.join(self.path, "refs", f"{name}.json")
+
+    def _read_ref(self, name: str):
+        try:
+            with open(self._ref_path(name), encoding="utf-8") as ref_file:
+                return json.load(ref_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_ref(self, name: str, ref: dict):
+        _write_atomically(self._ref_path(name), json.dumps(ref).encode("utf-8"))
+
+    def _is_fresh(self, ref) -> bool:
+        return ref is not None and time.time() - ref["refreshed"] < self.ttl
+
+    def get(self, key: str):
+        """Get an object from the cache.
+
+        :param key: Key of the object.
+
+        :returns: The object as :py:class:`bytes` or ``None`` if it is not cached.
+        """
+        path = self._object_path(key)
+        try:
+            with open(path, "rb") as obj:
+                data = obj.read()
+        except (FileNotFoundError, PermissionError):
+            return None
+        self._touch(path)
+        return data
+
+    def object_path(self, key: str):
+        """The path to a cached object.
+
+        :param key: Key of the object.
+
+        :returns: The path or ``None`` if the object is not cached.
+        """
+        path = self._object_path(key)
+        if not os.access(path, os.R_OK):
+            return None
+        self._touch(path)
+        return path
+
+    @staticmethod
+    def _touch(path):
+        # only the owner can touch an object, so objects of other users age
+        # from their last write
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+    def put(self, data: bytes, key=None) -> str:
+        """Store an object in the cache.
+
+        :param data: The object.
+        :param key: Key of the object. Defaults to the :py:func:`digest` of
+                    ``data``.
+
+        :returns: The key of the object.
+        """
+        if key is None:
+            key = digest(data)
+        _write_atomically(self._object_path(key), data)
+        return key
+
+    def memoize(self, name: str, func):
+        """Get a value derived from cached content or compute it single-flight.
+
+        Values share one of a fixed number of locks, selected by the first
+        :py:data:`MEMO_LOCK_DIGITS` hex digits of their key, so the number of lock
+        files stays bounded.
+
+        :param name: A name uniquely identifying the value, e.g., derived from the
+                     digest of the content it is computed from.
+        :param func: Function without arguments computing the value. The value
+                     is stored as JSON, so it must be JSON-serializable and
+                     is returned as decoded from JSON when it is cached,
+                     i.e., with lists instead of tuples.
+
+        :returns: The value.
+        """
+        key = digest(f"{__version__}:json:{name}")
+        data = self.get(key)
+        if data is None:
+            with self.lock(f"memo-{key[:MEMO_LOCK_DIGITS]}"):
+                data = self.get(key)
+                if data is None:
+                    value = func()
+                    self.put(json.dumps(value).encode("utf-8"), key=key)
+                    return value
+        return json.loads(data)
+
+    def fetch(self, url: str, timeout=5):
+        """Download a URL via the cache.
+
+        A fresh cached download is reused without contacting the server. A stale
+        one is revalidated with a conditional request.
+
+        :param url: The URL.
+        :param timeout: Timeout for the request in seconds.
+
+        :returns: The key of the downloaded content in the cache and its validator
+                  (an HTTP ETag or Last-Modified date).
+        """
+        name = f"download-{digest(url)}"
+        ref = self._read_ref(name)
+        if self._is_fresh(ref) and self.object_path(ref["key"]) is not None:
+            return ref["key"], ref["validator"]
+        with self.lock(name):
+            ref = self._read_ref(name)
+            cached = ref is not None and self.object_path(ref["key"]) is not None
+            if cached and self._is_fresh(ref):
+                return ref["key"], ref["validator"]
+            headers = {}
+            if cached and ref["etag"]:
+                headers["If-None-Match"] = ref["etag"]
+            if cached and ref["last_modified"]:
+                headers["If-Modified-Since"] = ref["last_modified"]
+            response = requests.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            if not cached or response.status_code != 304:
+                ref = {
+                    "key": self.put(response.content),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                ref["validator"] = ref["etag"] or ref["last_modified"]
+            ref["refreshed"] = time.time()
+            self._write_ref(name, ref)
+        return ref["key"], ref["validator"]
+
+    def downloaded(self, url: str):
+        """The key of the last download of a URL, regardless of its freshness.
+
+        :param url: The URL.
+
+        :returns: The key of the downloaded content in the cache or ``None`` if
+                  the URL was not downloaded or its content was evicted.
+        """
+        ref = self._read_ref(f"download-{digest(url)}")
+        if ref is None or self.object_path(ref["key"]) is None:
+            return None
+        return ref["key"]
+
+    def mirror_path(self, remote: str) -> str:
+        """The directory of the shared mirror of a remote.
+
+        :param remote: The remote.
+
+        :returns: The path to the mirror.
+        """
+        return os.path.join(self.path, "mirrors", digest(remote))
+
+    def sync_mirror(self, remote: str, sync):
+        """Synchronize the shared mirror of a remote single-flight.
+
+        :param remote: The remote.
+        :param sync: Function without arguments synchronizing the mirror.
+
+        :returns: The return value of ``sync`` or ``None`` if the mirror was
+                  fresh and not synchronized.
+        """
+        name = f"mirror-{digest(remote)}"
+        with self.lock(name):
+            ref = self._read_ref(name)
+            if self._is_fresh(ref):
+                logging.info("Reusing fresh mirror of %s", remote)
+                return None
+            result = sync()
+            self._write_ref(name, {"refreshed": time.time()})
+        return result
+
+    @contextlib.contextmanager
+    def read_mirror(self, remote: str):
+        """Prevent synchronization of the shared mirror of a remote while reading.
+
+        :param remote: The remote.
+        """
+        with self.lock(f"mirror-{digest(remote)}", shared=True):
+            yield
+
+    def evict(self):
+        """Evict least recently used objects until the cache is below its maximum
+        size.
+
+        Mirrors are not accounted for and never evicted: Evicting a mirror would
+        force a full synchronization on its next use, and its size is bounded by
+        its remote anyway.
+        """
+        if self.max_size is None:
+            return
+        with self.lock("evict"):
+            objects = []
+            for dirpath, _, filenames in os.walk(os.path.join(self.path, "objects")):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:  # pragma: no cover
+                        continue
+                    objects.append((stat.st_mtime, stat.st_size, path))
+            size = sum(obj[1] for obj in objects)
+            for _, obj_size, path in sorted(objects):
+                if size <= self.max_size:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                size -= obj_size
@@ -9,9 +9,12 @@
 """CLI definitions"""
 
 import argparse
+import sys
 
-from ietfbib2bibtex.config import Config
+from ietfbib2bibtex.config import Cache, Config
 from ietfbib2bibtex.bib import Bib
+from ietfbib2bibtex.profiling import MODES as PROFILING_MODES
+from ietfbib2bibtex.state import State
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2022 Freie Universität Berlin"
@@ -19,6 +22,24 @@ __license__ = "LGPL v2.1"
 __email__ = "m.lenders@fu-berlin.de"
 
 
+def positive_int(value):
+    """Argument type for integers greater than zero.
+
+    :param value: The argument string.
+
+    :raises argparse.ArgumentTypeError: When ``value`` is not a positive integer.
+
+    :returns: The integer.
+    """
+    try:
+        number = int(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from exc
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value!r}")
+    return number
+
+
 def parse_args():
     """Parse arguments for main command."""
     parser = argparse.ArgumentParser()
@@ -27,12 +48,162 @@ def parse_args():
         "--config-file",
         help="A YAML configuration file",
     )
-    return parser.parse_args()
+    parser.set_defaults(
+        due_only=False,
+        check_upstream=False,
+        profile=None,
+        profile_top=10,
+        partitions=None,
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser(
+        "run", help="Create bibtex files for all bibliographies (default)"
+    )
+    run_parser.add_argument(
+        "--due-only",
+        action="store_true",
+        help="Only refresh bibliographies that are due according to their "
+        "refresh_interval and max_age",
+    )
+    run_parser.add_argument(
+        "--check-upstream",
+        action="store_true",
+        help="With --due-only, skip bibliographies whose upstream source did not "
+        "change",
+    )
+    run_parser.add_argument(
+        "--profile",
+        choices=PROFILING_MODES,
+        help="Profile CPU time (written to <name>.pstats next to each bibtex file) "
+        "or memory allocations, and report the slowest and largest bibxml files",
+    )
+    run_parser.add_argument(
+        "--profile-top",
+        type=positive_int,
+        default=10,
+        metavar="N",
+        help="Number of entries in each profiling report (default: 10)",
+    )
+    run_parser.add_argument(
+        "--partitions",
+        type=positive_int,
+        metavar="N",
+        help="Create the bibtex files of bibxml_ids sources with N local worker "
+        "processes, each handling one partition of the drafts",
+    )
+    get_parser = subparsers.add_parser(
+        "get",
+        help="Print the bibtex entries for the given keys without creating the "
+        "bibtex files",
+    )
+    get_parser.add_argument(
+        "keys", nargs="+", metavar="KEY", help="e.g. RFC-9325 or draft-foo-bar"
+    )
+    get_parser.add_argument(
+        "-b",
+        "--bib",
+        action="append",
+        dest="bib_names",
+        metavar="NAME",
+        help="Only look in bibliography NAME (may be given multiple times)",
+    )
+    subparsers.add_parser(
+        "recent",
+        help="Synchronize bibxml_ids sources and create overlay bibtex files "
+        "<name>-recent.bib with the drafts added or modified since the last full "
+        "build",
+    )
+    partition_parser = subparsers.add_parser(
+        "partition",
+        help="Create a partial bibtex file from one partition of a bibxml_ids "
+        "source without synchronizing it",
+    )
+    partition_parser.add_argument(
+        "-b", "--bib", required=True, dest="bib_name", metavar="NAME"
+    )
+    partition_parser.add_argument("--index", type=int, required=True, metavar="I")
+    partition_parser.add_argument(
+        "--count", type=positive_int, required=True, metavar="N"
+    )
+    partition_parser.add_argument("-o", "--output", required=True, metavar="PATH")
+    partition_parser.add_argument(
+        "--state-file",
+        metavar="PATH",
+        help="State file to quarantine malformed bibxml files in (default: "
+        "state_file of the configuration)",
+    )
+    partition_parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="Directory of the shared cache (default: cache of the configuration)",
+    )
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Create the bibtex file of a bibliography from its partial bibtex "
+        "files",
+    )
+    merge_parser.add_argument(
+        "-b", "--bib", required=True, dest="bib_name", metavar="NAME"
+    )
+    merge_parser.add_argument("partials", nargs="+", metavar="PARTIAL")
+    args = parser.parse_args()
+    if args.command == "partition" and not 0 <= args.index < args.count:
+        partition_parser.error(f"--index must be between 0 and {args.count - 1}")
+    if args.command is None:
+        args.command = "run"
+    return args
 
 
 def main():
     """The main command: Take IETF bibliographies from configuration file (taken from
-    CLI arguments if provided) and create bibtex format files from all of them."""
+    CLI arguments if provided) and create bibtex format files from all of them.
+
+    With the ``get`` command, print the bibtex entries for the given keys instead.
+    The ``recent`` command only creates the overlay bibtex files of ``bibxml_ids``
+    sources.
+    The ``partition`` and ``merge`` commands create partial bibtex files and merge
+    them to the bibtex file of a bibliography. Malformed bibxml files found by
+    ``partition`` are quarantined in the state file.
+
+    :returns: The exit code.
+    """
     args = parse_args()
     config = Config.from_file(args.config_file)
-    Bib.create_all_bibtexs(config)
+    if args.command == "get":
+        data, missing = Bib.lookup_all(config, args.keys, names=args.bib_names)
+        if data.entries:
+            sys.stdout.write(data.to_string("bibtex"))
+        for key in missing:
+            print(f"{key} not found", file=sys.stderr)
+        return 1 if missing else 0
+    if args.command == "recent":
+        Bib.create_recent_bibtexs(config)
+        return 0
+    if args.command == "partition":
+        if args.state_file is not None:
+            config.state_file = args.state_file
+        if args.cache is not None:
+            config.cache = (
+                Cache(path=args.cache)
+                if config.cache is None
+                else config.cache.model_copy(update={"path": args.cache})
+            )
+        the_state = State(config.state_file)
+        Bib.by_name(config, args.bib_name, the_state).create_partial_bibtex(
+            args.index, args.count, args.output
+        )
+        the_state.save()
+        return 0
+    if args.command == "merge":
+        Bib.by_name(config, args.bib_name).merge_bibtex(args.partials)
+        return 0
+    Bib.create_all_bibtexs(
+        config,
+        due_only=args.due_only,
+        check_upstream=args.check_upstream,
+        profile=args.profile,
+        profile_top=args.profile_top,
+        partitions=args.partitions,
+        config_file=args.config_file,
+    )
+    return 0
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Compact bibtex files with crossref aliases and @string macros"""
+
+import collections
+import re
+
+import pybtex.database
+import pybtex.database.output.bibtex
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Maximum length of a generated macro name.
+MACRO_NAME_LENGTH = 12
+#: Minimum number of characters a macro must save per use, so short values such as
+#: numbers stay readable.
+MACRO_MIN_SAVING = 2
+# month macros predefined by BibTeX styles and Biber
+_MONTH_MACROS = {
+    month: month[:3].lower()
+    for month in (
+        "January",
+        "February",
+        "March",
+        "April",
+        "May",
+        "June",
+        "July",
+        "August",
+        "September",
+        "October",
+        "November",
+        "December",
+    )
+}
+_NON_NAME_CHARS = re.compile(r"[^a-z0-9]")
+
+
+def _is_month(field, value):
+    return field.lower() == "month" and value in _MONTH_MACROS
+
+
+def _signature(entry):
+    return (
+        entry.original_type,
+        tuple(entry.fields.items()),
+        tuple(
+            (role, tuple(str(person) for person in persons))
+            for role, persons in entry.persons.items()
+        ),
+    )
+
+
+def alias_duplicates(entries):
+    """Replace entries that duplicate an earlier entry by crossref aliases.
+
+    An alias only consists of a ``crossref`` field referring to the key of the
+    earlier entry, from which BibTeX and Biber inherit all fields. As BibTeX
+    requires the referred entry to follow the referring one, each alias is moved
+    right in front of the entry it refers to.
+
+    >>> entry = pybtex.database.Entry("techreport", {"number": "07"})
+    >>> for key, alias in alias_duplicates([("foo-07", entry), ("foo", entry)]):
+    ...     print(key, dict(alias.fields))
+    foo {'crossref': 'foo-07'}
+    foo-07 {'number': '07'}
+
+    :param entries: Iterable of tuples of key and
+                    :py:class:`pybtex.database.Entry`.
+
+    :returns: A generator of tuples of key and :py:class:`pybtex.database.Entry`.
+    """
+    originals = {}
+    aliases = {}
+    for key, entry in entries:
+        signature = _signature(entry)
+        if signature in originals:
+            aliases[originals[signature][0]].append(key)
+        else:
+            originals[signature] = key, entry
+            aliases[key] = []
+    for key, entry in originals.values():
+        for alias in aliases[key]:
+            yield alias, pybtex.database.Entry(
+                entry.original_type, fields={"crossref": key}
+            )
+        yield key, entry
+
+
+class Writer(pybtex.database.output.bibtex.Writer):
+    """BibTeX writer that factors repeated field values into ``@string`` macros.
+
+    A value is replaced by a macro if that makes the file smaller.
+
+    :param encoding: Encoding of the output.
+    """
+
+    def __init__(self, encoding=None, **kwargs):
+        super().__init__(encoding, **kwargs)
+        self._macros = {}
+
+    def _macro_name(self, value, names):
+        name = _NON_NAME_CHARS.sub("", value.lower())[:MACRO_NAME_LENGTH]
+        if not name[:1].isalpha():
+            name = f"s{name}"[:MACRO_NAME_LENGTH]
+        candidate = name
+        suffix = 1
+        while candidate in names or candidate in _MONTH_MACROS.values():
+            suffix += 1
+            candidate = f"{name}{suffix}"
+        return candidate
+
+    def macros(self, bib_data):
+        """Select the field values to replace by macros. Months are always
+        replaced by the predefined month macros.
+
+        :param bib_data: The :py:class:`pybtex.database.BibliographyData`.
+
+        :returns: A dictionary mapping the values to macro names.
+        """
+        uses = collections.Counter(
+            value
+            for entry in bib_data.entries.values()
+            for field, value in entry.fields.items()
+            if field.lower() != "crossref" and not _is_month(field, value)
+        )
+        macros = {}
+        for value, count in uses.most_common():
+            if count < 2:
+                break
+            quoted = self.quote(self._encode(value))
+            name = self._macro_name(value, set(macros.values()))
+            definition = f"@string{{{name} = {quoted}}}\n\n"
+            saving = len(quoted) - len(name)
+            if saving >= MACRO_MIN_SAVING and count * saving > len(definition):
+                macros[value] = name
+        return macros
+
+    def _write_field(self, stream, type, value):  # pylint: disable=redefined-builtin
+        name = _MONTH_MACROS[value] if _is_month(type, value) else None
+        if name is None and type.lower() != "crossref":
+            name = self._macros.get(value)
+        if name is None:
+            super()._write_field(stream, type, value)
+        else:
+            stream.write(f",\n    {type} = {name}")
+
+    def write_stream(self, bib_data, stream):
+        self._macros = self.macros(bib_data)
+        for value, name in sorted(self._macros.items(), key=lambda item: item[1]):
+            stream.write(f"@string{{{name} = {self.quote(self._encode(value))}}}\n\n")
+        super().write_stream(bib_data, stream)
+
+
+def compact(bib_data):
+    """Alias duplicate entries of bibliography data, see :py:func:`alias_duplicates`.
+
+    :param bib_data: The :py:class:`pybtex.database.BibliographyData`.
+
+    :returns: The compacted :py:class:`pybtex.database.BibliographyData`.
+    """
+    return pybtex.database.BibliographyData(
+        entries=alias_duplicates(bib_data.entries.items()),
+        preamble=bib_data.preamble_list,
+    )
+
+
+def write(bib_data, path):
+    """Write bibliography data to a compact bibtex file.
+
+    :param bib_data: The :py:class:`pybtex.database.BibliographyData`.
+    :param path: Path of the bibtex file.
+    """
+    Writer().write_file(compact(bib_data), path)
@@ -9,9 +9,12 @@
 
 """Configuration"""
 
+import datetime
 import logging
 import os
+import re
 import typing
+import urllib.parse
 
 import platformdirs
 import pydantic
@@ -26,6 +29,10 @@ __email__ = "m.lenders@fu-berlin.de"
 DEFAULT_CONFIG_FILE = os.path.join(
     platformdirs.user_config_dir(), "ietfbib2bibtex", "config.yaml"
 )
+DEFAULT_STATE_FILE = os.path.join(
+    platformdirs.user_state_dir(), "ietfbib2bibtex", "state.json"
+)
+DEFAULT_CACHE_DIR = os.path.join(platformdirs.user_cache_dir(), "ietfbib2bibtex")
 
 
 class Source(pydantic.BaseModel):
@@ -35,19 +42,125 @@ class Source(pydantic.BaseModel):
 
 
 class RFCIndexSource(Source):
-    """rfc-index.xml source configuration validation model."""
+    """rfc-index.xml source configuration validation model.
 
-    @pydantic.validator("remote", always=True)
-    def _http_uri_remote(cls, value):  # pylint: disable=no-self-argument
-        if not value.startswith("http:") and not value.startswith("https:"):
-            raise ValueError("'remote' is not a HTTP URL")
+    The remote may be an HTTP URL, a ``file:`` URL, or a local path.
+    """
+
+    #: Number of processes to parse the rfc-index with in parallel.
+    processes: typing.Optional[pydantic.PositiveInt] = None
+    #: Further remotes serving the same rfc-index. The fastest one is used and the
+    #: others are fallen back to on errors.
+    mirrors: typing.List[str] = []
+    #: Timeout for requests to a remote in seconds.
+    timeout: pydantic.PositiveFloat = 5
+    #: Number of further rounds over all remotes when all failed.
+    retries: pydantic.NonNegativeInt = 0
+    #: Delay in seconds before the first further round over all remotes, doubled
+    #: for each round after.
+    backoff: pydantic.NonNegativeFloat = 1
+
+    @staticmethod
+    def _check_remote(value, name):
+        if urllib.parse.urlparse(value).scheme not in ("http", "https", "file", ""):
+            raise ValueError(f"'{name}' is neither a HTTP URL, a file URL, nor a path")
         return value
 
+    @pydantic.validator("remote", always=True)
+    def _supported_remote(cls, value):  # pylint: disable=no-self-argument
+        return cls._check_remote(value, "remote")
+
+    @pydantic.validator("mirrors", each_item=True)
+    def _supported_mirrors(cls, value):  # pylint: disable=no-self-argument
+        return cls._check_remote(value, "mirrors")
+
+    @property
+    def remotes(self) -> typing.List[str]:
+        """The remote followed by its mirrors."""
+        return [self.remote] + self.mirrors
+
 
 class BibXMLIDsSource(Source):
-    """rsync://rsync.ietf.org/bibxml-ids/ source configuration validation model."""
+    """rsync://rsync.ietf.org/bibxml-ids/ source configuration validation model.
+
+    The remote may be an rsync remote or the HTTP URL of a directory listing.
+    """
+
+    #: Local mirror directory. Not used when a shared cache is configured.
+    local: typing.Optional[str] = None
+    #: Compare files by checksum instead of size and modification time on sync.
+    checksum: bool = False
+    #: Additional arguments to rsync.
+    rsync_args: typing.List[str] = []
+    #: Number of parallel rsync processes, split by filename prefix.
+    shards: pydantic.PositiveInt = 1
+    #: Number of concurrent downloads when synchronizing from an HTTP remote.
+    connections: pydantic.PositiveInt = 8
+    #: Delete local files not in the listing of an HTTP remote. For rsync remotes,
+    #: add ``--delete`` to ``rsync_args`` instead.
+    delete: bool = False
+    #: Read, parse, convert, and write entries in a pipeline of threads with
+    #: queues of this depth between the stages. Entries are processed
+    #: sequentially if not set.
+    pipeline_depth: typing.Optional[pydantic.PositiveInt] = None
+
+
+class Filter(pydantic.BaseModel):
+    """Entry filter configuration validation model."""
+
+    #: Regular expression the beginning of the key of an entry must match.
+    key: typing.Optional[str] = None
+    #: Prefixes of which the document identifier of an entry must start with one,
+    #: e.g., ``draft-ietf-`` or ``RFC9``.
+    prefixes: typing.List[str] = []
+    #: Earliest year of an entry.
+    year_from: typing.Optional[int] = None
+    #: Latest year of an entry.
+    year_to: typing.Optional[int] = None
+    #: Statuses of which an entry must have one, e.g., ``PROPOSED STANDARD``.
+    #: Only applied to sources that provide a status.
+    status: typing.List[str] = []
+
+    @pydantic.validator("key")
+    def _valid_regex(cls, value):  # pylint: disable=no-self-argument
+        if value is not None:
+            try:
+                re.compile(value)
+            except re.error as exc:
+                raise ValueError(
+                    f"'key' is not a valid regular expression: {exc}"
+                ) from exc
+        return value
 
-    local: str
+
+class Sink(pydantic.BaseModel):
+    """Configuration validation model of a sink the entries are pushed to in
+    addition to the bibtex file."""
+
+    #: Path of a JSON Lines file to write the entries to.
+    file: typing.Optional[str] = None
+    #: Path of an SQLite database to store the entries in.
+    sqlite: typing.Optional[str] = None
+    #: URL of an HTTP endpoint to post the entries to as JSON.
+    http: typing.Optional[str] = None
+    #: Number of entries written to the sink at once.
+    batch_size: pydantic.PositiveInt = 500
+    #: Time in seconds after which an incomplete batch is written.
+    flush_interval: pydantic.PositiveFloat = 1
+    #: Timeout in seconds of each request to an HTTP endpoint.
+    timeout: pydantic.PositiveFloat = 30
+
+    @pydantic.validator("http", always=True)
+    def _exactly_one(cls, value, values):  # pylint: disable=no-self-argument
+        targets = [values.get("file"), values.get("sqlite"), value]
+        if sum(target is not None for target in targets) != 1:
+            raise ValueError("Exactly one of 'file', 'sqlite', and 'http' required.")
+        if value is not None and urllib.parse.urlparse(value).scheme not in (
+            "http",
+            "https",
+        ):
+            raise ValueError("'http' is not a HTTP URL")
+        return value
 
 
 class Bib(pydantic.BaseModel):
@@ -56,6 +169,35 @@ class Bib(pydantic.BaseModel):
     name: str
     rfc_index: typing.Optional[RFCIndexSource] = None
     bibxml_ids: typing.Optional[BibXMLIDsSource] = None
+    #: Filter for the entries of the source.
+    filter: typing.Optional[Filter] = None
+    #: Time after a successful run before the bibliography is due again when only
+    #: refreshing due bibliographies.
+    refresh_interval: typing.Optional[datetime.timedelta] = None
+    #: Age after which the bibliography is due even if the upstream source reports
+    #: no changes.
+    max_age: typing.Optional[datetime.timedelta] = None
+    #: Only rewrite the changed entries of an existing bibtex file.
+    incremental: bool = False
+    #: Fraction of blanked bytes in an incrementally written bibtex file after
+    #: which it is compacted.
+    compact_threshold: pydantic.confloat(ge=0, le=1) = 0.25
+    #: Write duplicate entries, e.g., the latest revision of a draft under its
+    #: unversioned key, as crossref aliases and repeated values as @string macros.
+    compact: bool = False
+    #: Sort the entries by key (``key``), by key with numbers compared
+    #: numerically (``natural``), or by year (``year``) instead of keeping the
+    #: order of the source.
+    sort: typing.Optional[typing.Literal["key", "natural", "year"]] = None
+    #: Size in bytes of the serialized entries sorted in memory before sorted
+    #: runs are spilled to temporary files.
+    sort_memory: pydantic.PositiveInt = 64 * 1024 * 1024
+    #: Sinks the entries are pushed to while creating the bibtex file.
+    sinks: typing.List[Sink] = []
+    #: Fields extracted from the source for each entry, in the order they are
+    #: written. Defaults to the fields of the source type, see
+    #: :py:attr:`ietfbib2bibtex.sources.Source.DEFAULT_FIELDS`.
+    fields: typing.Optional[typing.List[str]] = None
 
     @pydantic.validator("bibxml_ids", always=True)
     def _mutually_exclusive(cls, value, values):  # pylint: disable=no-self-argument
@@ -63,13 +205,56 @@ class Bib(pydantic.BaseModel):
             raise ValueError("'rfc_index' and 'bibxml_ids' are mutually exclusive.")
         return value
 
+    @pydantic.validator("compact")
+    def _not_incremental(cls, value, values):  # pylint: disable=no-self-argument
+        if values.get("incremental") and value:
+            raise ValueError("'incremental' and 'compact' are mutually exclusive.")
+        return value
+
+    @pydantic.validator("fields")
+    def _unique_fields(cls, value):  # pylint: disable=no-self-argument
+        if value is not None and (not value or len(set(value)) != len(value)):
+            raise ValueError("'fields' must be a non-empty list of distinct fields.")
+        return value
+
+    @pydantic.validator("sort")
+    def _sort_exclusive(cls, value, values):  # pylint: disable=no-self-argument
+        for option in ("incremental", "compact"):
+            if values.get(option) and value is not None:
+                raise ValueError(f"'{option}' and 'sort' are mutually exclusive.")
+        return value
+
+
+class Cache(pydantic.BaseModel):
+    """Shared cache configuration validation model."""
+
+    path: str = DEFAULT_CACHE_DIR
+    #: Maximum size of the cached objects in bytes.
+    max_size: typing.Optional[pydantic.PositiveInt] = None
+    #: Time during which downloads and mirrors in the cache are not refreshed.
+    ttl: datetime.timedelta = datetime.timedelta(minutes=5)
+
 
 class Config(pydantic_settings.BaseSettings):
     """Base settings validation model."""
 
     bibpath: typing.Optional[str] = None
+    #: File to store the state of previous runs in.
+    state_file: str = DEFAULT_STATE_FILE
+    #: Cache shared between runs and configurations.
+    cache: typing.Optional[Cache] = None
     bibs: typing.List[Bib] = []
 
+    @pydantic.validator("bibs")
+    def _local_or_cache(cls, value, values):  # pylint: disable=no-self-argument
+        if values.get("cache") is None:
+            for bib in value:
+                if bib.bibxml_ids is not None and bib.bibxml_ids.local is None:
+                    raise ValueError(
+                        f"'local' required for {bib.name} without shared cache."
+                    )
+        return value
+
     @classmethod
     def from_file(cls, config_file: typing.Optional[str] = None):
         """Read configuration from file.
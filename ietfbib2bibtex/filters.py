@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Entry filters"""
+
+import re
+
+from . import config
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+class EntryFilter:
+    """Predicates on bibliography entries.
+
+    The predicates are split into stages, so sources can evaluate them as early as
+    possible: :py:meth:`match_name` only needs the document identifier, e.g., from
+    a filename, :py:meth:`match_fields` needs a few fields, but no authors.
+
+    :param filter_config: :py:class:`ietfbib2bibtex.config.Filter` object for
+                          configuration.
+    """
+
+    def __init__(self, filter_config: config.Filter):
+        self.config = filter_config
+        self._key = None if filter_config.key is None else re.compile(filter_config.key)
+        self._prefixes = tuple(filter_config.prefixes)
+        self._status = frozenset(status.upper() for status in filter_config.status)
+
+    @property
+    def name(self) -> str:
+        """Name uniquely identifying the filter."""
+        return self.config.model_dump_json()
+
+    def match_name(self, doc_id: str, key=None) -> bool:
+        """Check the document identifier and key of an entry.
+
+        >>> entry_filter = EntryFilter(
+        ...     config.Filter(key=r"draft-ietf-(core|dnsop)-", prefixes=["draft-"])
+        ... )
+        >>> entry_filter.match_name("draft-ietf-core-dns-over-coap-07")
+        True
+        >>> entry_filter.match_name("draft-lenders-dns-cns-00")
+        False
+
+        :param doc_id: The document identifier, e.g. ``RFC0781`` or
+                       ``draft-ietf-core-dns-over-coap-07``.
+        :param key: The key of the entry. Defaults to ``doc_id``.
+
+        :returns: ``True`` if the entry may pass the filter.
+        """
+        if self._prefixes and not doc_id.startswith(self._prefixes):
+            return False
+        if self._key is not None:
+            return self._key.match(doc_id if key is None else key) is not None
+        return True
+
+    def match_fields(self, year, status=None) -> bool:
+        """Check the fields of an entry that are required by the filter.
+
+        >>> entry_filter = EntryFilter(
+        ...     config.Filter(year_from=2015, status=["Proposed Standard"])
+        ... )
+        >>> entry_filter.match_fields("2022", "PROPOSED STANDARD")
+        True
+        >>> entry_filter.match_fields("2022", "INFORMATIONAL")
+        False
+        >>> entry_filter.match_fields("1981")
+        False
+
+        :param year: The year of the entry.
+        :param status: The status of the entry, if the source provides one.
+
+        :returns: ``True`` if the entry passes the filter.
+        """
+        if self.config.year_from is not None or self.config.year_to is not None:
+            try:
+                year = int(year)
+            except (TypeError, ValueError):
+                return False
+            if self.config.year_from is not None and year < self.config.year_from:
+                return False
+            if self.config.year_to is not None and year > self.config.year_to:
+                return False
+        if self._status and status is not None:
+            return status.upper() in self._status
+        return True
+
+
+def filter_name(entry_filter) -> str:
+    """Name of an optional filter.
+
+    :param entry_filter: An :py:class:`EntryFilter` or ``None``.
+
+    :returns: The :py:attr:`EntryFilter.name` or an empty string for ``None``.
+    """
+    return "" if entry_filter is None else entry_filter.name
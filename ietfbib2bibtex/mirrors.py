@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Selection of the fastest working mirror of a remote"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import logging
+import os
+import time
+import typing
+import urllib.parse
+import urllib.request
+
+import requests
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Time after which the last good mirror is probed against the others again.
+REPROBE_INTERVAL = datetime.timedelta(days=1)
+
+
+def local_path(remote: str) -> typing.Optional[str]:
+    """Path of a remote that is a ``file:`` URL or a path.
+
+    >>> local_path("file:///srv/rfc-index.xml")
+    '/srv/rfc-index.xml'
+    >>> local_path("https://www.rfc-editor.org/rfc-index.xml") is None
+    True
+
+    :param remote: The remote.
+
+    :returns: The path or ``None`` if ``remote`` is an HTTP URL.
+    """
+    parsed = urllib.parse.urlparse(remote)
+    if parsed.scheme == "file":
+        return urllib.request.url2pathname(parsed.path)
+    if parsed.scheme in ("http", "https"):
+        return None
+    return os.path.expanduser(remote)
+
+
+def probe(remote: str, timeout=5) -> typing.Optional[float]:
+    """Measure the latency of a remote.
+
+    HTTP remotes are probed with a HEAD request, which returns once the response
+    headers, i.e., the first bytes, arrived. Local remotes are probed with
+    :py:func:`os.stat`.
+
+    :param remote: The remote.
+    :param timeout: Timeout for the request in seconds.
+
+    :returns: The latency in seconds or ``None`` if the remote is unreachable.
+    """
+    path = local_path(remote)
+    start = time.perf_counter()
+    try:
+        if path is None:
+            response = requests.head(remote, timeout=timeout, allow_redirects=True)
+            if not response.ok:
+                return None
+        else:
+            os.stat(path)
+    except OSError:
+        return None
+    return time.perf_counter() - start
+
+
+class Mirrors:
+    """Mirrors of a remote, tried in order of their latency.
+
+    A mirror that served the remote successfully is recorded in ``last_good`` and
+    tried first without probing on later runs. After :py:data:`REPROBE_INTERVAL`,
+    or if it fails, all mirrors are probed again.
+
+    :param remotes: The mirrors in the order of preference for mirrors with equal
+                    latency. The first one identifies the remote in ``last_good``.
+    :param last_good: Optional dictionary to record the last good mirror in, e.g.,
+                      a section of an :py:class:`ietfbib2bibtex.state.State`.
+    :param timeout: Timeout for probing a mirror in seconds.
+    :param retries: Number of further rounds over all mirrors when all failed.
+    :param backoff: Delay in seconds before the first further round, doubled for
+                    each round after.
+    """
+
+    def __init__(
+        self, remotes, last_good=None, timeout=5, retries=0, backoff=1.0
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.remotes = list(dict.fromkeys(remotes))
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._last_good = {} if last_good is None else last_good
+        self._probed = False
+
+    @property
+    def last_good(self) -> typing.Optional[str]:
+        """The mirror that last served the remote successfully, if it is still
+        configured and was selected by probing less than
+        :py:data:`REPROBE_INTERVAL` ago."""
+        record = self._last_good.get(self.remotes[0])
+        if record is None or record["remote"] not in self.remotes:
+            return None
+        if time.time() - record["since"] > REPROBE_INTERVAL.total_seconds():
+            return None
+        return record["remote"]
+
+    def rank(self, remotes=None) -> typing.List[str]:
+        """Probe mirrors in parallel and sort them by their latency.
+
+        Unreachable mirrors are ranked last, as they might just not support
+        probing.
+
+        :param remotes: The mirrors to rank. Defaults to all mirrors.
+
+        :returns: The mirrors, fastest first.
+        """
+        remotes = self.remotes if remotes is None else list(remotes)
+        if len(remotes) < 2:
+            return remotes
+        with concurrent.futures.ThreadPoolExecutor(len(remotes)) as executor:
+            latencies = list(
+                executor.map(functools.partial(probe, timeout=self.timeout), remotes)
+            )
+        self._probed = True
+        for remote, latency in zip(remotes, latencies):
+            if latency is None:
+                logging.info("Mirror %s is unreachable", remote)
+            else:
+                logging.info("Mirror %s responded in %.3fs", remote, latency)
+        ranked = sorted(
+            zip(remotes, latencies), key=lambda item: (item[1] is None, item[1] or 0)
+        )
+        return [remote for remote, _ in ranked]
+
+    def attempts(self):
+        """Iterate over the mirrors to try in turn until one succeeds.
+
+        The last good mirror is tried first, then the other mirrors by
+        :py:meth:`rank`. If all failed, all mirrors are ranked and tried again up
+        to ``retries`` times, backing off exponentially between the rounds.
+
+        :returns: A generator of tuples of the delay in seconds to wait before
+                  trying a mirror and the mirror.
+        """
+        self._probed = False
+        last_good = self.last_good
+        remotes = self.remotes
+        if last_good is not None:
+            yield 0, last_good
+            remotes = [remote for remote in remotes if remote != last_good]
+        for retry in range(self.retries + 1):
+            delay = self.backoff * 2 ** (retry - 1) if retry else 0
+            for remote in self.rank(remotes):
+                yield delay, remote
+                delay = 0
+            remotes = self.remotes
+
+    def succeeded(self, remote: str):
+        """Record a mirror as the last good mirror.
+
+        :param remote: The mirror that served the remote.
+        """
+        record = self._last_good.get(self.remotes[0])
+        if self._probed or record is None or record["remote"] != remote:
+            record = {"remote": remote, "since": time.time()}
+        self._last_good[self.remotes[0]] = record
+
+    def fetch(self, fetch_from, errors=(OSError,)):
+        """Fetch from the mirrors in turn until one succeeds.
+
+        :param fetch_from: Function called with a mirror to fetch from it.
+        :param errors: Exception types on which the next mirror is tried.
+
+        :raises Exception: The error of the last mirror if all failed.
+
+        :returns: The return value of ``fetch_from``.
+        """
+        failures = []
+        for delay, remote in self.attempts():
+            time.sleep(delay)
+            try:
+                result = fetch_from(remote)
+            except errors as exc:
+                logging.warning("Unable to fetch %s: %s", remote, exc)
+                failures.append(exc)
+                continue
+            self.succeeded(remote)
+            return result
+        raise failures[-1]
+
+    async def afetch(self, fetch_from, errors=(OSError, asyncio.TimeoutError)):
+        """Asynchronously fetch from the mirrors in turn until one succeeds.
+
+        Probing blocks, so the mirrors are ranked in the default executor of the
+        event loop.
+
+        :param fetch_from: Coroutine function called with a mirror to fetch from it.
+        :param errors: Exception types on which the next mirror is tried.
+
+        :raises Exception: The error of the last mirror if all failed.
+
+        :returns: The return value of ``fetch_from``.
+        """
+        loop = asyncio.get_running_loop()
+        attempts = self.attempts()
+        failures = []
+        while True:
+            attempt = await loop.run_in_executor(None, next, attempts, None)
+            if attempt is None:
+                raise failures[-1]
+            delay, remote = attempt
+            await asyncio.sleep(delay)
+            try:
+                result = await fetch_from(remote)
+            except errors as exc:
+                logging.warning("Unable to fetch %s: %s", remote, exc)
+                failures.append(exc)
+                continue
+            self.succeeded(remote)
+            return result
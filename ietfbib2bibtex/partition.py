@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Partitioned creation of bibtex files by independent workers"""
+
+import heapq
+import logging
+import os
+import subprocess
+import sys
+
+import pybtex.database
+import pybtex.io
+
+from . import atomic
+from . import sources
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def sort_key(key):
+    """Sort key of a draft entry in a partial bibtex file.
+
+    Drafts are ordered by family, and the unversioned entry of a draft follows
+    its revisions, as when creating the bibtex file in one go.
+
+    >>> sorted(["draft-foo", "draft-foo-bar-00", "draft-foo-01", "draft-foo-00"],
+    ...        key=sort_key)
+    ['draft-foo-00', 'draft-foo-01', 'draft-foo', 'draft-foo-bar-00']
+
+    :param key: The key of the entry.
+
+    :returns: A key for :py:func:`sorted` or :py:func:`heapq.merge`.
+    """
+    family = sources.draft_family(key)
+    return f"{family}-", family == key, key
+
+
+def write_partial(entries, output):
+    """Write entries sorted by :py:func:`sort_key` to a partial bibtex file.
+
+    :param entries: Iterable of tuples of key and :py:class:`pybtex.database.Entry`.
+    :param output: Path of the partial bibtex file.
+    """
+    data = pybtex.database.BibliographyData()
+    for key, entry in sorted(entries, key=lambda e: sort_key(e[0])):
+        data.entries[key] = entry
+    data.to_file(output, "bibtex")
+
+
+def iterate_chunks(path):
+    """Iterate over the entries of a bibtex file written by pybtex.
+
+    :param path: Path of the bibtex file.
+
+    :returns: A generator of tuples of the key and the serialized entry.
+    """
+    encoding = pybtex.io.get_default_encoding()
+    with open(path, "rb") as bib_file:
+        chunk = []
+        for line in bib_file:
+            if not chunk and line == b"\n":
+                # separator between entries
+                continue
+            chunk.append(line)
+            if line == b"}\n":
+                start = chunk[0].index(b"{") + 1
+                key = chunk[0][start:].rstrip(b",\n").decode(encoding)
+                yield key, b"".join(chunk)
+                chunk = []
+
+
+def iterate_entries(path):
+    """Iterate over the parsed entries of a bibtex file written by pybtex, one
+    entry at a time.
+
+    :param path: Path of the bibtex file.
+
+    :returns: A generator of tuples of key and :py:class:`pybtex.database.Entry`.
+    """
+    for key, chunk in iterate_chunks(path):
+        yield key, parse_chunk(key, chunk)
+
+
+def parse_chunk(key, chunk):
+    """Parse a serialized entry of a bibtex file written by pybtex.
+
+    :param key: The key of the entry.
+    :param chunk: The serialized entry as returned by :py:func:`iterate_chunks`.
+
+    :returns: The :py:class:`pybtex.database.Entry`.
+    """
+    data = pybtex.database.parse_string(
+        chunk.decode(pybtex.io.get_default_encoding()), "bibtex"
+    )
+    return data.entries[key]
+
+
+def merge_entries(partials):
+    """Merge the parsed entries of partial bibtex files with a streaming k-way
+    merge, in the order of :py:func:`merge`.
+
+    :param partials: Paths of the partial bibtex files.
+
+    :returns: A generator of tuples of key and :py:class:`pybtex.database.Entry`.
+    """
+    return heapq.merge(
+        *(iterate_entries(partial) for partial in partials),
+        key=lambda e: sort_key(e[0]),
+    )
+
+
+def merge(partials, output, callback=None):
+    """Merge partial bibtex files into one with a streaming k-way merge.
+
+    The result is byte-identical to the bibtex file created in one go, as long
+    as each partial file is sorted by :py:func:`sort_key`.
+
+    :param partials: Paths of the partial bibtex files.
+    :param output: Path of the merged bibtex file.
+    :param callback: Optional function called with the key and the serialized
+                     entry of each merged entry, see :py:func:`parse_chunk`.
+
+    :raises ValueError: When there are no partial bibtex files.
+    """
+    if not partials:
+        raise ValueError(f"No partial bibtex files to merge to {output}")
+    with atomic.AtomicFile(output) as bib_file:
+        for i, (key, chunk) in enumerate(
+            heapq.merge(
+                *(iterate_chunks(partial) for partial in partials),
+                key=lambda c: sort_key(c[0]),
+            )
+        ):
+            if callback is not None:
+                callback(key, chunk)
+            if i:
+                bib_file.write(b"\n")
+            bib_file.write(chunk)
+
+
+def worker_command(
+    name, index, count, output, config_file=None, state_file=None, cache_path=None
+):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Command line of a worker creating a partial bibtex file.
+
+    :param name: Name of the bibliography.
+    :param index: Index of the partition.
+    :param count: Number of partitions.
+    :param output: Path of the partial bibtex file.
+    :param config_file: Optional configuration file of the worker.
+    :param state_file: Optional state file the worker quarantines malformed
+                       bibxml files in.
+    :param cache_path: Optional directory of the shared cache of the worker.
+
+    :returns: The command line as a list.
+    """
+    return (
+        [sys.executable, "-m", "ietfbib2bibtex"]
+        + ([] if config_file is None else ["-c", config_file])
+        + [
+            "partition",
+            "-b",
+            name,
+            "--index",
+            str(index),
+            "--count",
+            str(count),
+            "-o",
+            output,
+        ]
+        + ([] if state_file is None else ["--state-file", state_file])
+        + ([] if cache_path is None else ["--cache", cache_path])
+    )
+
+
+def run_workers(
+    name, count, directory, config_file=None, state_file=None, cache_path=None
+):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Create the partial bibtex files of a bibliography in local worker processes.
+
+    :param name: Name of the bibliography.
+    :param count: Number of partitions and workers.
+    :param directory: Directory to write the partial bibtex files to.
+    :param config_file: Optional configuration file of the workers.
+    :param state_file: Optional state file the workers quarantine malformed
+                       bibxml files in.
+    :param cache_path: Optional directory of the shared cache of the workers.
+
+    :raises ValueError: When ``count`` is less than 1.
+    :raises subprocess.CalledProcessError: When a worker fails.
+
+    :returns: The paths of the partial bibtex files.
+    """
+    if count < 1:
+        raise ValueError(f"Invalid number of partitions {count}")
+    partials = [
+        os.path.join(directory, f"{name}.{index}.bib") for index in range(count)
+    ]
+    workers = [
+        subprocess.Popen(  # pylint: disable=consider-using-with
+            worker_command(
+                name, index, count, partial, config_file, state_file, cache_path
+            )
+        )
+        for index, partial in enumerate(partials)
+    ]
+    failed = None
+    for worker in workers:
+        if worker.wait() != 0 and failed is None:
+            failed = worker
+    if failed is not None:
+        raise subprocess.CalledProcessError(failed.returncode, failed.args)
+    logging.debug("%d workers created %s", count, ", ".join(partials))
+    return partials
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Threaded pipelines of processing stages connected by bounded queues"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+import typing
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Default maximum number of batches in each queue between two stages.
+DEFAULT_DEPTH = 8
+#: Default number of items handed from one stage to the next at once.
+DEFAULT_BATCH_SIZE = 64
+# interval in seconds in which blocked threads check if the pipeline was stopped
+_POLL_INTERVAL = 0.1
+_END = object()
+
+
+class _Failure(typing.NamedTuple):
+    exc: BaseException
+
+
+class StageStats:
+    """Statistics of a pipeline stage.
+
+    :param name: Name of the stage.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        #: Number of items processed.
+        self.items = 0
+        #: Number of batches processed.
+        self.batches = 0
+        #: Time in seconds spent processing items.
+        self.busy_time = 0.0
+        #: Sum of the depths of the input queue in batches when taking a batch.
+        self.depth_sum = 0
+        #: Maximum depth of the input queue in batches when taking a batch.
+        self.max_depth = 0
+
+    @property
+    def mean_depth(self) -> float:
+        """Mean depth of the input queue in batches when taking a batch."""
+        return self.depth_sum / self.batches if self.batches else 0.0
+
+    def utilisation(self, wall_time: float) -> float:
+        """Fraction of time the stage was busy.
+
+        :param wall_time: Run time of the pipeline in seconds.
+
+        :returns: The fraction of ``wall_time`` spent processing items.
+        """
+        return self.busy_time / wall_time if wall_time else 0.0
+
+
+class Pipeline:
+    """A pipeline of stages, each running in its own thread.
+
+    Consecutive stages are connected by queues of at most ``depth`` batches of
+    items, so a fast stage blocks once its output queue is full. The throughput
+    of the pipeline is thus set by its slowest stage. Items are handed over in
+    batches, as every hand-over between threads may have to wait for the switch
+    interval of the interpreter (see :py:func:`sys.setswitchinterval`). The items
+    leave the pipeline in the order they entered it.
+
+    :param stages: List of tuples of the name and the function of each stage. The
+                   function is called with an item of the previous stage and
+                   returns the item for the next stage.
+    :param depth: Maximum number of batches in each queue.
+    :param batch_size: Number of items per batch.
+    """
+
+    def __init__(
+        self, stages, depth: int = DEFAULT_DEPTH, batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        self.stages = list(stages)
+        self.depth = depth
+        self.batch_size = batch_size
+        #: :py:class:`StageStats` of each stage of the last run.
+        self.stats = [StageStats(name) for name, _ in self.stages]
+        #: Run time in seconds of the last run.
+        self.wall_time = 0.0
+        self._stopped = threading.Event()
+
+    def _put(self, out_queue, item):
+        while not self._stopped.is_set():
+            try:
+                out_queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, in_queue):
+        while not self._stopped.is_set():
+            try:
+                return in_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, items, out_queue):
+        iterator = iter(items)
+        try:
+            while True:
+                batch = list(itertools.islice(iterator, self.batch_size))
+                if not batch:
+                    break
+                if not self._put(out_queue, batch):
+                    return
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self._put(out_queue, _Failure(exc))
+            return
+        self._put(out_queue, _END)
+
+    def _run_stage(self, function, stats, in_queue, out_queue):
+        while True:
+            depth = in_queue.qsize()
+            batch = self._get(in_queue)
+            if batch is _END or isinstance(batch, _Failure):
+                self._put(out_queue, batch)
+                return
+            stats.batches += 1
+            stats.depth_sum += depth
+            stats.max_depth = max(stats.max_depth, depth)
+            start = time.perf_counter()
+            results = []
+            try:
+                for item in batch:
+                    results.append(function(item))
+                    stats.items += 1
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # pass on the results before the failure
+                if results:
+                    self._put(out_queue, results)
+                self._put(out_queue, _Failure(exc))
+                return
+            finally:
+                stats.busy_time += time.perf_counter() - start
+            if not self._put(out_queue, results):
+                return
+
+    def run(self, items):
+        """Run items through the pipeline.
+
+        :param items: Iterable of the input items. It is iterated in a thread of
+                      its own.
+
+        :raises Exception: Any exception raised by ``items`` or a stage.
+
+        :returns: A generator of the output items.
+        """
+        self.stats = [StageStats(name) for name, _ in self.stages]
+        self._stopped.clear()
+        queues = [queue.Queue(self.depth) for _ in range(len(self.stages) + 1)]
+        threads = [
+            threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)
+        ] + [
+            threading.Thread(
+                target=self._run_stage,
+                args=(function, stats, queues[i], queues[i + 1]),
+                daemon=True,
+            )
+            for i, ((_, function), stats) in enumerate(zip(self.stages, self.stats))
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                batch = queues[-1].get()
+                if batch is _END:
+                    break
+                if isinstance(batch, _Failure):
+                    raise batch.exc
+                yield from batch
+        finally:
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+            self.wall_time = time.perf_counter() - start
+
+    def report(self) -> str:
+        """Report the utilisation and the input queue depth of each stage of the last
+        run.
+
+        :returns: The report as a table.
+        """
+        lines = [
+            f"{'stage':<12} {'items':>8} {'busy':>10} {'util':>6} "
+            f"{'mean depth':>10} {'max depth':>9}"
+        ]
+        for stats in self.stats:
+            lines.append(
+                f"{stats.name:<12} {stats.items:>8} {stats.busy_time:>9.3f}s "
+                f"{stats.utilisation(self.wall_time):>6.1%} "
+                f"{stats.mean_depth:>10.1f} {stats.max_depth:>9}"
+            )
+        return "\n".join(lines)
+
+    def log(self, name: str):
+        """Log :py:meth:`report` of the last run.
+
+        :param name: Name of the pipeline in the log message.
+        """
+        logging.info(
+            "Pipeline of %s ran %.3fs:\n%s", name, self.wall_time, self.report()
+        )
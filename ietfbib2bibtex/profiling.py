@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Profiling of bibliography creation"""
+
+import contextlib
+import cProfile
+import os
+import sys
+import tracemalloc
+
+from . import sources
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Supported profiling modes.
+MODES = ("cpu", "memory")
+
+
+def pstats_path(bib) -> str:
+    """Path to the CPU profile of a bibliography.
+
+    :param bib: The :py:class:`ietfbib2bibtex.bib.Bib`.
+
+    :returns: The path to ``name.pstats`` next to the bibtex file.
+    """
+    return f"{os.path.join(bib.path, bib.name)}.pstats"
+
+
+def report_files(file_stats, top=10, stream=None):
+    """Report the slowest and the largest parsed files.
+
+    :param file_stats: List of :py:class:`ietfbib2bibtex.sources.FileStats`.
+    :param top: Number of files to report each.
+    :param stream: Text stream to write the report to. Defaults to
+                   :py:data:`sys.stderr`.
+    """
+    stream = sys.stderr if stream is None else stream
+    print(f"{top} slowest files:", file=stream)
+    for stats in sorted(file_stats, key=lambda s: s.parse_time, reverse=True)[:top]:
+        print(
+            f"  {stats.parse_time * 1000:10.3f} ms {stats.size:10d} B  {stats.path}",
+            file=stream,
+        )
+    print(f"{top} largest files:", file=stream)
+    for stats in sorted(file_stats, key=lambda s: s.size, reverse=True)[:top]:
+        print(
+            f"  {stats.size:10d} B {stats.parse_time * 1000:10.3f} ms  {stats.path}",
+            file=stream,
+        )
+
+
+def report_memory(snapshot, peak, top=10, stream=None):
+    """Report the top allocation sites and the peak of traced memory.
+
+    :param snapshot: A :py:class:`tracemalloc.Snapshot`.
+    :param peak: The peak size of traced memory in bytes.
+    :param top: Number of allocation sites to report.
+    :param stream: Text stream to write the report to. Defaults to
+                   :py:data:`sys.stderr`.
+    """
+    stream = sys.stderr if stream is None else stream
+    print(f"Peak traced memory: {peak} B", file=stream)
+    print(f"{top} top allocation sites:", file=stream)
+    for stat in snapshot.statistics("lineno")[:top]:
+        print(f"  {stat}", file=stream)
+
+
+@contextlib.contextmanager
+def profile(mode, bibs, top=10, stream=None):
+    """Profile the creation of bibliographies sharing a source.
+
+    With mode ``cpu``, a :py:mod:`cProfile` profile is written to the
+    :py:func:`pstats_path` of each bibliography. With mode ``memory``, the top
+    allocation sites and the peak of memory traced by :py:mod:`tracemalloc` are
+    reported. In both modes, the slowest and largest files of a
+    :py:class:`ietfbib2bibtex.sources.BibXMLIDsSource` are reported.
+
+    :param mode: One of :py:data:`MODES` or ``None`` to not profile.
+    :param bibs: List of :py:class:`ietfbib2bibtex.bib.Bib` objects with the same
+                 source.
+    :param top: Number of entries in each report.
+    :param stream: Text stream to write the reports to. Defaults to
+                   :py:data:`sys.stderr`.
+
+    :raises ValueError: When ``mode`` is not supported.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode}")
+    stream = sys.stderr if stream is None else stream
+    source = bibs[0].source
+    if isinstance(source, sources.BibXMLIDsSource):
+        source.file_stats = []
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        print(f"Profile of {', '.join(bib.name for bib in bibs)}:", file=stream)
+        if mode == "cpu":
+            profiler.disable()
+            for bib in bibs:
+                profiler.dump_stats(pstats_path(bib))
+                print(f"CPU profile written to {pstats_path(bib)}", file=stream)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report_memory(snapshot, peak, top, stream)
+        if isinstance(source, sources.BibXMLIDsSource):
+            report_files(source.file_stats, top, stream)
+            source.file_stats = None
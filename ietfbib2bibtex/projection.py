@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Single-pass extraction of projected fields from XML elements"""
+
+import typing
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def resolve(fields, default):
+    """Resolve an optional field projection.
+
+    :param fields: Sequence of field names or ``None``.
+    :param default: Tuple of the field names extracted by default.
+
+    :returns: A tuple of the field names, ``default`` for ``None``.
+    """
+    return default if fields is None else tuple(fields)
+
+
+def projection_name(fields) -> str:
+    """Name of an optional field projection, e.g., for cache keys.
+
+    >>> projection_name(["title", "year"])
+    'title,year'
+
+    :param fields: Sequence of field names or ``None``.
+
+    :returns: The comma-separated field names or an empty string for ``None``.
+    """
+    return "" if fields is None else ",".join(fields)
+
+
+class Extractor(typing.NamedTuple):
+    """Extraction of a field from an XML element."""
+
+    #: Tag of the child element the field is extracted from, ``None`` to extract
+    #: the field from the element itself.
+    tag: typing.Optional[str]
+    #: Function called with the child element (or the element itself) that
+    #: returns the value of the field.
+    function: typing.Callable
+    #: If not ``None``, the values of all children with :py:attr:`tag` are
+    #: collected and the list is passed to this function. Otherwise, only the
+    #: first child is used.
+    join: typing.Optional[typing.Callable] = None
+
+
+class Plan:
+    """Extraction plan compiled from a field projection.
+
+    The children of an element are visited once and dispatched by tag to the
+    extractors of the requested fields. Children without requested fields are
+    skipped without looking into them.
+
+    >>> import lxml.etree
+    >>> plan = Plan(
+    ...     {
+    ...         "title": Extractor("title", lambda e: e.text),
+    ...         "author": Extractor("author", lambda e: e.get("name"), join=list),
+    ...         "lang": Extractor(None, lambda e: e.get("lang")),
+    ...         "year": Extractor("date", lambda e: e.get("year")),
+    ...     },
+    ...     ["author", "title"],
+    ... )
+    >>> plan.extract(lxml.etree.fromstring(
+    ...     '<ref lang="en"><author name="A"/><title>T</title><author name="B"/>'
+    ...     '<date year="2024"/></ref>'
+    ... ))
+    {'author': ['A', 'B'], 'title': 'T'}
+
+    :param extractors: Dictionary mapping each supported field to its
+                       :py:class:`Extractor`.
+    :param fields: The requested fields.
+
+    :raises ValueError: When a requested field is not supported.
+    """
+
+    def __init__(self, extractors, fields):
+        unknown = [field for field in fields if field not in extractors]
+        if unknown:
+            raise ValueError(f"Unsupported fields {', '.join(unknown)}")
+        #: The requested fields.
+        self.fields = tuple(fields)
+        self._own = []
+        self._by_tag = {}
+        self._joins = {}
+        for field in self.fields:
+            extractor = extractors[field]
+            if extractor.tag is None:
+                self._own.append((field, extractor))
+            else:
+                self._by_tag.setdefault(extractor.tag, []).append((field, extractor))
+            if extractor.join is not None:
+                self._joins[field] = extractor.join
+
+    def extract(self, element, children=None):
+        """Extract the requested fields from an element.
+
+        :param element: The element.
+        :param children: Iterable of the elements to dispatch by tag. Defaults to
+                         the children of ``element``.
+
+        :returns: A dictionary of the requested fields found, in the order of
+                  :py:attr:`fields`. Fields collected from multiple children are
+                  always included, joined from an empty list if none was found.
+        """
+        values = {}
+        for field, extractor in self._own:
+            values[field] = extractor.function(element)
+        collected = {}
+        for child in element if children is None else children:
+            for field, extractor in self._by_tag.get(child.tag, ()):
+                if extractor.join is not None:
+                    collected.setdefault(field, []).append(extractor.function(child))
+                elif field not in values:
+                    values[field] = extractor.function(child)
+        for field, join in self._joins.items():
+            values[field] = join(collected.get(field, []))
+        return {field: values[field] for field in self.fields if field in values}
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Sinks that push entries in batches into external indexes"""
+
+import abc
+import contextlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+import requests
+
+from . import atomic
+from . import config
+from . import pipeline
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+_END = object()
+
+
+def entry_to_dict(key, entry):
+    """Represent an entry as JSON-serializable dictionary.
+
+    >>> import pybtex.database
+    >>> entry = pybtex.database.Entry(
+    ...     "techreport",
+    ...     fields={"title": "{Foo}", "year": "2024"},
+    ...     persons={"author": [pybtex.database.Person("Lenders, Martine")]},
+    ... )
+    >>> entry_to_dict("RFC-1", entry)  # doctest: +NORMALIZE_WHITESPACE
+    {'key': 'RFC-1', 'type': 'techreport', 'fields': {'title': '{Foo}',
+     'year': '2024'}, 'persons': {'author': ['Lenders, Martine']}}
+
+    :param key: The key of the entry.
+    :param entry: The :py:class:`pybtex.database.Entry`.
+
+    :returns: A dictionary with the key, the type, the fields, and the persons of
+              the entry.
+    """
+    return {
+        "key": key,
+        "type": entry.original_type,
+        "fields": dict(entry.fields),
+        "persons": {
+            role: [str(person) for person in persons]
+            for role, persons in entry.persons.items()
+        },
+    }
+
+
+class Sink(abc.ABC):
+    """Base class for a sink of entries."""
+
+    @abc.abstractmethod
+    def write(self, batch):
+        """Write a batch of entries to the sink.
+
+        :param batch: List of tuples of key and :py:class:`pybtex.database.Entry`.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def close(self):
+        """Finish writing to the sink after all batches were written."""
+
+    def abort(self):
+        """Stop writing to the sink after a failure. Defaults to :py:meth:`close`."""
+        self.close()
+
+
+class FileSink(Sink):
+    """Sink writing entries to a JSON Lines file, one object per entry as returned
+    by :py:func:`entry_to_dict`.
+
+    The file is replaced atomically when the sink is closed, and left alone if it
+    is aborted.
+
+    :param path: Path of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = atomic.AtomicFile(path, "w", encoding="utf-8")
+
+    def __str__(self):
+        return self.path
+
+    def write(self, batch):
+        self._file.file.writelines(
+            f"{json.dumps(entry_to_dict(key, entry), ensure_ascii=False)}\n"
+            for key, entry in batch
+        )
+
+    def close(self):
+        self._file.commit()
+
+    def abort(self):
+        self._file.discard()
+
+
+class SQLiteSink(Sink):
+    """Sink storing entries in a table ``entries`` of an SQLite database.
+
+    The table has the columns ``key`` (primary key), ``type``, ``fields``, and
+    ``persons``, the latter two as JSON objects, see :py:func:`entry_to_dict`.
+    Existing rows of the same key are replaced. Each batch is written in one
+    transaction.
+
+    :param path: Path of the database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # the connection is used by the thread of the sink
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, type TEXT, fields TEXT, persons TEXT)"
+            )
+
+    def __str__(self):
+        return self.path
+
+    def write(self, batch):
+        rows = []
+        for key, entry in batch:
+            entry_dict = entry_to_dict(key, entry)
+            rows.append(
+                (
+                    key,
+                    entry_dict["type"],
+                    json.dumps(entry_dict["fields"], ensure_ascii=False),
+                    json.dumps(entry_dict["persons"], ensure_ascii=False),
+                )
+            )
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class HTTPSink(Sink):
+    """Sink posting each batch as a JSON array of the objects returned by
+    :py:func:`entry_to_dict` to an HTTP endpoint.
+
+    Connections are kept alive between batches.
+
+    :param url: URL of the endpoint.
+    :param timeout: Timeout in seconds of each request.
+    """
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def __str__(self):
+        return self.url
+
+    def write(self, batch):
+        response = self._session.post(
+            self.url,
+            json=[entry_to_dict(key, entry) for key, entry in batch],
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self._session.close()
+
+
+def create(sink_config: config.Sink) -> Sink:
+    """Create a sink from its configuration.
+
+    :param sink_config: :py:class:`ietfbib2bibtex.config.Sink` object for
+                        configuration.
+
+    :returns: The :py:class:`Sink`.
+    """
+    if sink_config.file is not None:
+        return FileSink(sink_config.file)
+    if sink_config.sqlite is not None:
+        return SQLiteSink(sink_config.sqlite)
+    return HTTPSink(sink_config.http, timeout=sink_config.timeout)
+
+
+class _Worker:  # pylint: disable=too-many-instance-attributes
+    def __init__(self, sink, batch_size, flush_interval, depth):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.entries = 0
+        self.batches = 0
+        self.error = None
+        self.queue = queue.Queue(depth * batch_size)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _flush(self, batch):
+        if batch and self.error is None:
+            try:
+                self.sink.write(batch)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                self.error = exc
+                return
+            self.entries += len(batch)
+            self.batches += 1
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _END:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+
+class Sinks:
+    """Sinks fed with entries concurrently to their production.
+
+    Each sink runs in a thread of its own, which collects the entries into
+    batches. A batch is written once it has ``batch_size`` entries or
+    ``flush_interval`` seconds after its first entry arrived, whatever comes
+    first. If a sink falls behind by more than ``depth`` batches, :py:meth:`put`
+    blocks.
+
+    Use as context manager: On exit, the remaining entries are written and the
+    sinks are closed, or aborted if the block raised an exception.
+
+    :param sinks: List of tuples of a :py:class:`Sink`, its batch size, and its
+                  flush interval.
+    :param depth: Maximum number of batches queued for each sink.
+    """
+
+    def __init__(self, sinks, depth=pipeline.DEFAULT_DEPTH):
+        self._workers = [
+            _Worker(sink, batch_size, flush_interval, depth)
+            for sink, batch_size, flush_interval in sinks
+        ]
+
+    @classmethod
+    def from_config(cls, sink_configs):
+        """Create sinks from their configurations.
+
+        :param sink_configs: List of :py:class:`ietfbib2bibtex.config.Sink`
+                             objects for configuration.
+
+        :raises Exception: Any exception raised when creating a sink. The sinks
+                           created before are aborted.
+
+        :returns: The :py:class:`Sinks`.
+        """
+        with contextlib.ExitStack() as stack:
+            sinks = []
+            for sink_config in sink_configs:
+                sink = create(sink_config)
+                stack.callback(sink.abort)
+                sinks.append((sink, sink_config.batch_size, sink_config.flush_interval))
+            the_sinks = cls(sinks)
+            stack.pop_all()
+        return the_sinks
+
+    def put(self, key, entry):
+        """Hand an entry to all sinks.
+
+        :param key: The key of the entry.
+        :param entry: The :py:class:`pybtex.database.Entry`.
+
+        :raises Exception: Any exception raised by a sink before.
+        """
+        for worker in self._workers:
+            if worker.error is not None:
+                raise worker.error
+            worker.queue.put((key, entry))
+
+    def tee(self, entries):
+        """Hand entries to all sinks while iterating over them.
+
+        :param entries: Iterable of tuples of key and
+                        :py:class:`pybtex.database.Entry`.
+
+        :returns: A generator of the same tuples.
+        """
+        if not self._workers:
+            yield from entries
+            return
+        for key, entry in entries:
+            self.put(key, entry)
+            yield key, entry
+
+    def close(self, abort=False):
+        """Write the remaining entries and close all sinks.
+
+        :param abort: Abort the sinks instead of closing them.
+
+        :raises Exception: Any exception raised by a sink.
+        """
+        failures = []
+        for worker in self._workers:
+            worker.queue.put(_END)
+        for worker in self._workers:
+            worker.thread.join()
+            if abort or worker.error is not None:
+                worker.sink.abort()
+            else:
+                worker.sink.close()
+            if worker.error is not None:
+                logging.error("Unable to write to %s: %s", worker.sink, worker.error)
+                failures.append(worker.error)
+            else:
+                logging.info(
+                    "Wrote %d entries in %d batches to %s",
+                    worker.entries,
+                    worker.batches,
+                    worker.sink,
+                )
+        if failures and not abort:
+            raise failures[-1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(abort=exc_type is not None)
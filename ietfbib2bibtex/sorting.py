@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Sorted bibtex files with bounded memory by external merge sort"""
+
+import heapq
+import logging
+import os
+import pickle
+import re
+import tempfile
+
+from . import bibfile
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Supported sort orders.
+ORDERS = ("key", "natural", "year")
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(string):
+    """Natural sort key of a string, i.e., numbers in it are compared numerically.
+
+    >>> sorted(["RFC-10", "rfc-9", "RFC-100"], key=natural_key)
+    ['rfc-9', 'RFC-10', 'RFC-100']
+
+    :param string: The string.
+
+    :returns: A key for :py:func:`sorted`.
+    """
+    return tuple(
+        int(part) if i % 2 else part.lower()
+        for i, part in enumerate(_DIGITS.split(string))
+    )
+
+
+def sort_key(order, key, entry):
+    """Sort key of an entry.
+
+    With order ``key``, entries are sorted by their key, ignoring case, as keys
+    are case-insensitive. With order ``natural``, numbers in the key are compared
+    numerically, e.g., ``RFC-9`` precedes ``RFC-10``. With order ``year``, entries
+    are sorted by their ``year`` field and then naturally by key. Entries without
+    a year come last.
+
+    :param order: One of :py:data:`ORDERS`.
+    :param key: The key of the entry.
+    :param entry: The :py:class:`pybtex.database.Entry`.
+
+    :raises ValueError: When ``order`` is not supported.
+
+    :returns: A key for :py:func:`sorted` or :py:func:`heapq.merge`.
+    """
+    if order == "key":
+        return (key.lower(),)
+    if order == "natural":
+        return natural_key(key), key.lower()
+    if order == "year":
+        year = entry.fields.get("year")
+        return (
+            year is None,
+            natural_key(year or ""),
+            natural_key(key),
+            key.lower(),
+        )
+    raise ValueError(f"Unsupported sort order {order!r}")
+
+
+def _write_run(records, directory):
+    run = tempfile.TemporaryFile(dir=directory)
+    for record in records:
+        pickle.dump(record, run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    while True:
+        try:
+            yield pickle.load(run)
+        except EOFError:
+            return
+
+
+def _deduplicated(records):
+    # as in pybtex.database.BibliographyData, keys are case-insensitive and a
+    # later duplicate replaces an earlier one
+    last_key = last_chunk = None
+    for _, _, key, chunk in records:
+        if last_key is not None and last_key.lower() != key.lower():
+            yield last_key, last_chunk
+        last_key, last_chunk = key, chunk
+    if last_key is not None:
+        yield last_key, last_chunk
+
+
+class Sorter:  # pylint: disable=too-many-instance-attributes
+    """External merge sort of entries that are added one at a time.
+
+    Serialized entries are collected until their size reaches ``memory``. Then,
+    they are sorted and spilled as a run to a temporary file. Finally,
+    :py:meth:`chunks` merges all runs in a streaming pass, so only about
+    ``memory`` bytes of entries are held at any time.
+
+    Several sorters can be fed from one iteration over a source, e.g., one for
+    each bibliography sharing it.
+
+    Entries with the same key, ignoring case, replace earlier ones. With order
+    ``year``, duplicates are not necessarily sorted next to each other, so the
+    last added entry of each key is tracked in memory.
+
+    :param order: One of :py:data:`ORDERS`, see :py:func:`sort_key`.
+    :param memory: Size in bytes of the serialized entries sorted in memory.
+    :param directory: Directory for the temporary files. Defaults to the
+                      directory of :py:mod:`tempfile`.
+    """
+
+    def __init__(self, order, memory, directory=None):
+        self.order = order
+        self.memory = memory
+        self.directory = directory
+        self._records = []
+        self._size = 0
+        self._count = 0
+        self._runs = []
+        # sequence number of the last entry of each key for order year
+        self._last = {} if order == "year" else None
+
+    def add(self, key, entry):
+        """Add an entry.
+
+        :param key: The key of the entry.
+        :param entry: The :py:class:`pybtex.database.Entry`.
+        """
+        chunk = bibfile.serialize_entry(key, entry)
+        # the sequence number keeps the sort stable and never lets the comparison
+        # reach the entry itself
+        self._records.append(
+            (sort_key(self.order, key, entry), self._count, key, chunk)
+        )
+        if self._last is not None:
+            self._last[key.lower()] = self._count
+        self._count += 1
+        self._size += len(chunk)
+        if self._size >= self.memory:
+            self._records.sort()
+            self._runs.append(_write_run(self._records, self.directory))
+            self._records = []
+            self._size = 0
+
+    def chunks(self):
+        """Merge the entries added so far.
+
+        The temporary files are removed once the generator is exhausted or
+        closed.
+
+        :returns: A generator of tuples of key and the entry serialized with
+                  :py:func:`ietfbib2bibtex.bibfile.serialize_entry`.
+        """
+        try:
+            self._records.sort()
+            if self._runs:
+                logging.debug("Merging %d sorted runs", len(self._runs) + 1)
+            records = heapq.merge(
+                self._records, *(_read_run(run) for run in self._runs)
+            )
+            if self._last is not None:
+                records = (
+                    record
+                    for record in records
+                    if self._last[record[2].lower()] == record[1]
+                )
+            yield from _deduplicated(records)
+        finally:
+            self.close()
+
+    def close(self):
+        """Remove the temporary files."""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._records = []
+        if self._last is not None:
+            self._last = {}
+
+
+def sorted_chunks(entries, order, memory, directory=None):
+    """Serialize and sort entries with an external merge sort, see
+    :py:class:`Sorter`.
+
+    Entries with the same key, ignoring case, replace earlier ones.
+
+    :param entries: Iterable of tuples of key and :py:class:`pybtex.database.Entry`.
+    :param order: One of :py:data:`ORDERS`, see :py:func:`sort_key`.
+    :param memory: Size in bytes of the serialized entries sorted in memory.
+    :param directory: Directory for the temporary files. Defaults to the
+                      directory of :py:mod:`tempfile`.
+
+    :returns: A generator of tuples of key and the entry serialized with
+              :py:func:`ietfbib2bibtex.bibfile.serialize_entry`.
+    """
+    sorter = Sorter(order, memory, directory)
+    try:
+        for key, entry in entries:
+            sorter.add(key, entry)
+        yield from sorter.chunks()
+    finally:
+        sorter.close()
+
+
+def write(entries, path, order, memory):
+    """Write entries to a bibtex file sorted by :py:func:`sorted_chunks`.
+
+    The temporary files are created next to the bibtex file and the bibtex file
+    is replaced atomically.
+
+    :param entries: Iterable of tuples of key and :py:class:`pybtex.database.Entry`.
+    :param path: Path of the bibtex file.
+    :param order: One of :py:data:`ORDERS`, see :py:func:`sort_key`.
+    :param memory: Size in bytes of the serialized entries sorted in memory.
+    """
+    bibfile.write_serialized(
+        path,
+        sorted_chunks(
+            entries, order, memory, directory=os.path.dirname(os.path.abspath(path))
+        ),
+    )
@@ -8,20 +8,41 @@
 # General Public License v2.1. See the file LICENSE in the top level
 # directory for more detail
 
+# pylint: disable=too-many-lines
+
 """Bibliography sources"""
 
 import abc
+import asyncio
+import concurrent.futures
+import functools
 import glob
+import io
+import itertools
 import logging
+import mmap
 import os
 import re
-import subprocess
+import time
+import typing
+import zlib
 
 import requests
 import lxml.etree
 import pybtex.database
 
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
 from . import config
+from . import mirrors
+from . import pipeline
+from . import projection
+from . import sync
+from .cache import digest
+from .filters import filter_name
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2022 Freie Universität Berlin"
@@ -29,9 +50,51 @@ __license__ = "LGPL v2.1"
 __email__ = "m.lenders@fu-berlin.de"
 
 
+#: Number of entries handed over from a worker thread to the event loop at once.
+ASYNC_BATCH_SIZE = 256
+
+
+def _next_batch(iterator, size):
+    return list(itertools.islice(iterator, size))
+
+
+async def abatched(entries, size=ASYNC_BATCH_SIZE):
+    """Iterate over blocking iterable in the default executor of the event loop.
+
+    The items are fetched in batches, so the event loop is not blocked by I/O or
+    parsing, but also not woken up for every single item.
+
+    :param entries: The blocking iterable, e.g., a generator of entries.
+    :param size: Number of items per batch.
+
+    :returns: An asynchronous generator of the items of ``entries``.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(entries)
+    while True:
+        batch = await loop.run_in_executor(None, _next_batch, iterator, size)
+        if not batch:
+            return
+        for entry in batch:
+            yield entry
+
+
 class Source(abc.ABC):
     """Base class for a bibliography source."""
 
+    #: Validator of the remote content at the last iteration, e.g., an HTTP ETag.
+    validator = None
+    #: Queue depth of the pipeline the entries are produced in, ``None`` if the
+    #: entries are produced sequentially.
+    pipeline_depth = None
+    #: End of the last synchronization of a local copy of the remote as POSIX
+    #: timestamp, ``None`` if the source keeps no local copy.
+    synced = None
+    #: Fields that can be extracted from the entries of the source.
+    FIELDS = ()
+    #: Fields extracted from the entries of the source by default.
+    DEFAULT_FIELDS = ()
+
     @property
     @abc.abstractmethod
     def remote(self):
@@ -39,76 +102,845 @@ class Source(abc.ABC):
         raise NotImplementedError()  # pragma: no cover
 
     @abc.abstractmethod
-    def iterate_entries(self):
-        """Iterate over all valid entries of the bibliography source."""
+    def iterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        """Iterate over all valid entries of the bibliography source.
+
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+                             Entries not passing it are skipped before they are
+                             fully converted.
+        :param refresh: Fetch the remote again. Otherwise, the content of the last
+                        iteration is reused if available.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+        """
         raise NotImplementedError()  # pragma: no cover
 
+    async def aiterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        """Asynchronously iterate over all valid entries of the bibliography source.
+
+        This implementation runs :py:meth:`iterate_entries` in batches in the
+        default executor of the event loop. Subclasses fetch their remote without
+        blocking where possible.
+
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+        :param refresh: Fetch the remote again. Otherwise, the content of the last
+                        iteration is reused if available.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+        """
+        async for entry in abatched(
+            self.iterate_entries(entry_filter, refresh, fields=fields)
+        ):
+            yield entry
+
+    def lookup(self, key, entry_filter=None, fields=None):
+        """Look up a single entry of the bibliography source by its key.
+
+        This implementation iterates over all entries without refreshing the
+        source. Subclasses resolve keys directly where possible.
+
+        :param key: The key of the entry (case-insensitive).
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`
+                             the entry must pass.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+
+        :returns: A tuple of key and :py:class:`pybtex.database.Entry` or ``None``
+                  if there is no such entry.
+        """
+        key = key.lower()
+        for entry_key, entry in self.iterate_entries(
+            entry_filter, refresh=False, fields=fields
+        ):
+            if entry_key.lower() == key:
+                return entry_key, entry
+        return None
+
+    def is_modified(self, validator=None, synced=None):
+        # pylint: disable=unused-argument
+        """Check cheaply if the remote changed since the last iteration.
+
+        :param validator: The :py:attr:`validator` of the last iteration.
+        :param synced: The :py:attr:`synced` of the last iteration.
+
+        :returns: ``False`` if the remote is known to be unchanged, ``True``
+                  otherwise.
+        """
+        return True
+
+
+RFC_INDEX_NS = "{https://www.rfc-editor.org/rfc-index}"
+RFC_DOC_ID = re.compile(r"RFC\d+")
+RFC_KEY = re.compile(r"(RFC)0*([1-9][0-9]*)")
+RFC_NUMBER = re.compile(r"RFC0*([1-9][0-9]*)")
+RFC_ENTRY_START = re.compile(rb"<rfc-entry[\s>]")
+RFC_ENTRY_END = b"</rfc-entry>"
+RFC_LOOKUP_KEY = re.compile(r"RFC-?0*([1-9][0-9]*)$", re.IGNORECASE)
+
+
+def _text(element):
+    return element.text
+
+
+def _collapsed_text(element):
+    return " ".join(" ".join(element.itertext()).split())
+
+
+def _braced_text(element):
+    return f"{{{element.text}}}"
+
+
+def _rfc_index_tag(tag):
+    return f"{RFC_INDEX_NS}{tag}"
+
+
+def _rfc_index_child_text(tag):
+    return lambda element: element.findtext(_rfc_index_tag(tag))
+
+
+def _rfc_keys(element):
+    return ", ".join(
+        RFC_KEY.sub(r"\1-\2", doc_id.text)
+        for doc_id in element.iter(_rfc_index_tag("doc-id"))
+    )
+
+
+def _rfc_index_related(tag):
+    return projection.Extractor(_rfc_index_tag(tag), _rfc_keys)
+
+
+#: Extractors of the fields supported for ``<rfc-entry>`` elements. Fields
+#: starting with ``_`` are only used internally.
+RFC_INDEX_EXTRACTORS = {
+    "_doc_id": projection.Extractor(_rfc_index_tag("doc-id"), _text),
+    "_year": projection.Extractor(
+        _rfc_index_tag("date"), _rfc_index_child_text("year")
+    ),
+    "_status": projection.Extractor(_rfc_index_tag("current-status"), _text),
+    "title": projection.Extractor(_rfc_index_tag("title"), _braced_text),
+    "institution": projection.Extractor(None, lambda _: "IETF"),
+    "type": projection.Extractor(None, lambda _: "RFC"),
+    "number": projection.Extractor(
+        _rfc_index_tag("doc-id"), lambda e: RFC_NUMBER.sub(r"\1", e.text)
+    ),
+    "month": projection.Extractor(
+        _rfc_index_tag("date"), _rfc_index_child_text("month")
+    ),
+    "year": projection.Extractor(_rfc_index_tag("date"), _rfc_index_child_text("year")),
+    "doi": projection.Extractor(_rfc_index_tag("doi"), _text),
+    "url": projection.Extractor(
+        _rfc_index_tag("doi"), lambda e: f"https://doi.org/{e.text}"
+    ),
+    "author": projection.Extractor(
+        _rfc_index_tag("author"), _rfc_index_child_text("name"), join=list
+    ),
+    "abstract": projection.Extractor(_rfc_index_tag("abstract"), _collapsed_text),
+    "keywords": projection.Extractor(
+        _rfc_index_tag("keywords"), lambda e: ", ".join(kw.text for kw in e)
+    ),
+    "obsoletes": _rfc_index_related("obsoletes"),
+    "obsoletedby": _rfc_index_related("obsoleted-by"),
+    "updates": _rfc_index_related("updates"),
+    "updatedby": _rfc_index_related("updated-by"),
+    "stream": projection.Extractor(_rfc_index_tag("stream"), _text),
+    "status": projection.Extractor(_rfc_index_tag("current-status"), _text),
+}
+
+
+#: Fields extracted from ``<rfc-entry>`` elements by default, in the order they
+#: are written.
+RFC_INDEX_DEFAULT_FIELDS = (
+    "title",
+    "institution",
+    "type",
+    "number",
+    "month",
+    "year",
+    "doi",
+    "url",
+    "author",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _rfc_index_plan(fields, filtered):
+    internal = ("_doc_id", "_year", "_status") if filtered else ("_doc_id",)
+    return projection.Plan(RFC_INDEX_EXTRACTORS, internal + fields)
+
+
+def projected_entry(values):
+    """Build a bibtex entry from the values extracted by a
+    :py:class:`ietfbib2bibtex.projection.Plan`.
+
+    :param values: Dictionary of the public fields. The field ``author``, if
+                   present, is a list of full names of the authors. Fields
+                   that are ``None`` or empty are omitted.
+
+    :raises pybtex.database.InvalidNameString: When an author name is malformed.
+
+    :returns: The :py:class:`pybtex.database.Entry`.
+    """
+    persons = {}
+    if "author" in values:
+        persons["author"] = [
+            pybtex.database.Person(name) for name in values.pop("author")
+        ]
+    return pybtex.database.Entry(
+        "techreport",
+        {field: value for field, value in values.items() if value},
+        persons=persons,
+    )
+
+
+def _dump_entry(entry):
+    return {
+        "type": entry.original_type,
+        "fields": dict(entry.fields),
+        "persons": {
+            role: [
+                [
+                    " ".join(names)
+                    for names in (
+                        person.first_names,
+                        person.middle_names,
+                        person.prelast_names,
+                        person.last_names,
+                        person.lineage_names,
+                    )
+                ]
+                for person in persons
+            ]
+            for role, persons in entry.persons.items()
+        },
+    }
+
+
+def _load_entry(data):
+    return pybtex.database.Entry(
+        data["type"],
+        data["fields"],
+        persons={
+            role: [
+                pybtex.database.Person(
+                    first=first,
+                    middle=middle,
+                    prelast=prelast,
+                    last=last,
+                    lineage=lineage,
+                )
+                for first, middle, prelast, last, lineage in persons
+            ]
+            for role, persons in data["persons"].items()
+        },
+    )
+
+
+def rfc_entry_to_bibtex(element, entry_filter=None, fields=None):
+    """Convert an ``<rfc-entry>`` element of the rfc-index to a bibtex entry.
+
+    :param element: The ``<rfc-entry>`` element.
+    :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+    :param fields: Optional sequence of the fields to extract, one of
+                   :py:data:`RFC_INDEX_EXTRACTORS` each. Defaults to
+                   :py:data:`RFC_INDEX_DEFAULT_FIELDS`.
+
+    :returns: A tuple of key and :py:class:`pybtex.database.Entry` or ``None`` if
+              the element does not describe an RFC or does not pass
+              ``entry_filter``.
+    """
+    values = _rfc_index_plan(
+        projection.resolve(fields, RFC_INDEX_DEFAULT_FIELDS), entry_filter is not None
+    ).extract(element)
+    doc_id = values.pop("_doc_id", None)
+    if doc_id is None or not RFC_DOC_ID.match(doc_id):
+        # erroneous tagging
+        return None
+    key = RFC_KEY.sub(r"\1-\2", doc_id)
+    year = values.pop("_year", None)
+    status = values.pop("_status", None)
+    if entry_filter is not None and not (
+        entry_filter.match_name(doc_id, key) and entry_filter.match_fields(year, status)
+    ):
+        return None
+    return key, projected_entry(values)
+
+
+def rfc_index_chunks(content, number):
+    """Split an rfc-index into chunks of whole ``<rfc-entry>`` elements.
+
+    >>> rfc_index_chunks(
+    ...     b"<rfc-index><rfc-entry>1</rfc-entry><rfc-entry>2</rfc-entry>"
+    ...     b"<rfc-entry>3</rfc-entry></rfc-index>",
+    ...     2,
+    ... )
+    [(11, 59), (59, 83)]
+
+    :param content: The raw content of the rfc-index.
+    :param number: The maximum number of chunks.
+
+    :returns: List of the start and end offset of each chunk within ``content``.
+    """
+    starts = [match.start() for match in RFC_ENTRY_START.finditer(content)]
+    if not starts:
+        return []
+    end = content.rfind(RFC_ENTRY_END) + len(RFC_ENTRY_END)
+    size, rest = divmod(len(starts), number)
+    boundaries = [
+        starts[i * size + min(i, rest)] for i in range(min(number, len(starts)))
+    ]
+    return list(zip(boundaries, boundaries[1:] + [end]))
+
+
+def parse_rfc_index_chunk(chunk, entry_filter=None, fields=None):
+    """Parse and convert a chunk of an rfc-index.
+
+    :param chunk: Raw content of consecutive ``<rfc-entry>`` elements as returned
+                  by :py:func:`rfc_index_chunks`.
+    :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+    :param fields: Optional sequence of the fields to extract, see
+                   :py:func:`rfc_entry_to_bibtex`.
+
+    :returns: List of tuples of key and :py:class:`pybtex.database.Entry`.
+    """
+    root = lxml.etree.fromstring(
+        b'<rfc-index xmlns="https://www.rfc-editor.org/rfc-index">'
+        + chunk
+        + b"</rfc-index>"
+    )
+    return [
+        entry
+        for entry in (
+            rfc_entry_to_bibtex(element, entry_filter, fields)
+            for element in root.iter(f"{RFC_INDEX_NS}rfc-entry")
+        )
+        if entry is not None
+    ]
+
+
+def _stat_validator(stat):
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _map_file(rfc_index):
+    stat = os.fstat(rfc_index.fileno())
+    if not stat.st_size:
+        return stat, b""
+    return stat, mmap.mmap(rfc_index.fileno(), 0, access=mmap.ACCESS_READ)
+
 
 class RFCIndexSource(Source):
-    """rfc-index.xml source."""
+    """rfc-index.xml source.
+
+    A local rfc-index (see :py:attr:`local_path`) is memory-mapped instead of
+    downloaded. Its modification time and size serve as its validator.
 
-    def __init__(self, rfc_index_config: config.RFCIndexSource):
+    If mirrors are configured, the rfc-index is fetched from the fastest one
+    and the others are fallen back to on errors (see
+    :py:class:`ietfbib2bibtex.mirrors.Mirrors`).
+
+    :param rfc_index_config: :py:class:`ietfbib2bibtex.config.RFCIndexSource` object
+                             for configuration.
+    :param cache: Optional shared :py:class:`ietfbib2bibtex.cache.Cache` for the
+                  download and the parsed entries.
+    :param last_mirrors: Optional dictionary to record the last good mirror in,
+                         e.g., the ``mirrors`` section of an
+                         :py:class:`ietfbib2bibtex.state.State`.
+    """
+
+    FIELDS = tuple(field for field in RFC_INDEX_EXTRACTORS if field[0] != "_")
+    DEFAULT_FIELDS = RFC_INDEX_DEFAULT_FIELDS
+    #: Number of chunks per process when parsing with multiple processes.
+    CHUNKS_PER_PROCESS = 4
+    #: Size in bytes of the chunks parsed at once when iterating asynchronously.
+    ASYNC_CHUNK_SIZE = 1 << 20
+
+    def __init__(
+        self, rfc_index_config: config.RFCIndexSource, cache=None, last_mirrors=None
+    ):
         self._config = rfc_index_config
+        self._cache = cache
+        self._mirrors = mirrors.Mirrors(
+            rfc_index_config.remotes,
+            last_good=last_mirrors,
+            timeout=rfc_index_config.timeout,
+            retries=rfc_index_config.retries,
+            backoff=rfc_index_config.backoff,
+        )
+        # mirror currently fetched from
+        self._remote = self._mirrors.last_good or rfc_index_config.remote
+        # content of the last fetch, None if it is only in the cache
+        self._content = None
+        # name of the content of the last fetch in the cache
+        self._content_name = None
 
     @property
     def remote(self):
-        return self._config.remote
+        """The mirror the rfc-index was last fetched from, or will be fetched from
+        first."""
+        return self._remote
 
-    def iterate_entries(self):
-        response = requests.get(self.remote, timeout=5)
-        root = lxml.etree.fromstring(response.content)
+    @property
+    def local_path(self):
+        """Path to the rfc-index if :py:attr:`remote` is a ``file:`` URL or a path,
+        ``None`` otherwise."""
+        return mirrors.local_path(self.remote)
 
-        for element in root.iter("{https://www.rfc-editor.org/rfc-index}rfc-entry"):
-            doc_id = element.find("{https://www.rfc-editor.org/rfc-index}doc-id").text
-            if not re.match(r"RFC\d+", doc_id):
-                # erroneous tagging
-                continue
-            title = element.find("{https://www.rfc-editor.org/rfc-index}title").text
-            yield re.sub(
-                r"(RFC)0*([1-9][0-9]*)", r"\1-\2", doc_id
-            ), pybtex.database.Entry(
-                "techreport",
-                {
-                    "title": f"{{{title}}}",
-                    "institution": "IETF",
-                    "type": "RFC",
-                    "number": re.sub(r"RFC0*([1-9][0-9]*)", r"\1", doc_id),
-                    "month": (
-                        element.find("{https://www.rfc-editor.org/rfc-index}date")
-                        .find("{https://www.rfc-editor.org/rfc-index}month")
-                        .text
-                    ),
-                    "year": (
-                        element.find("{https://www.rfc-editor.org/rfc-index}date")
-                        .find("{https://www.rfc-editor.org/rfc-index}year")
-                        .text
-                    ),
-                    "doi": (
-                        element.find("{https://www.rfc-editor.org/rfc-index}doi").text
-                    ),
-                    # pylint: disable=consider-using-f-string
-                    "url": "https://doi.org/{}".format(
-                        element.find("{https://www.rfc-editor.org/rfc-index}doi").text
-                    ),
-                },
-                persons={
-                    "author": [
-                        pybtex.database.Person(
-                            e.find("{https://www.rfc-editor.org/rfc-index}name").text
-                        )
-                        for e in element.findall(
-                            "{https://www.rfc-editor.org/rfc-index}author"
-                        )
-                    ],
-                },
+    def _iterate_chunked(self, content, entry_filter, fields):
+        processes = self._config.processes
+        chunks = rfc_index_chunks(content, processes * self.CHUNKS_PER_PROCESS)
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            for entries in executor.map(
+                functools.partial(
+                    parse_rfc_index_chunk, entry_filter=entry_filter, fields=fields
+                ),
+                (content[start:end] for start, end in chunks),
+            ):
+                yield from entries
+
+    def _iterate_content(self, content, entry_filter=None, fields=None):
+        if self._config.processes is not None and self._config.processes > 1:
+            yield from self._iterate_chunked(content, entry_filter, fields)
+            return
+        if isinstance(content, mmap.mmap):
+            content.seek(0)
+            stream = content
+        else:
+            stream = io.BytesIO(content)
+        for _, element in lxml.etree.iterparse(
+            stream, events=("end",), tag=f"{RFC_INDEX_NS}rfc-entry"
+        ):
+            entry = rfc_entry_to_bibtex(element, entry_filter, fields)
+            if entry is not None:
+                yield entry
+            # free parsed elements to keep memory flat
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    @staticmethod
+    def _validator(response):
+        return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+    def is_modified(self, validator=None, synced=None):
+        if validator is None:
+            return True
+        if self.local_path is not None:
+            try:
+                return _stat_validator(os.stat(self.local_path)) != validator
+            except OSError:
+                return True
+        try:
+            response = requests.head(self.remote, timeout=self._config.timeout)
+        except requests.RequestException as exc:
+            logging.warning("Could not check %s for changes: %s", self.remote, exc)
+            return True
+        return not response.ok or self._validator(response) != validator
+
+    def _fetch_remote(self, remote):
+        self._remote = remote
+        if self.local_path is not None:
+            with open(self.local_path, "rb") as rfc_index:
+                stat, self._content = _map_file(rfc_index)
+            self.validator = _stat_validator(stat)
+            self._content_name = f"{os.path.abspath(self.local_path)}:{self.validator}"
+        elif self._cache is None:
+            response = requests.get(self.remote, timeout=self._config.timeout)
+            response.raise_for_status()
+            self.validator = self._validator(response)
+            self._content = response.content
+        else:
+            self._content_name, self.validator = self._cache.fetch(
+                self.remote, timeout=self._config.timeout
+            )
+            self._content = None
+
+    def _fetch(self):
+        self._mirrors.fetch(self._fetch_remote)
+
+    def _load(self):
+        if self._content is not None:
+            return self._content
+        return self._cache.get(self._content_name)
+
+    def iterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        if refresh or (self._content is None and self._content_name is None):
+            self._fetch()
+        if self._cache is None:
+            yield from self._iterate_content(self._content, entry_filter, fields)
+            return
+        for key, entry in self._cache.memoize(
+            f"rfc-index:{self._content_name}:{filter_name(entry_filter)}:"
+            f"{projection.projection_name(fields)}",
+            lambda: [
+                (key, _dump_entry(entry))
+                for key, entry in self._iterate_content(
+                    self._load(), entry_filter, fields
+                )
+            ],
+        ):
+            yield key, _load_entry(entry)
+
+    async def _afetch_remote(self, remote):
+        if mirrors.local_path(remote) is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._fetch_remote, remote
             )
+            return
+        self._remote = remote
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self._config.timeout, sock_read=self._config.timeout
+        )
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(self.remote) as response:
+                response.raise_for_status()
+                self.validator = self._validator(response)
+                self._content = await response.read()
+
+    async def _afetch(self):
+        if aiohttp is None:
+            await asyncio.get_running_loop().run_in_executor(None, self._fetch)
+            return
+        await self._mirrors.afetch(
+            self._afetch_remote,
+            errors=(OSError, asyncio.TimeoutError, aiohttp.ClientError),
+        )
+
+    async def aiterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        """Asynchronously iterate over all valid entries of the rfc-index.
+
+        Without a shared cache, a remote rfc-index is downloaded with ``aiohttp``,
+        if installed. The content is parsed in chunks in the default executor of
+        the event loop, or in a process pool if multiple processes are
+        configured. With a shared cache, :py:meth:`Source.aiterate_entries` is
+        used, so waiting for locks of the cache does not block the event loop.
+
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+        :param refresh: Fetch the remote again. Otherwise, the content of the last
+                        iteration is reused if available.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+        """
+        if self._cache is not None:
+            async for entry in super().aiterate_entries(
+                entry_filter, refresh, fields=fields
+            ):
+                yield entry
+            return
+        loop = asyncio.get_running_loop()
+        if refresh or self._content is None:
+            await self._afetch()
+        content = self._content
+        executor = None
+        if self._config.processes is not None and self._config.processes > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(self._config.processes)
+        try:
+            for start, end in rfc_index_chunks(
+                content, max(1, len(content) // self.ASYNC_CHUNK_SIZE)
+            ):
+                for entry in await loop.run_in_executor(
+                    executor,
+                    parse_rfc_index_chunk,
+                    content[start:end],
+                    entry_filter,
+                    fields,
+                ):
+                    yield entry
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _lookup_content(self):
+        if self._content is None and self._content_name is None:
+            if self.local_path is None and self._cache is not None:
+                key = self._cache.downloaded(self.remote)
+                if key is not None:
+                    with open(self._cache.object_path(key), "rb") as rfc_index:
+                        return _map_file(rfc_index)[1]
+            self._fetch()
+        return self._load()
+
+    def lookup(self, key, entry_filter=None, fields=None):
+        """Look up a single RFC by its key, e.g., ``RFC-9325`` or ``rfc9325``.
+
+        The entry is searched for in the local rfc-index, the last download in
+        the cache, or the content of the last iteration. Only if neither is
+        available, the rfc-index is downloaded. Only the ``<rfc-entry>`` of the
+        RFC is parsed.
+
+        :param key: The key of the entry (case-insensitive).
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`
+                             the entry must pass.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+
+        :returns: A tuple of key and :py:class:`pybtex.database.Entry` or ``None``
+                  if there is no such entry.
+        """
+        match = RFC_LOOKUP_KEY.match(key)
+        if match is None:
+            return None
+        content = self._lookup_content()
+        found = re.search(
+            rb"<rfc-entry[^>]*>\s*<doc-id>RFC%04d</doc-id>" % int(match.group(1)),
+            content,
+        )
+        if found is None:
+            return None
+        start = found.start()
+        end = content.find(RFC_ENTRY_END, start) + len(RFC_ENTRY_END)
+        entries = parse_rfc_index_chunk(content[start:end], entry_filter, fields)
+        return entries[0] if entries else None
+
+
+DRAFT_NUMBER = re.compile(r".*-(\d{2})$")
+DRAFT_UNVERSIONED = re.compile(r"(.*)-\d{2}$")
+BIBXML_IDS_PREFIX = "reference.I-D."
+#: Seconds file timestamps may lag behind :py:func:`time.time`, as file systems
+#: take them from a coarser clock.
+TIMESTAMP_SLACK = 1.0
+
+
+def bibxml_doc_id(xml_filename):
+    """Derive the document identifier of a bibxml reference from its filename.
 
+    >>> bibxml_doc_id("ids/reference.I-D.draft-ietf-core-dns-over-coap-07.xml")
+    'draft-ietf-core-dns-over-coap-07'
 
-class BibXMLIDsSource(Source):
-    """rsync://rsync.ietf.org/bibxml-ids/ source."""
+    :param xml_filename: Path of the bibxml reference.
 
-    def __init__(self, bibxml_ids_source_config: config.BibXMLIDsSource):
+    :returns: The document identifier.
+    """
+    doc_id, _ = os.path.splitext(os.path.basename(xml_filename))
+    if doc_id.startswith(BIBXML_IDS_PREFIX):
+        return doc_id.replace(BIBXML_IDS_PREFIX, "", 1)
+    return doc_id
+
+
+def changed_since(path, since):
+    """Check if a file was added or modified since a point in time.
+
+    :param path: Path of the file.
+    :param since: The point in time as POSIX timestamp.
+
+    :returns: ``True`` if the modification time or the status change time of the
+              file is later than ``since``.
+    """
+    stat = os.stat(path)
+    return max(stat.st_mtime, stat.st_ctime) > since
+
+
+def draft_family(doc_id):
+    """Strip the revision from a draft identifier.
+
+    >>> draft_family("draft-ietf-core-dns-over-coap-07")
+    'draft-ietf-core-dns-over-coap'
+
+    :param doc_id: The document identifier or key of a draft.
+
+    :returns: The identifier shared by all revisions of the draft.
+    """
+    return DRAFT_UNVERSIONED.sub(r"\1", doc_id)
+
+
+def partition_index(doc_id, count):
+    """Assign a draft to one of ``count`` partitions by its family.
+
+    All revisions of a draft are assigned to the same partition, independent of
+    the process or host.
+
+    :param doc_id: The document identifier of a draft.
+    :param count: The number of partitions.
+
+    :returns: The index of the partition.
+    """
+    return zlib.crc32(draft_family(doc_id).encode()) % count
+
+
+def _bibxml_type(series_info):
+    name = series_info.get("name")
+    return name + (" -- work in progress" if name == "Internet-Draft" else "")
+
+
+#: Extractors of the fields supported for bibxml references. Fields starting
+#: with ``_`` are only used internally.
+BIBXML_EXTRACTORS = {
+    "_series": projection.Extractor("seriesInfo", lambda e: e.get("value")),
+    "_year": projection.Extractor("date", lambda e: e.get("year")),
+    "title": projection.Extractor("title", _braced_text),
+    "institution": projection.Extractor(None, lambda _: "IETF"),
+    "type": projection.Extractor("seriesInfo", _bibxml_type),
+    "number": projection.Extractor(
+        "seriesInfo", lambda e: DRAFT_NUMBER.sub(r"\1", e.get("value"))
+    ),
+    "month": projection.Extractor("date", lambda e: e.get("month")),
+    "year": projection.Extractor("date", lambda e: e.get("year")),
+    "url": projection.Extractor(None, lambda e: e.get("target")),
+    "author": projection.Extractor("author", lambda e: e.get("fullname"), join=list),
+    "abstract": projection.Extractor("abstract", _collapsed_text),
+    "keywords": projection.Extractor("keyword", _text, join=", ".join),
+}
+
+
+#: Fields extracted from bibxml references by default, in the order they are
+#: written.
+BIBXML_DEFAULT_FIELDS = (
+    "title",
+    "institution",
+    "type",
+    "number",
+    "month",
+    "year",
+    "url",
+    "author",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _bibxml_plan(fields):
+    return projection.Plan(BIBXML_EXTRACTORS, ("_series", "_year") + fields)
+
+
+def bibxml_fields(root, fields=None):
+    """Extract the fields of a bibtex entry from a parsed bibxml reference.
+
+    The children of the reference and of its ``<front>`` are visited once.
+
+    :param root: The root element of the bibxml reference.
+    :param fields: Optional sequence of the fields to extract, one of
+                   :py:data:`BIBXML_EXTRACTORS` each. Defaults to
+                   :py:data:`BIBXML_DEFAULT_FIELDS`.
+
+    :returns: A tuple of the key, the key without version, the fields as expected
+              by :py:func:`projected_entry`, and the year.
+    """
+    front = root.find("front")
+    values = _bibxml_plan(projection.resolve(fields, BIBXML_DEFAULT_FIELDS)).extract(
+        root, itertools.chain(root, () if front is None else front)
+    )
+    key = values.pop("_series")
+    year = values.pop("_year", None)
+    return key, DRAFT_UNVERSIONED.sub(r"\1", key), values, year
+
+
+def bibxml_to_bibtex(xml, entry_filter=None, fields=None):
+    """Convert a bibxml reference to a bibtex entry.
+
+    :param xml: File object or path of the bibxml reference.
+    :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+                         Only :py:meth:`ietfbib2bibtex.filters.EntryFilter.match_fields`
+                         is evaluated.
+    :param fields: Optional sequence of the fields to extract, see
+                   :py:func:`bibxml_fields`.
+
+    :raises lxml.etree.XMLSyntaxError: When the reference is malformed.
+    :raises pybtex.database.InvalidNameString: When an author name of the
+                                               reference is malformed.
+
+    :returns: A tuple of the key, the key without version, and the
+              :py:class:`pybtex.database.Entry` or ``None`` if the reference does
+              not pass ``entry_filter``.
+    """
+    key, unversioned, values, year = bibxml_fields(
+        lxml.etree.parse(xml).getroot(), fields
+    )
+    if entry_filter is not None and not entry_filter.match_fields(year):
+        return None
+    return key, unversioned, projected_entry(values)
+
+
+class FileStats(typing.NamedTuple):
+    """Parsing statistics of a bibxml reference file."""
+
+    path: str
+    #: Size of the file in bytes.
+    size: int
+    #: Time in seconds it took to parse the file.
+    parse_time: float
+
+
+class _PipelineItem:
+    # a bibxml reference file passing through the stages of a pipeline
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, path):
+        self.path = path
+        self.content = None
+        self.extracted = None
+        self.result = None
+        self.error = None
+        self.parse_time = 0.0
+
+
+def _read_stage(item):
+    with open(item.path, "rb") as xml:
+        item.content = xml.read()
+    return item
+
+
+def _convert_stage(item):
+    if item.extracted is None:
+        return item
+    start = time.perf_counter()
+    key, unversioned, values, _ = item.extracted
+    try:
+        item.result = key, unversioned, projected_entry(values)
+    except pybtex.database.InvalidNameString as exc:
+        item.error = f"{exc} in author fullname"
+    item.extracted = None
+    item.parse_time += time.perf_counter() - start
+    return item
+
+
+class BibXMLIDsSource(Source):  # pylint: disable=too-many-instance-attributes
+    """rsync://rsync.ietf.org/bibxml-ids/ source.
+
+    The local mirror is synchronized with :py:class:`ietfbib2bibtex.sync.Rsync`,
+    or with :py:class:`ietfbib2bibtex.sync.HTTPSync` if the remote is an HTTP URL.
+
+    :param bibxml_ids_source_config: :py:class:`ietfbib2bibtex.config.BibXMLIDsSource`
+                                     object for configuration.
+    :param cache: Optional shared :py:class:`ietfbib2bibtex.cache.Cache`. If
+                  provided, the mirror in the cache is used instead of the
+                  configured local directory and parsed entries are cached.
+    :param quarantine: Optional dictionary, e.g., a section of a
+                       :py:class:`ietfbib2bibtex.state.State`, to record malformed
+                       files in. Recorded files are skipped without parsing them
+                       until their content changes.
+    """
+
+    FIELDS = tuple(field for field in BIBXML_EXTRACTORS if field[0] != "_")
+    DEFAULT_FIELDS = BIBXML_DEFAULT_FIELDS
+
+    def __init__(
+        self,
+        bibxml_ids_source_config: config.BibXMLIDsSource,
+        cache=None,
+        quarantine=None,
+    ):
         self._config = bibxml_ids_source_config
+        self._cache = cache
+        self._quarantine = quarantine
+        if sync.is_http_remote(self.remote):
+            self._sync = sync.HTTPSync(
+                self.remote,
+                self.local,
+                connections=self._config.connections,
+                delete=self._config.delete,
+            )
+        else:
+            self._sync = sync.Rsync(
+                self.remote,
+                self.local,
+                checksum=self._config.checksum,
+                args=self._config.rsync_args,
+                shards=self._config.shards,
+            )
+        #: :py:class:`ietfbib2bibtex.sync.Changes` of the last synchronization.
+        self.changes = None
+        #: If set to a list, :py:class:`FileStats` of each parsed file are appended
+        #: to it.
+        self.file_stats = None
+        self.pipeline_depth = self._config.pipeline_depth
 
     @property
     def remote(self):
@@ -117,61 +949,405 @@ class BibXMLIDsSource(Source):
     @property
     def local(self):
         """The directory for the bibliography source."""
+        if self._cache is not None:
+            return self._cache.mirror_path(self.remote)
         return self._config.local
 
-    def iterate_entries(self):
-        subprocess.check_call(["rsync", "-avcizxL", self.remote, self.local])
-        last_unversioned = None
-        last_entry = None
-        for xml_filename in sorted(glob.iglob(os.path.join(self.local, "*[0-9].xml"))):
+    def sync(self):
+        """Synchronize :py:attr:`local` with :py:attr:`remote`.
+
+        :returns: The :py:class:`ietfbib2bibtex.sync.Changes` to :py:attr:`local`,
+                  also available as :py:attr:`changes` afterwards.
+        """
+        if self._cache is None:
+            self.changes = self._sync.sync()
+        else:
+            self.changes = self._cache.sync_mirror(
+                self.remote, self._sync.sync
+            ) or sync.Changes([], [])
+        self.synced = time.time()
+        self._log_changes()
+        return self.changes
+
+    async def async_sync(self):
+        """Asynchronously synchronize :py:attr:`local` with :py:attr:`remote`.
+
+        Without a shared cache, rsync is run as an asynchronous subprocess, or an
+        HTTP remote is synchronized in the default executor of the event loop.
+        Otherwise, :py:meth:`sync` is run in the default executor of the event
+        loop, so waiting for locks of the cache does not block the event loop.
+
+        :returns: The :py:class:`ietfbib2bibtex.sync.Changes` to :py:attr:`local`,
+                  also available as :py:attr:`changes` afterwards.
+        """
+        if self._cache is not None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.sync)
+        self.changes = await self._sync.async_sync()
+        self.synced = time.time()
+        self._log_changes()
+        return self.changes
+
+    def _log_changes(self):
+        logging.info(
+            "%d files updated, %d files deleted in %s",
+            len(self.changes.updated),
+            len(self.changes.deleted),
+            self.local,
+        )
+
+    def is_modified(self, validator=None, synced=None):
+        # pylint: disable=unused-argument
+        # the local copy may have been synchronized since the last iteration, e.g.
+        # for the recent drafts or by another process sharing the cache
+        if synced is not None and self._changed_locally(synced):
+            return True
+        changes = self._sync.sync(dry_run=True)
+        return bool(changes.updated or changes.deleted)
+
+    def _changed_locally(self, since):
+        try:
+            # files added to or deleted from the directory change its timestamps
+            return changed_since(self.local, since) or any(
+                changed_since(xml_filename, since)
+                for xml_filename in glob.iglob(os.path.join(self.local, "*[0-9].xml"))
+            )
+        except OSError:
+            return True
+
+    def _parse_cached(self, content, entry_filter, fields):
+        fields = projection.resolve(fields, BIBXML_DEFAULT_FIELDS)
+        # cache unfiltered and with the year, so entries are shared between filters
+        cached_fields = fields if "year" in fields else fields + ("year",)
+
+        def parse():
+            key, unversioned, entry = bibxml_to_bibtex(
+                io.BytesIO(content), fields=cached_fields
+            )
+            return key, unversioned, _dump_entry(entry)
+
+        key, unversioned, entry = self._cache.memoize(
+            f"bibxml:{digest(content)}:{projection.projection_name(cached_fields)}",
+            parse,
+        )
+        entry = _load_entry(entry)
+        if entry_filter is not None and not entry_filter.match_fields(
+            entry.fields.get("year")
+        ):
+            return None
+        if cached_fields is not fields:
+            entry.fields.pop("year", None)
+        return key, unversioned, entry
+
+    def _parse(self, xml_filename, entry_filter=None, fields=None):
+        if self._cache is None:
             with open(
                 xml_filename, encoding="utf-8", errors="xmlcharrefreplace"
             ) as xml:
-                try:
-                    tree = lxml.etree.parse(xml)
-                except lxml.etree.XMLSyntaxError as exc:
-                    logging.error("%s, ignoring %s", exc, xml_filename)
-                    continue
-                root = tree.getroot()
-                front = root.find("front")
-                series_info = root.find("seriesInfo")
-                number = re.sub(r".*-(\d{2})$", r"\1", series_info.get("value"))
-                unversioned = re.sub(r"(.*)-\d{2}$", r"\1", series_info.get("value"))
-                try:
-                    data = {
-                        "title": f"{{{front.find('title').text}}}",
-                        "institution": "IETF",
-                        "type": series_info.get("name")
-                        + (
-                            " -- work in progress"
-                            if series_info.get("name") == "Internet-Draft"
-                            else ""
-                        ),
-                        "number": number,
-                        "month": front.find("date").get("month"),
-                        "year": front.find("date").get("year"),
-                    }
-                    if root.get("target"):
-                        data["url"] = root.get("target")
-                    entry = pybtex.database.Entry(
-                        "techreport",
-                        data,
-                        persons={
-                            "author": [
-                                pybtex.database.Person(e.get("fullname"))
-                                for e in front.findall("author")
-                            ],
-                        },
-                    )
-                except pybtex.database.InvalidNameString as exc:
-                    logging.error(
-                        "%s in author fullname, ignoring %s", exc, xml_filename
+                return bibxml_to_bibtex(xml, entry_filter, fields)
+        with open(xml_filename, "rb") as xml:
+            return self._parse_cached(xml.read(), entry_filter, fields)
+
+    def _is_quarantined(self, xml_filename):
+        if self._quarantine is None:
+            return False
+        path = os.path.abspath(xml_filename)
+        record = self._quarantine.get(path)
+        if record is None:
+            return False
+        stat = os.stat(path)
+        if record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        with open(path, "rb") as xml:
+            if digest(xml.read()) == record["digest"]:
+                record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                return True
+        del self._quarantine[path]
+        return False
+
+    def _quarantine_file(self, xml_filename, error):
+        if self._quarantine is None:
+            return
+        path = os.path.abspath(xml_filename)
+        stat = os.stat(path)
+        with open(path, "rb") as xml:
+            self._quarantine[path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "digest": digest(xml.read()),
+                "error": error,
+            }
+
+    def _prune_quarantine(self):
+        if self._quarantine is None:
+            return
+        local = os.path.join(os.path.abspath(self.local), "")
+        for path in list(self._quarantine):
+            if path.startswith(local) and not os.path.exists(path):
+                del self._quarantine[path]
+
+    def _parse_file(self, xml_filename, entry_filter, fields, errors):
+        start = time.perf_counter()
+        try:
+            return self._parse(xml_filename, entry_filter, fields)
+        except lxml.etree.XMLSyntaxError as exc:
+            errors.append((xml_filename, str(exc)))
+        except pybtex.database.InvalidNameString as exc:
+            errors.append((xml_filename, f"{exc} in author fullname"))
+        finally:
+            if self.file_stats is not None:
+                self.file_stats.append(
+                    FileStats(
+                        xml_filename,
+                        os.path.getsize(xml_filename),
+                        time.perf_counter() - start,
                     )
-                    continue
-                if last_unversioned != unversioned and last_entry is not None:
-                    yield last_unversioned, last_entry
-                yield series_info.get("value"), entry
-                last_unversioned = unversioned
-                last_entry = entry
+                )
+        self._quarantine_file(*errors[-1])
+        return None
+
+    def _report_errors(self, errors, skipped):
+        if not errors and not skipped:
+            return
+        logging.error(
+            "Ignoring %d malformed files in %s (%d known from previous runs)%s",
+            len(errors) + skipped,
+            self.local,
+            skipped,
+            "".join(f"\n  {path}: {error}" for path, error in errors),
+        )
+
+    def _candidates(self, entry_filter, partition, skipped, since=None):
+        for xml_filename in sorted(glob.iglob(os.path.join(self.local, "*[0-9].xml"))):
+            doc_id = bibxml_doc_id(xml_filename)
+            if since is not None and not changed_since(xml_filename, since):
+                continue
+            if partition is not None and (
+                partition_index(doc_id, partition[1]) != partition[0]
+            ):
+                continue
+            if entry_filter is not None and not entry_filter.match_name(doc_id):
+                continue
+            if self._is_quarantined(xml_filename):
+                logging.debug("Skipping quarantined %s", xml_filename)
+                skipped.append(xml_filename)
+                continue
+            yield xml_filename
+
+    def _parse_stage(self, item, entry_filter, fields):
+        start = time.perf_counter()
+        try:
+            if self._cache is None:
+                item.extracted = bibxml_fields(
+                    lxml.etree.parse(
+                        io.BytesIO(item.content), base_url=item.path
+                    ).getroot(),
+                    fields,
+                )
+                if entry_filter is not None and not entry_filter.match_fields(
+                    item.extracted[3]
+                ):
+                    item.extracted = None
+            else:
+                item.result = self._parse_cached(item.content, entry_filter, fields)
+        except lxml.etree.XMLSyntaxError as exc:
+            item.error = str(exc)
+        except pybtex.database.InvalidNameString as exc:
+            item.error = f"{exc} in author fullname"
+        item.parse_time += time.perf_counter() - start
+        return item
+
+    def _pipeline_results(self, xml_filenames, entry_filter, fields, errors):
+        the_pipeline = pipeline.Pipeline(
+            [
+                ("read", _read_stage),
+                (
+                    "parse",
+                    functools.partial(
+                        self._parse_stage, entry_filter=entry_filter, fields=fields
+                    ),
+                ),
+                ("convert", _convert_stage),
+            ],
+            self.pipeline_depth,
+        )
+        for item in the_pipeline.run(_PipelineItem(path) for path in xml_filenames):
+            if self.file_stats is not None:
+                self.file_stats.append(
+                    FileStats(item.path, len(item.content), item.parse_time)
+                )
+            if item.error is not None:
+                errors.append((item.path, item.error))
+                self._quarantine_file(item.path, item.error)
+            elif item.result is not None:
+                yield item.result
+        the_pipeline.log(self.local)
+
+    def _results(self, xml_filenames, entry_filter, fields, errors):
+        if self.pipeline_depth is not None:
+            yield from self._pipeline_results(
+                xml_filenames, entry_filter, fields, errors
+            )
+            return
+        for xml_filename in xml_filenames:
+            result = self._parse_file(xml_filename, entry_filter, fields, errors)
+            if result is not None:
+                yield result
+
+    def _iterate_files(self, entry_filter=None, partition=None, fields=None):
+        last_unversioned = None
+        last_entry = None
+        errors = []
+        skipped = []
+        for key, unversioned, entry in self._results(
+            self._candidates(entry_filter, partition, skipped),
+            entry_filter,
+            fields,
+            errors,
+        ):
+            if last_unversioned != unversioned and last_entry is not None:
+                yield last_unversioned, last_entry
+            yield key, entry
+            last_unversioned = unversioned
+            last_entry = entry
         if last_unversioned is not None and last_entry is not None:
             yield last_unversioned, last_entry
+        self._prune_quarantine()
+        self._report_errors(errors, len(skipped))
+
+    def _latest_revisions(self):
+        latest = {}
+        for xml_filename in glob.iglob(os.path.join(self.local, "*[0-9].xml")):
+            doc_id = bibxml_doc_id(xml_filename)
+            family = draft_family(doc_id)
+            latest[family] = max(latest.get(family, doc_id), doc_id)
+        return latest
+
+    def _iterate_recent_files(self, since, entry_filter=None, fields=None):
+        latest = self._latest_revisions()
+        errors = []
+        skipped = []
+        for key, unversioned, entry in self._results(
+            self._candidates(entry_filter, None, skipped, since - TIMESTAMP_SLACK),
+            entry_filter,
+            fields,
+            errors,
+        ):
+            yield key, entry
+            # an older revision must not shadow the latest one in the base file
+            if latest.get(unversioned) == key:
+                yield unversioned, entry
+        self._report_errors(errors, len(skipped))
+
+    def _lookup_path(self, key):
+        if DRAFT_NUMBER.match(key):
+            path = os.path.join(self.local, f"{BIBXML_IDS_PREFIX}{key}.xml")
+            if os.path.exists(path):
+                return path, False
+        revisions = sorted(
+            glob.glob(
+                os.path.join(
+                    glob.escape(self.local),
+                    f"{BIBXML_IDS_PREFIX}{glob.escape(key)}-[0-9][0-9].xml",
+                )
+            )
+        )
+        return (revisions[-1], True) if revisions else (None, False)
+
+    def lookup(self, key, entry_filter=None, fields=None):
+        """Look up a single draft in :py:attr:`local` by its key.
+
+        The key is mapped directly to a filename, without synchronizing
+        :py:attr:`local`. A key without revision, e.g., ``draft-foo-bar``,
+        resolves to the latest revision.
+
+        :param key: The key of the entry, e.g., ``draft-foo-bar-07`` or
+                    ``draft-foo-bar``.
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`
+                             the entry must pass.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+
+        :returns: A tuple of key and :py:class:`pybtex.database.Entry` or ``None``
+                  if there is no such entry.
+        """
+        path, latest = self._lookup_path(key)
+        if path is None:
+            return None
+        if entry_filter is not None and not entry_filter.match_name(
+            bibxml_doc_id(path)
+        ):
+            return None
+        try:
+            result = self._parse(path, entry_filter, fields)
+        except (lxml.etree.XMLSyntaxError, pybtex.database.InvalidNameString) as exc:
+            logging.error("%s, ignoring %s", exc, path)
+            return None
+        if result is None:
+            return None
+        versioned, unversioned, entry = result
+        return (unversioned if latest else versioned), entry
+
+    def iterate_local(self, entry_filter=None, partition=None, fields=None):
+        """Iterate over the entries in :py:attr:`local` without synchronizing it.
+
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+        :param partition: Optional tuple of the index and the number of partitions.
+                          If provided, only the drafts in that partition (see
+                          :py:func:`partition_index`) are iterated.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+
+        :returns: A generator of tuples of key and :py:class:`pybtex.database.Entry`.
+        """
+        if self._cache is None:
+            yield from self._iterate_files(entry_filter, partition, fields)
+            return
+        with self._cache.read_mirror(self.remote):
+            yield from self._iterate_files(entry_filter, partition, fields)
+
+    def iterate_recent(self, since, entry_filter=None, fields=None):
+        """Iterate over the entries of the files in :py:attr:`local` that were added
+        or modified since a point in time, without synchronizing it.
+
+        A file counts as modified when either its modification time or its status
+        change time is later, as synchronization preserves the modification times
+        of the remote. To not miss files due to coarse file timestamps, files
+        changed up to :py:data:`TIMESTAMP_SLACK` before ``since`` are included.
+        The entry of the latest revision of a draft is also yielded under the key
+        without revision.
+
+        :param since: The point in time as POSIX timestamp, e.g.,
+                      :py:attr:`synced` of the last full iteration.
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+
+        :returns: A generator of tuples of key and :py:class:`pybtex.database.Entry`.
+        """
+        if self._cache is None:
+            yield from self._iterate_recent_files(since, entry_filter, fields)
+            return
+        with self._cache.read_mirror(self.remote):
+            yield from self._iterate_recent_files(since, entry_filter, fields)
+
+    def iterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        if refresh or self.changes is None:
+            self.sync()
+        yield from self.iterate_local(entry_filter, fields=fields)
+
+    async def aiterate_entries(self, entry_filter=None, refresh=True, fields=None):
+        """Asynchronously iterate over all valid entries of the bibliography source.
+
+        :py:attr:`local` is synchronized with :py:meth:`async_sync` and its files
+        are parsed in batches in the default executor of the event loop.
+
+        :param entry_filter: Optional :py:class:`ietfbib2bibtex.filters.EntryFilter`.
+        :param refresh: Synchronize :py:attr:`local` again. Otherwise, it is only
+                        synchronized if it was not before.
+        :param fields: Optional sequence of the fields to extract, see
+                       :py:attr:`FIELDS`. Defaults to :py:attr:`DEFAULT_FIELDS`.
+        """
+        if refresh or self.changes is None:
+            await self.async_sync()
+        async for entry in abatched(self.iterate_local(entry_filter, fields=fields)):
+            yield entry
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Persisted state between runs"""
+
+import copy
+import json
+import logging
+import os
+
+from . import atomic
+from .cache import flock
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def _read(path: str, default=None) -> dict:
+    try:
+        with open(path, encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as exc:
+        logging.warning("Unable to read state file %s: %s", path, exc)
+    return {} if default is None else copy.deepcopy(default)
+
+
+class State:
+    """State persisted between runs in a JSON file.
+
+    The state is organized in sections, each of which is a dictionary.
+    Concurrent runs may share a state file, see :py:meth:`save`.
+
+    :param path: Path to the state file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = _read(path)
+        self._saved = copy.deepcopy(self._data)
+
+    def __getitem__(self, section: str) -> dict:
+        return self._data.setdefault(section, {})
+
+    def _merged(self):
+        data = _read(self.path, self._saved)
+        merged = copy.deepcopy(data)
+        for section, entries in self._data.items():
+            saved = self._saved.get(section, {})
+            merged_entries = merged.setdefault(section, {})
+            for key in saved.keys() - entries.keys():
+                merged_entries.pop(key, None)
+            merged_entries.update(
+                (key, value)
+                for key, value in entries.items()
+                if key not in saved or saved[key] != value
+            )
+        return data, merged
+
+    def _update(self, saved, merged):
+        for section, entries in merged.items():
+            self[section].clear()
+            self[section].update(entries)
+        self._saved = saved
+
+    def reload(self):
+        """Update the state with the entries other processes saved to
+        :py:attr:`path` since it was loaded or last saved.
+
+        The entries added, changed, or removed by this state in the meantime are
+        kept. As in :py:meth:`save`, the sections are updated in place.
+        """
+        self._update(*self._merged())
+
+    def save(self):
+        """Store the state to :py:attr:`path` atomically.
+
+        Saving is locked against other processes. Under the lock, the state file
+        is read again and only the entries added, changed, or removed since the
+        state was loaded or last saved are applied to it, so the entries saved
+        by other processes in the meantime are kept. If the state file can not be
+        read, they are applied to the state as loaded or last saved instead. The
+        sections are updated with the merged state.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with flock(f"{self.path}.lock"):
+                _, merged = self._merged()
+                with atomic.AtomicFile(self.path, "w", encoding="utf-8") as state_file:
+                    json.dump(merged, state_file, indent=2)
+        except OSError as exc:
+            logging.warning("Unable to write state file %s: %s", self.path, exc)
+            return
+        self._update(copy.deepcopy(merged), merged)
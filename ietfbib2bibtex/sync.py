@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Synchronization of local bibliography mirrors"""
+
+import asyncio
+import calendar
+import concurrent.futures
+import email.utils
+import html
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+import typing
+import urllib.parse
+
+import requests
+import requests.adapters
+
+from . import atomic
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+ITEMIZED_CHANGE = re.compile(
+    r"^(?:(?P<deleting>\*deleting)|(?P<update>[<>ch.])(?P<type>[fdLDS])\S+) +"
+    r"(?P<name>.+)$"
+)
+LISTING_LINK = re.compile(
+    r'<a\s+href="(?P<href>[^"]+)"[^>]*>.*?</a>(?P<rest>.*)$', re.IGNORECASE
+)
+LISTING_TAG = re.compile(r"<[^>]*>")
+LISTING_DATE = re.compile(
+    r"(?P<nginx>\d{2}-[A-Z][a-z]{2}-\d{4} \d{2}:\d{2})"
+    r"|(?P<apache>\d{4}-\d{2}-\d{2} \d{2}:\d{2})"
+)
+
+
+class Changes(typing.NamedTuple):
+    """Changes to a local mirror reported by a synchronization."""
+
+    #: Paths of local files that were created or whose content was updated.
+    updated: typing.List[str]
+    #: Paths of local files that were deleted.
+    deleted: typing.List[str]
+
+
+def parse_itemized_changes(output: str, local: str) -> Changes:
+    """Parse the output of ``rsync --itemize-changes``.
+
+    >>> parse_itemized_changes(
+    ...     "receiving incremental file list\\n"
+    ...     ">f+++++++++ reference.I-D.draft-foo-00.xml\\n"
+    ...     ".f...p..... reference.I-D.draft-foo-01.xml\\n"
+    ...     "*deleting   reference.I-D.draft-bar-00.xml\\n"
+    ...     "sent 42 bytes  received 1337 bytes  2758.00 bytes/sec\\n",
+    ...     "ids",
+    ... )  # doctest: +NORMALIZE_WHITESPACE
+    Changes(updated=['ids/reference.I-D.draft-foo-00.xml'],
+            deleted=['ids/reference.I-D.draft-bar-00.xml'])
+
+    :param output: The output of rsync.
+    :param local: The local directory rsync synchronized to.
+
+    :returns: The :py:class:`Changes` reported in ``output``.
+    """
+    changes = Changes([], [])
+    for line in output.splitlines():
+        match = ITEMIZED_CHANGE.match(line)
+        if match is None:
+            continue
+        path = os.path.join(local, match["name"])
+        if match["deleting"]:
+            changes.deleted.append(path)
+        elif match["type"] == "f" and match["update"] != ".":
+            changes.updated.append(path)
+    return changes
+
+
+class RemoteFile(typing.NamedTuple):
+    """A file in the directory listing of an HTTP remote."""
+
+    #: Name of the file.
+    name: str
+    #: Size of the file in bytes, if listed.
+    size: typing.Optional[int] = None
+    #: Modification time of the file as POSIX timestamp, if listed.
+    mtime: typing.Optional[int] = None
+
+
+def _listing_time(text: str, time_format: str) -> int:
+    return calendar.timegm(time.strptime(text, time_format))
+
+
+def _is_file_name(name: str) -> bool:
+    # only names of files directly in the mirror, so a listing can not make us
+    # write outside of it
+    return (
+        bool(name)
+        and os.path.basename(name) == name
+        and not name.startswith(".")
+        and "\\" not in name
+        and "\0" not in name
+    )
+
+
+def _parse_html_listing(content: str) -> typing.List[RemoteFile]:
+    files = []
+    for line in content.splitlines():
+        match = LISTING_LINK.search(line)
+        if match is None:
+            continue
+        href = html.unescape(match["href"])
+        if any(char in href for char in "?#:"):
+            continue
+        name = urllib.parse.unquote(href)
+        if not _is_file_name(name):
+            continue
+        rest = LISTING_TAG.sub(" ", match["rest"])
+        date = LISTING_DATE.search(rest)
+        mtime = None
+        if date is not None:
+            if date["nginx"]:
+                mtime = _listing_time(date["nginx"], "%d-%b-%Y %H:%M")
+            else:
+                mtime = _listing_time(date["apache"], "%Y-%m-%d %H:%M")
+            rest = rest.partition(date.group())[2]
+        size = rest.split()[-1] if rest.split() else ""
+        files.append(
+            RemoteFile(
+                name,
+                int(size) if size.isdigit() else None,
+                mtime,
+            )
+        )
+    return files
+
+
+def _parse_json_listing(content: str) -> typing.List[RemoteFile]:
+    return [
+        RemoteFile(
+            item["name"],
+            item.get("size"),
+            (
+                int(email.utils.parsedate_to_datetime(item["mtime"]).timestamp())
+                if item.get("mtime")
+                else None
+            ),
+        )
+        for item in json.loads(content)
+        if item.get("type", "file") == "file" and _is_file_name(item.get("name", ""))
+    ]
+
+
+def parse_listing(content: str) -> typing.List[RemoteFile]:
+    """Parse the directory listing of an HTTP remote.
+
+    Both the HTML and the JSON format of the nginx autoindex module and the HTML
+    format of Apache's mod_autoindex are supported. Sizes and modification times
+    are taken from the listing if available.
+
+    >>> parse_listing(
+    ...     '<a href="../">../</a>\\n'
+    ...     '<a href="reference.I-D.draft-foo-00.xml">reference.I-D.draft-foo-00.xml'
+    ...     '</a>   24-Oct-2022 10:00   1337\\n'
+    ... )  # doctest: +NORMALIZE_WHITESPACE
+    [RemoteFile(name='reference.I-D.draft-foo-00.xml', size=1337,
+                mtime=1666605600)]
+    >>> parse_listing(
+    ...     '[{"name": "reference.I-D.draft-foo-00.xml", "type": "file", '
+    ...     '"mtime": "Mon, 24 Oct 2022 10:00:00 GMT", "size": 1337}]'
+    ... )  # doctest: +NORMALIZE_WHITESPACE
+    [RemoteFile(name='reference.I-D.draft-foo-00.xml', size=1337,
+                mtime=1666605600)]
+
+    :param content: The listing.
+
+    :returns: List of the :py:class:`RemoteFile` in the listing. Links to
+              subdirectories, parent directories, or other sites are skipped.
+    """
+    if content.lstrip().startswith("["):
+        return _parse_json_listing(content)
+    return _parse_html_listing(content)
+
+
+class Rsync:
+    """rsync-based synchronization of a local mirror.
+
+    :param remote: The rsync remote to synchronize from.
+    :param local: The local directory to synchronize to.
+    :param checksum: Compare files by checksum instead of size and modification
+                     time.
+    :param args: Additional arguments to rsync.
+    :param shards: Number of rsync processes run in parallel, each synchronizing
+                   the files of a range of filename prefixes.
+    """
+
+    #: Common prefix of the filenames that are distributed over the shards.
+    SHARD_PREFIX = "reference.I-D.draft-"
+    #: First characters after :py:attr:`SHARD_PREFIX` that are distributed over the
+    #: shards. Files not starting with any of them are synchronized by the first
+    #: shard.
+    SHARD_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+    def __init__(
+        self,
+        remote: str,
+        local: str,
+        *,
+        checksum: bool = False,
+        args: typing.Sequence[str] = (),
+        shards: int = 1,
+    ):
+        # pylint: disable=too-many-arguments
+        self.remote = remote
+        self.local = local
+        self.checksum = checksum
+        self.args = list(args)
+        self.shards = min(shards, len(self.SHARD_CHARS))
+
+    def _shard_pattern(self, shard: int) -> str:
+        size, rest = divmod(len(self.SHARD_CHARS), self.shards)
+        start = shard * size + min(shard, rest)
+        end = start + size + (1 if shard < rest else 0)
+        return f"{self.SHARD_PREFIX}[{self.SHARD_CHARS[start:end]}]*"
+
+    def filters(self, shard: int = 0) -> typing.List[str]:
+        """Filter arguments for rsync selecting the files of a shard.
+
+        >>> Rsync("foobar::test", "test", shards=3).filters(2)
+        ['--include=reference.I-D.draft-[opqrstuvwxyz]*', '--exclude=*']
+
+        :param shard: Number of the shard.
+
+        :returns: List of filter arguments.
+        """
+        if self.shards == 1:
+            return []
+        if shard == 0:
+            return [
+                f"--exclude={self._shard_pattern(other)}"
+                for other in range(1, self.shards)
+            ]
+        return [f"--include={self._shard_pattern(shard)}", "--exclude=*"]
+
+    def command(self, shard: int = 0, dry_run: bool = False) -> typing.List[str]:
+        """The rsync command for a shard.
+
+        :param shard: Number of the shard.
+        :param dry_run: Only report changes, but do not transfer anything.
+
+        :returns: The command as a list of arguments.
+        """
+        return (
+            ["rsync", "-avcizxL" if self.checksum else "-avizxL"]
+            + (["--dry-run"] if dry_run else [])
+            + self.filters(shard)
+            + self.args
+            + [self.remote, self.local]
+        )
+
+    def _run(self, command: typing.List[str]) -> str:
+        output = subprocess.check_output(command, text=True)
+        logging.debug("%s:\n%s", " ".join(command), output)
+        return output
+
+    def _changes(self, outputs: typing.Iterable[str]) -> Changes:
+        changes = Changes([], [])
+        for output in outputs:
+            shard_changes = parse_itemized_changes(output, self.local)
+            changes.updated.extend(shard_changes.updated)
+            changes.deleted.extend(shard_changes.deleted)
+        return changes
+
+    def sync(self, dry_run: bool = False) -> Changes:
+        """Synchronize the local mirror with the remote.
+
+        :param dry_run: Only report changes, but do not transfer anything.
+
+        :returns: The :py:class:`Changes` to the local mirror.
+        """
+        commands = [self.command(shard, dry_run) for shard in range(self.shards)]
+        if len(commands) == 1:
+            return self._changes([self._run(commands[0])])
+        with concurrent.futures.ThreadPoolExecutor(len(commands)) as executor:
+            return self._changes(executor.map(self._run, commands))
+
+    async def _async_run(self, command: typing.List[str]) -> str:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout)
+        output = stdout.decode()
+        logging.debug("%s:\n%s", " ".join(command), output)
+        return output
+
+    async def async_sync(self, dry_run: bool = False) -> Changes:
+        """Synchronize the local mirror with the remote with asynchronous
+        subprocesses, one per shard.
+
+        :param dry_run: Only report changes, but do not transfer anything.
+
+        :returns: The :py:class:`Changes` to the local mirror.
+        """
+        return self._changes(
+            await asyncio.gather(
+                *(
+                    self._async_run(self.command(shard, dry_run))
+                    for shard in range(self.shards)
+                )
+            )
+        )
+
+
+class HTTPSync:
+    """Synchronization of a local mirror from the directory listing of an HTTP
+    remote, for where rsync is not available.
+
+    Files that are missing locally or whose size or modification time differ
+    from the listing are downloaded concurrently over a pool of connections and
+    replaced atomically. Their local modification time is set to the one in the
+    listing. If the listing provides neither, only missing files are downloaded.
+
+    :param remote: URL of the directory listing to synchronize from.
+    :param local: The local directory to synchronize to.
+    :param connections: Number of concurrent downloads.
+    :param delete: Delete local files that are not in the listing.
+    :param timeout: Timeout for each request in seconds.
+    """
+
+    def __init__(
+        self,
+        remote: str,
+        local: str,
+        *,
+        connections: int = 8,
+        delete: bool = False,
+        timeout: float = 30,
+    ):
+        # pylint: disable=too-many-arguments
+        self.remote = remote if remote.endswith("/") else f"{remote}/"
+        self.local = local
+        self.connections = connections
+        self.delete = delete
+        self.timeout = timeout
+
+    def _session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.connections
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _is_current(self, remote_file: RemoteFile) -> bool:
+        try:
+            stat = os.stat(os.path.join(self.local, remote_file.name))
+        except FileNotFoundError:
+            return False
+        if remote_file.size is not None and remote_file.size != stat.st_size:
+            return False
+        return remote_file.mtime is None or remote_file.mtime == int(stat.st_mtime)
+
+    def _stale(self, remote_files) -> typing.List[str]:
+        listed = {remote_file.name for remote_file in remote_files}
+        try:
+            local_files = os.listdir(self.local)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(self.local, name)
+            for name in local_files
+            if name not in listed
+            and not name.startswith(".")
+            and os.path.isfile(os.path.join(self.local, name))
+        )
+
+    def _download(self, session: requests.Session, remote_file: RemoteFile) -> str:
+        response = session.get(
+            urllib.parse.urljoin(self.remote, urllib.parse.quote(remote_file.name)),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        path = os.path.join(self.local, remote_file.name)
+        part = atomic.AtomicFile(path, prefix=".", suffix=".part")
+        try:
+            part.file.write(response.content)
+            part.file.close()
+            if remote_file.mtime is not None:
+                os.utime(part.name, (remote_file.mtime, remote_file.mtime))
+        except OSError:
+            part.discard()
+            raise
+        part.commit()
+        return path
+
+    def sync(self, dry_run: bool = False) -> Changes:
+        """Synchronize the local mirror with the remote.
+
+        :param dry_run: Only report changes, but do not transfer anything.
+
+        :returns: The :py:class:`Changes` to the local mirror.
+        """
+        with self._session() as session:
+            response = session.get(self.remote, timeout=self.timeout)
+            response.raise_for_status()
+            remote_files = parse_listing(response.text)
+            outdated = [
+                remote_file
+                for remote_file in remote_files
+                if not self._is_current(remote_file)
+            ]
+            changes = Changes(
+                [
+                    os.path.join(self.local, remote_file.name)
+                    for remote_file in outdated
+                ],
+                self._stale(remote_files) if self.delete else [],
+            )
+            if dry_run:
+                return changes
+            os.makedirs(self.local, exist_ok=True)
+            with concurrent.futures.ThreadPoolExecutor(self.connections) as executor:
+                for path in executor.map(
+                    lambda remote_file: self._download(session, remote_file), outdated
+                ):
+                    logging.debug("Downloaded %s", path)
+        for path in changes.deleted:
+            os.unlink(path)
+        return changes
+
+    async def async_sync(self, dry_run: bool = False) -> Changes:
+        """Synchronize the local mirror with the remote in the default executor of
+        the event loop.
+
+        :param dry_run: Only report changes, but do not transfer anything.
+
+        :returns: The :py:class:`Changes` to the local mirror.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.sync, dry_run
+        )
+
+
+def is_http_remote(remote: str) -> bool:
+    """Check if a remote is synchronized with :py:class:`HTTPSync` rather than
+    :py:class:`Rsync`.
+
+    >>> is_http_remote("https://bib.ietf.org/public/rfc/bibxml-ids/")
+    True
+    >>> is_http_remote("rsync.ietf.org::bibxml-ids")
+    False
+
+    :param remote: The remote.
+
+    :returns: ``True`` if ``remote`` is an HTTP URL.
+    """
+    return urllib.parse.urlparse(remote).scheme in ("http", "https")
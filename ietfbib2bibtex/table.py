@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+"""Columnar, array-backed tables of entries for bulk analytics"""
+
+import array
+import json
+import mmap
+import struct
+import sys
+
+from . import atomic
+from . import sources
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+#: Fields extracted from the source when building a table.
+FIELDS = ("title", "month", "year", "author")
+#: Number of entries added to a table at once by default.
+BATCH_SIZE = 4096
+#: Month names mapped to the values of the ``month`` column.
+MONTHS = {
+    name: number
+    for number, name in enumerate(
+        "January February March April May June July August September October "
+        "November December".split(),
+        start=1,
+    )
+}
+_MAGIC = b"IB2BTAB1"
+_HEADER_SIZE = struct.Struct("<Q")
+_ALIGNMENT = 8
+# typecodes of the arrays of each column, in the order they are stored
+_ARRAYS = (
+    ("key_offsets", "q"),
+    ("key_data", "B"),
+    ("family_codes", "i"),
+    ("family_offsets", "q"),
+    ("family_data", "B"),
+    ("revision", "h"),
+    ("year", "H"),
+    ("month", "B"),
+    ("title_codes", "i"),
+    ("title_offsets", "q"),
+    ("title_data", "B"),
+    ("author_offsets", "q"),
+    ("author_codes", "i"),
+    ("author_name_offsets", "q"),
+    ("author_name_data", "B"),
+)
+
+
+def _bounds(offsets, index):
+    # start and end offset of a row, negative indices count from the end
+    rows = len(offsets) - 1
+    if index < 0:
+        index += rows
+    if not 0 <= index < rows:
+        raise IndexError(index)
+    return offsets[index], offsets[index + 1]
+
+
+class Strings:
+    """Column of strings stored as UTF-8 in one buffer.
+
+    :param offsets: Sequence of ``len(self) + 1`` offsets into ``data``.
+    :param data: Buffer of the concatenated UTF-8 encoded strings.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = _bounds(self.offsets, index)
+        return bytes(self.data[start:end]).decode()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Dictionary:
+    """Dictionary-encoded column of strings.
+
+    :param codes: Sequence of the index of the value of each row in ``values``,
+                  ``-1`` if the row has no value.
+    :param values: :py:class:`Strings` of the distinct values.
+    """
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code < 0 else self.values[code]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Lists:
+    """Column of lists of dictionary-encoded strings.
+
+    :param offsets: Sequence of ``len(self) + 1`` offsets into ``codes``.
+    :param codes: Sequence of the index of each list item in ``values``.
+    :param values: :py:class:`Strings` of the distinct list items.
+    """
+
+    def __init__(self, offsets, codes, values):
+        self.offsets = offsets
+        self.codes = codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = _bounds(self.offsets, index)
+        return [self.values[code] for code in self.codes[start:end]]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def _read_header(view, path):
+    magic_end = len(_MAGIC)
+    start = magic_end + _HEADER_SIZE.size
+    if len(view) < start or bytes(view[:magic_end]) != _MAGIC:
+        raise ValueError(f"{path} is no entry table")
+    (header_size,) = _HEADER_SIZE.unpack(view[magic_end:start])
+    end = start + header_size
+    header = json.loads(bytes(view[start:end]))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was saved with {header['byteorder']} byte order")
+    return header, end
+
+
+def _unmap(arrays, mapped, view):
+    # all views into the mapped file must be released before it can be closed
+    for data in arrays.values():
+        data.release()
+    view.release()
+    mapped.close()
+
+
+class Table:  # pylint: disable=too-many-instance-attributes
+    """Columnar table of entries.
+
+    Each column holds one value per entry, as compact arrays instead of
+    :py:class:`pybtex.database.Entry` objects:
+
+    - :py:attr:`keys`: the keys as :py:class:`Strings`,
+    - :py:attr:`family`: the keys without revision as :py:class:`Dictionary`,
+    - :py:attr:`revision`: the revision of a draft, ``-1`` for other entries,
+    - :py:attr:`year`: the year, ``0`` if unknown,
+    - :py:attr:`month`: the month from 1 to 12, ``0`` if unknown,
+    - :py:attr:`title`: the titles without enclosing braces as
+      :py:class:`Dictionary`, and
+    - :py:attr:`authors`: the full names of the authors as :py:class:`Lists`.
+
+    Use :py:class:`TableBuilder` to create a table and :py:meth:`load` to map a
+    table saved with :py:meth:`save`. A loaded table should be closed with
+    :py:meth:`close` or by using it as context manager.
+
+    :param arrays: Dictionary of the arrays of the table, one for each name in
+                   ``_ARRAYS``.
+    """
+
+    def __init__(self, arrays, _mapped=None):
+        self._arrays = arrays
+        self._mapped = _mapped
+        self.keys = Strings(arrays["key_offsets"], arrays["key_data"])
+        self.family = Dictionary(
+            arrays["family_codes"],
+            Strings(arrays["family_offsets"], arrays["family_data"]),
+        )
+        self.revision = arrays["revision"]
+        self.year = arrays["year"]
+        self.month = arrays["month"]
+        self.title = Dictionary(
+            arrays["title_codes"],
+            Strings(arrays["title_offsets"], arrays["title_data"]),
+        )
+        self.authors = Lists(
+            arrays["author_offsets"],
+            arrays["author_codes"],
+            Strings(arrays["author_name_offsets"], arrays["author_name_data"]),
+        )
+
+    def __len__(self):
+        return len(self.revision)
+
+    def row(self, index):
+        """Get all columns of a single entry.
+
+        :param index: The index of the entry.
+
+        :returns: A dictionary mapping each column name to its value.
+        """
+        return {
+            "key": self.keys[index],
+            "family": self.family[index],
+            "revision": self.revision[index],
+            "year": self.year[index],
+            "month": self.month[index],
+            "title": self.title[index],
+            "authors": self.authors[index],
+        }
+
+    def save(self, path):
+        """Save the table to a file that can be memory-mapped with :py:meth:`load`.
+
+        The arrays are stored in native byte order, each aligned to 8 bytes. The
+        file is replaced atomically.
+
+        :param path: Path of the file.
+        """
+        columns = {}
+        offset = 0
+        for name, typecode in _ARRAYS:
+            nbytes = memoryview(self._arrays[name]).nbytes
+            columns[name] = {"typecode": typecode, "offset": offset, "nbytes": nbytes}
+            offset += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+        header = json.dumps(
+            {"byteorder": sys.byteorder, "rows": len(self), "columns": columns}
+        ).encode()
+        header += b" " * (-(len(_MAGIC) + _HEADER_SIZE.size + len(header)) % _ALIGNMENT)
+        with atomic.AtomicFile(path) as table_file:
+            table_file.write(_MAGIC + _HEADER_SIZE.pack(len(header)) + header)
+            for name, _ in _ARRAYS:
+                data = memoryview(self._arrays[name]).cast("B")
+                table_file.write(data)
+                table_file.write(b"\0" * (-len(data) % _ALIGNMENT))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a table saved with :py:meth:`save`.
+
+        The columns are views into the mapped file, so loading takes constant time
+        and pages are only read when they are accessed.
+
+        :param path: Path of the file.
+
+        :raises ValueError: When the file is no table or was saved on a platform
+                            with a different byte order.
+
+        :returns: The read-only :py:class:`Table`.
+        """
+        with open(path, "rb") as table_file:
+            mapped = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        arrays = {}
+        try:
+            header, data_start = _read_header(view, path)
+            for name, typecode in _ARRAYS:
+                column = header["columns"][name]
+                begin = data_start + column["offset"]
+                stop = begin + column["nbytes"]
+                arrays[name] = view[begin:stop].cast(typecode)
+        except Exception:
+            _unmap(arrays, mapped, view)
+            raise
+        return cls(arrays, _mapped=(mapped, view))
+
+    def close(self):
+        """Unmap a table loaded with :py:meth:`load`. Its columns can not be accessed
+        afterwards."""
+        if self._mapped is None:
+            return
+        _unmap(self._arrays, *self._mapped)
+        self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _StringsBuilder:
+    def __init__(self):
+        self.offsets = array.array("q", [0])
+        self.data = bytearray()
+
+    def append(self, string):
+        """Append a string."""
+        self.data += string.encode()
+        self.offsets.append(len(self.data))
+
+
+class _DictionaryBuilder:
+    def __init__(self):
+        self.codes = {}
+        self.values = _StringsBuilder()
+
+    def encode(self, value):
+        """Encode a value, adding it to the dictionary if it is new."""
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+            self.values.append(value)
+        return code
+
+
+def _full_name(person):
+    return " ".join(
+        person.first_names
+        + person.middle_names
+        + person.prelast_names
+        + person.last_names
+    )
+
+
+def _strip_braces(title):
+    if title is not None and title.startswith("{") and title.endswith("}"):
+        return title[1:-1]
+    return title
+
+
+def _family_revision(key):
+    # only drafts have revisions, e.g. RFC-42 is not revision 42 of "RFC"
+    if key.startswith("draft-"):
+        number = sources.DRAFT_NUMBER.match(key)
+        if number is not None:
+            return sources.draft_family(key), int(number.group(1))
+    return key, -1
+
+
+def _year(year):
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        return 0
+    return year if 0 < year < 1 << 16 else 0
+
+
+class TableBuilder:  # pylint: disable=too-many-instance-attributes
+    """Builder of a :py:class:`Table` from batches of entries.
+
+    >>> import pybtex.database
+    >>> builder = TableBuilder()
+    >>> builder.add_batch([
+    ...     ("draft-foo-bar-01", pybtex.database.Entry(
+    ...         "techreport", {"title": "{Foo}", "month": "May", "year": "2024"}
+    ...     )),
+    ...     ("RFC-42", pybtex.database.Entry("techreport", {"title": "{Bar}"})),
+    ... ])
+    >>> table = builder.build()
+    >>> table.row(0)  # doctest: +NORMALIZE_WHITESPACE
+    {'key': 'draft-foo-bar-01', 'family': 'draft-foo-bar', 'revision': 1,
+     'year': 2024, 'month': 5, 'title': 'Foo', 'authors': []}
+    >>> list(table.family), list(table.revision)
+    (['draft-foo-bar', 'RFC-42'], [1, -1])
+    """
+
+    def __init__(self):
+        self._keys = _StringsBuilder()
+        self._family = _DictionaryBuilder()
+        self._family_codes = array.array("i")
+        self._revision = array.array("h")
+        self._year = array.array("H")
+        self._month = array.array("B")
+        self._title = _DictionaryBuilder()
+        self._title_codes = array.array("i")
+        self._author_offsets = array.array("q", [0])
+        self._authors = _DictionaryBuilder()
+        self._author_codes = array.array("i")
+
+    def __len__(self):
+        return len(self._revision)
+
+    def add_batch(self, entries):
+        """Append a batch of entries to the table.
+
+        The columns of the batch are collected first and then appended to the
+        arrays of the table at once.
+
+        :param entries: Iterable of tuples of key and
+                        :py:class:`pybtex.database.Entry`.
+        """
+        keys = []
+        family_codes = array.array("i")
+        revision = array.array("h")
+        year = array.array("H")
+        month = array.array("B")
+        title_codes = array.array("i")
+        author_codes = array.array("i")
+        author_offsets = array.array("q")
+        for key, entry in entries:
+            keys.append(key)
+            family, number = _family_revision(key)
+            family_codes.append(self._family.encode(family))
+            revision.append(number)
+            year.append(_year(entry.fields.get("year")))
+            month.append(MONTHS.get(entry.fields.get("month"), 0))
+            title_codes.append(
+                self._title.encode(_strip_braces(entry.fields.get("title")))
+            )
+            author_codes.extend(
+                self._authors.encode(_full_name(person))
+                for person in entry.persons.get("author", ())
+            )
+            author_offsets.append(len(self._author_codes) + len(author_codes))
+        for key in keys:
+            self._keys.append(key)
+        self._family_codes.extend(family_codes)
+        self._revision.extend(revision)
+        self._year.extend(year)
+        self._month.extend(month)
+        self._title_codes.extend(title_codes)
+        self._author_codes.extend(author_codes)
+        self._author_offsets.extend(author_offsets)
+
+    def build(self):
+        """Build the table.
+
+        :returns: The :py:class:`Table` with the entries added so far.
+        """
+        return Table(
+            {
+                "key_offsets": self._keys.offsets,
+                "key_data": array.array("B", self._keys.data),
+                "family_codes": self._family_codes,
+                "family_offsets": self._family.values.offsets,
+                "family_data": array.array("B", self._family.values.data),
+                "revision": self._revision,
+                "year": self._year,
+                "month": self._month,
+                "title_codes": self._title_codes,
+                "title_offsets": self._title.values.offsets,
+                "title_data": array.array("B", self._title.values.data),
+                "author_offsets": self._author_offsets,
+                "author_codes": self._author_codes,
+                "author_name_offsets": self._authors.values.offsets,
+                "author_name_data": array.array("B", self._authors.values.data),
+            }
+        )
@@ -8,6 +8,8 @@
 
 """Drop-in script for download without installing."""
 
+import sys
+
 import ietfbib2bibtex.cli
 
 __author__ = "Martine S. Lenders"
@@ -17,4 +19,4 @@ __email__ = "m.lenders@fu-berlin.de"
 
 
 if __name__ == "__main__":
-    ietfbib2bibtex.cli.main()  # pragma: no cover
+    sys.exit(ietfbib2bibtex.cli.main())  # pragma: no cover
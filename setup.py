@@ -59,6 +59,7 @@ setup(
         "Topic :: Utilities",
     ],
     install_requires=list(get_requirements()),
+    extras_require={"async": ["aiohttp"]},
     entry_points={
         "console_scripts": [
             "ietfbib2bibtex = ietfbib2bibtex.cli:main",
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import os
+import stat
+
+import pytest
+
+import ietfbib2bibtex.atomic
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_file_new(tmp_path, mocker):
+    mocker.patch("ietfbib2bibtex.atomic._UMASK", 0o027)
+    path = tmp_path / "test.txt"
+    with ietfbib2bibtex.atomic.AtomicFile(path, "w") as file:
+        file.write("test")
+        assert not path.exists()
+    assert path.read_text() == "test"
+    assert mode(path) == 0o640
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
+def test_atomic_file_existing(tmp_path):
+    path = tmp_path / "test.txt"
+    path.write_text("old")
+    os.chmod(path, 0o604)
+    with ietfbib2bibtex.atomic.AtomicFile(path, "w") as file:
+        file.write("new")
+    assert path.read_text() == "new"
+    assert mode(path) == 0o604
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
+def test_atomic_file_exception(tmp_path):
+    path = tmp_path / "test.txt"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with ietfbib2bibtex.atomic.AtomicFile(path, "w") as file:
+            file.write("new")
+            raise RuntimeError
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
+def test_atomic_file_commit_discard(tmp_path):
+    path = tmp_path / "test.bin"
+    atomic_file = ietfbib2bibtex.atomic.AtomicFile(path, prefix=".")
+    assert os.path.basename(atomic_file.name).startswith(".")
+    atomic_file.file.write(b"test")
+    atomic_file.commit()
+    assert path.read_bytes() == b"test"
+    atomic_file = ietfbib2bibtex.atomic.AtomicFile(path)
+    atomic_file.file.write(b"other")
+    atomic_file.discard()
+    assert path.read_bytes() == b"test"
+    assert os.listdir(tmp_path) == ["test.bin"]
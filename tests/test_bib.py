@@ -11,11 +11,21 @@
 # pylint: disable=missing-module-docstring
 # pylint: disable=redefined-outer-name
 
+import asyncio
+import os
+import shutil
+import time
+
+import pybtex.database
 import pytest
 
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.cache
 import ietfbib2bibtex.config
 import ietfbib2bibtex.sources
+import ietfbib2bibtex.state
 
+from .test_sources import MODULE_PATH, RFC_INDEX_XML
 from .test_sources import mock_config  # noqa: F401 pylint: disable=unused-import
 
 __author__ = "Martine S. Lenders"
@@ -58,6 +68,13 @@ def test_bib_init(mock_config, exp_exc):  # noqa: F811
             ietfbib2bibtex.bib.Bib(mock_config.bibs[0], mock_config.bibpath)
 
 
+def test_bib_create_all_bibtexs_no_source():
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.bib.Bib.create_all_bibtexs(
+            ietfbib2bibtex.config.Config(bibs=[{"name": "test"}])
+        )
+
+
 def mock_generator(sequence):
     yield from sequence
 
@@ -88,6 +105,23 @@ def test_bib_iterate(mocker, mock_config):  # noqa: F811
     ids_iterate.assert_not_called()
 
 
+def test_bib_store_incremental(mocker, tmp_path):
+    write = mocker.patch("ietfbib2bibtex.bibfile.IndexedBibFile.write")
+    to_file = mocker.patch("pybtex.database.BibliographyData.to_file")
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="test",
+            rfc_index={"remote": "http://example.org"},
+            incremental=True,
+        ),
+        str(tmp_path),
+    )
+    data = pybtex.database.BibliographyData()
+    bib.store(data)
+    write.assert_called_once_with(data)
+    to_file.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "mock_config",
     [
@@ -153,3 +187,489 @@ def test_bib_create_all_bibtexs(mocker, mock_config):  # noqa: F811
             mocker.call("/opt/foobar/test2.bib", "bibtex"),
         ],
     )
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "bibpath": "/opt/foobar/",
+                "bibs": [
+                    {"name": "test", "rfc_index": {"remote": "http://example.org"}},
+                    {
+                        "name": "test2",
+                        "bibxml_ids": {"remote": "foo::bar", "local": "test"},
+                    },
+                    {"name": "test3", "rfc_index": {"remote": "http://example.org"}},
+                    {
+                        "name": "test4",
+                        "bibxml_ids": {"remote": "foo::bar", "local": "test2"},
+                    },
+                ],
+            },
+            id="with shared sources",
+        ),
+    ],
+    indirect=True,
+)
+def test_bib_create_all_bibtexs_shared_source(mocker, mock_config):  # noqa: F811
+    rfc_iterate = mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "iterate_entries"
+    )
+    rfc_iterate.return_value = mock_generator(
+        [("zero", 0), ("one", 1), ("two", 2), ("three", 3)]
+    )
+    ids_iterate = mocker.patch.object(
+        ietfbib2bibtex.sources.BibXMLIDsSource,
+        "iterate_entries",
+    )
+    ids_iterate.side_effect = [
+        mock_generator([("four", 4), ("five", 5)]),
+        mock_generator([("six", 6), ("seven", 7)]),
+    ]
+    stored = {}
+
+    def store(self, data):
+        stored[self.name] = list(data.entries.items())
+
+    mocker.patch.object(ietfbib2bibtex.bib.Bib, "store", store)
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config)
+    rfc_iterate.assert_called_once_with(entry_filter=None, refresh=True, fields=None)
+    assert ids_iterate.call_count == 2
+    assert list(stored) == ["test", "test3", "test2", "test4"]
+    assert stored["test"] == [("zero", 0), ("one", 1), ("two", 2), ("three", 3)]
+    assert stored["test"] == stored["test3"]
+    assert stored["test2"] == [("four", 4), ("five", 5)]
+    assert stored["test4"] == [("six", 6), ("seven", 7)]
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "bibs": [
+                    {"name": "test", "rfc_index": {"remote": "http://example.org"}},
+                    {
+                        "name": "test2",
+                        "rfc_index": {"remote": "http://example.org"},
+                        "filter": {"key": "RFC-9"},
+                    },
+                    {
+                        "name": "test3",
+                        "rfc_index": {"remote": "http://example.org"},
+                        "filter": {"key": "RFC-9"},
+                    },
+                ],
+            },
+            id="with filters",
+        ),
+    ],
+    indirect=True,
+)
+def test_bib_create_all_bibtexs_shared_source_filter(mocker, mock_config):  # noqa: F811
+    rfc_iterate = mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "iterate_entries"
+    )
+    rfc_iterate.side_effect = [
+        mock_generator([("RFC-781", 0), ("RFC-9325", 1)]),
+        mock_generator([("RFC-9325", 1)]),
+    ]
+    stored = {}
+
+    def store(self, data):
+        stored[self.name] = list(data.entries.items())
+
+    mocker.patch.object(ietfbib2bibtex.bib.Bib, "store", store)
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config)
+    # the remote is only fetched for the first filter
+    assert rfc_iterate.call_args_list == [
+        mocker.call(entry_filter=None, refresh=True, fields=None),
+        mocker.call(entry_filter=mocker.ANY, refresh=False, fields=None),
+    ]
+    assert rfc_iterate.call_args_list[1].kwargs["entry_filter"].config.key == "RFC-9"
+    assert stored["test"] == [("RFC-781", 0), ("RFC-9325", 1)]
+    assert stored["test2"] == [("RFC-9325", 1)]
+    assert stored["test3"] == stored["test2"]
+
+
+@pytest.mark.parametrize(
+    "bib_config, age, exists, modified, check_upstream, exp_due",
+    [
+        pytest.param({}, None, True, False, False, True, id="never built"),
+        pytest.param({}, 10, False, False, False, True, id="file missing"),
+        pytest.param({}, 10, True, False, False, True, id="no schedule"),
+        pytest.param({}, 10, True, False, True, False, id="upstream unchanged"),
+        pytest.param({}, 10, True, True, True, True, id="upstream changed"),
+        pytest.param({"refresh_interval": 60}, 10, True, True, True, False, id="fresh"),
+        pytest.param(
+            {"refresh_interval": 60}, 100, True, False, False, True, id="stale"
+        ),
+        pytest.param(
+            {"refresh_interval": 60, "max_age": 1000},
+            100,
+            True,
+            False,
+            True,
+            False,
+            id="stale, upstream unchanged",
+        ),
+        pytest.param(
+            {"refresh_interval": 60, "max_age": 1000},
+            2000,
+            True,
+            False,
+            True,
+            True,
+            id="too old, upstream unchanged",
+        ),
+    ],
+)
+def test_bib_is_due(
+    mocker, tmp_path, bib_config, age, exists, modified, check_upstream, exp_due
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    is_modified = mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "is_modified", return_value=modified
+    )
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="test", rfc_index={"remote": "http://example.org"}, **bib_config
+        ),
+        str(tmp_path),
+    )
+    the_state = ietfbib2bibtex.state.State(str(tmp_path / "state.json"))
+    if exists:
+        (tmp_path / "test.bib").write_text("")
+    if age is not None:
+        bib.source.validator = '"abcdef"'
+        bib.record_success(the_state, now=1000)
+        assert the_state["bibs"][str(tmp_path / "test.bib")] == {
+            "last_success": 1000,
+            "validator": '"abcdef"',
+        }
+    now = 1000 + (age or 0)
+    assert bib.is_due(the_state, check_upstream, now=now) == exp_due
+    if is_modified.called:
+        is_modified.assert_called_once_with('"abcdef"', synced=None)
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "bibs": [
+                    {
+                        "name": "test",
+                        "rfc_index": {"remote": "http://example.org"},
+                        "refresh_interval": 3600,
+                    },
+                    {
+                        "name": "test2",
+                        "rfc_index": {"remote": "http://example.org"},
+                    },
+                ],
+            },
+            id="with refresh_interval",
+        ),
+    ],
+    indirect=True,
+)
+def test_bib_create_all_bibtexs_due_only(mocker, tmp_path, mock_config):  # noqa: F811
+    mock_config.bibpath = str(tmp_path)
+    rfc_iterate = mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "iterate_entries"
+    )
+    rfc_iterate.side_effect = lambda **_: mock_generator([("zero", 0), ("one", 1)])
+    stored = []
+
+    def store(self, data):
+        stored.append(self.name)
+        with open(self.bibtex_path, "w", encoding="utf-8") as bibtex:
+            bibtex.write(str(list(data.entries)))
+
+    mocker.patch.object(ietfbib2bibtex.bib.Bib, "store", store)
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config, due_only=True)
+    assert stored == ["test", "test2"]
+    the_state = ietfbib2bibtex.state.State(mock_config.state_file)
+    assert set(the_state["bibs"]) == {
+        str(tmp_path / "test.bib"),
+        str(tmp_path / "test2.bib"),
+    }
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config, due_only=True)
+    assert stored == ["test", "test2", "test2"]
+    assert rfc_iterate.call_count == 2
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config)
+    assert stored == ["test", "test2", "test2", "test", "test2"]
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "cache": {"max_size": 1},
+                "bibs": [
+                    {"name": "test", "rfc_index": {"remote": "http://example.org"}},
+                    {"name": "test2", "bibxml_ids": {"remote": "foo::bar"}},
+                ],
+            },
+            id="with cache",
+        ),
+    ],
+    indirect=True,
+)
+def test_bib_create_all_bibtexs_cache(mocker, tmp_path, mock_config):  # noqa: F811
+    mock_config.cache.path = str(tmp_path)
+    mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource,
+        "iterate_entries",
+        return_value=mock_generator([("zero", 0)]),
+    )
+    mocker.patch.object(
+        ietfbib2bibtex.sources.BibXMLIDsSource,
+        "iterate_entries",
+        return_value=mock_generator([("one", 1)]),
+    )
+    mocker.patch.object(ietfbib2bibtex.bib.Bib, "store")
+    evict = mocker.patch.object(ietfbib2bibtex.cache.Cache, "evict")
+    bibs = []
+    mocker.patch.object(
+        ietfbib2bibtex.bib.Bib,
+        "create_shared_bibtexs",
+        side_effect=bibs.extend,
+    )
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config)
+    evict.assert_called_once_with()
+    assert bibs[1].source.local == ietfbib2bibtex.cache.Cache(
+        str(tmp_path)
+    ).mirror_path("foo::bar")
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "bibs": [
+                    {
+                        "name": "test",
+                        "bibxml_ids": {
+                            "remote": "foobar::test",
+                            "local": os.path.join(MODULE_PATH, "test_ids"),
+                        },
+                    }
+                ]
+            },
+            id="with bibxml_ids config",
+        ),
+    ],
+    indirect=True,
+)
+def test_bib_create_all_bibtexs_quarantine(mocker, tmp_path, mock_config):  # noqa: F811
+    mocker.patch("subprocess.check_output", return_value="")
+    mock_config.bibpath = str(tmp_path)
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(mock_config)
+    the_state = ietfbib2bibtex.state.State(mock_config.state_file)
+    assert sorted(os.path.basename(path) for path in the_state["quarantine"]) == [
+        "reference.I-D.draft-ietf-idn-amc-ace-v-00.xml",
+        "reference.I-D.draft-yangcan-cloud-intelligence-web-platform-00.xml",
+    ]
+
+
+def test_bib_lookup_all(mocker, tmp_path):
+    check_output = mocker.patch("subprocess.check_output")
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    the_config = ietfbib2bibtex.config.Config(
+        bibs=[
+            {
+                "name": "rfcs",
+                "rfc_index": {"remote": str(rfc_index)},
+                "filter": {"year_from": 2000},
+            },
+            {
+                "name": "ids",
+                "bibxml_ids": {
+                    "remote": "foobar::test",
+                    "local": os.path.join(MODULE_PATH, "test_ids"),
+                },
+            },
+        ]
+    )
+    data, missing = ietfbib2bibtex.bib.Bib.lookup_all(
+        the_config, ["rfc9325", "draft-lenders-dns-cns", "RFC-781", "foobar"]
+    )
+    assert list(data.entries) == ["RFC-9325", "draft-lenders-dns-cns"]
+    assert missing == ["RFC-781", "foobar"]
+    data, missing = ietfbib2bibtex.bib.Bib.lookup_all(
+        the_config, ["rfc9325", "draft-lenders-dns-cns"], names=["ids"]
+    )
+    assert list(data.entries) == ["draft-lenders-dns-cns"]
+    assert missing == ["rfc9325"]
+    check_output.assert_not_called()
+
+
+def test_bib_acreate_bibtex(mocker, tmp_path):
+    async def aiterate_entries(_, entry_filter=None, refresh=True, fields=None):
+        assert entry_filter is None
+        assert refresh
+        assert fields is None
+        for key in ("zero", "one"):
+            yield key, pybtex.database.Entry("misc", {"title": f"{{{key}}}"})
+
+    mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "aiterate_entries", aiterate_entries
+    )
+    bibs = [
+        ietfbib2bibtex.bib.Bib(
+            ietfbib2bibtex.config.Bib(
+                name=name, rfc_index={"remote": "http://example.org"}
+            ),
+            str(tmp_path),
+        )
+        for name in ("test1", "test2")
+    ]
+
+    async def create():
+        await asyncio.gather(*(bib.acreate_bibtex() for bib in bibs))
+
+    asyncio.run(create())
+    for bib in bibs:
+        data = pybtex.database.parse_file(bib.bibtex_path)
+        assert list(data.entries) == ["zero", "one"]
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_bib_create_bibtex_pipelined(mocker, tmp_path, incremental):
+    mocker.patch("subprocess.check_output", return_value="")
+    outputs = []
+    for pipeline_depth in (None, 2):
+        bib = ietfbib2bibtex.bib.Bib(
+            ietfbib2bibtex.config.Bib(
+                name=f"test{pipeline_depth}",
+                bibxml_ids={
+                    "remote": "foobar::test",
+                    "local": os.path.join(MODULE_PATH, "test_ids"),
+                    "pipeline_depth": pipeline_depth,
+                },
+                incremental=incremental,
+            ),
+            str(tmp_path),
+        )
+        bib.create_bibtex()
+        with open(bib.bibtex_path, "rb") as bib_file:
+            outputs.append(bib_file.read())
+    assert outputs[0] == outputs[1]
+    assert os.path.exists(tmp_path / "test2.bib.idx") == incremental
+
+
+def test_bib_create_bibtex_pipelined_duplicates(mocker, tmp_path):
+    entries = [
+        (key, pybtex.database.Entry("misc", {"title": f"{{{title}}}"}))
+        for key, title in (("Foo", "a"), ("bar", "b"), ("foo", "c"))
+    ]
+    mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource,
+        "iterate_entries",
+        return_value=iter(entries),
+    )
+    mocker.patch.object(ietfbib2bibtex.sources.RFCIndexSource, "pipeline_depth", 4)
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="test", rfc_index={"remote": "http://example.org"}
+        ),
+        str(tmp_path),
+    )
+    bib.create_bibtex()
+    data = pybtex.database.BibliographyData()
+    for key, entry in entries:
+        data.entries[key] = entry
+    with open(bib.bibtex_path, encoding="utf-8") as bib_file:
+        assert bib_file.read() == data.to_string("bibtex")
+
+
+def test_bib_create_recent_bibtexs(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    # files are copied right before the full build
+    mocker.patch.object(ietfbib2bibtex.sources, "TIMESTAMP_SLACK", 0)
+    local = tmp_path / "ids"
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), local)
+    the_config = ietfbib2bibtex.config.Config(
+        bibpath=str(tmp_path),
+        state_file=str(tmp_path / "state.json"),
+        bibs=[
+            {
+                "name": "ids",
+                "bibxml_ids": {"remote": "foobar::test", "local": str(local)},
+            },
+            {"name": "rfcs", "rfc_index": {"remote": "http://example.org"}},
+        ],
+    )
+    bib = ietfbib2bibtex.bib.Bib(the_config.bibs[0], str(tmp_path))
+    # never built
+    ietfbib2bibtex.bib.Bib.create_recent_bibtexs(the_config)
+    assert not os.path.exists(bib.recent_bibtex_path)
+    mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource,
+        "iterate_entries",
+        return_value=iter([]),
+    )
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(the_config)
+    assert not os.path.exists(bib.recent_bibtex_path)
+    latest = local / "reference.I-D.draft-ietf-core-dns-over-coap-01.xml"
+    newer = local / "reference.I-D.draft-ietf-core-dns-over-coap-02.xml"
+    newer.write_text(
+        latest.read_text(encoding="utf-8").replace("-01", "-02"), encoding="utf-8"
+    )
+    (local / "reference.I-D.draft-lenders-dns-cns-00.xml").touch()
+    ietfbib2bibtex.bib.Bib.create_recent_bibtexs(the_config)
+    recent = pybtex.database.parse_file(bib.recent_bibtex_path)
+    assert list(recent.entries) == [
+        "draft-ietf-core-dns-over-coap-02",
+        "draft-ietf-core-dns-over-coap",
+        "draft-lenders-dns-cns-00",
+        "draft-lenders-dns-cns",
+    ]
+    assert recent.entries["draft-ietf-core-dns-over-coap"].fields["number"] == "02"
+    assert (
+        "draft-ietf-core-dns-over-coap-02"
+        not in pybtex.database.parse_file(bib.bibtex_path).entries
+    )
+    assert not os.path.exists(tmp_path / "rfcs-recent.bib")
+    # the next full build folds the overlay
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(the_config)
+    assert (
+        "draft-ietf-core-dns-over-coap-02"
+        in pybtex.database.parse_file(bib.bibtex_path).entries
+    )
+    assert os.path.getsize(bib.recent_bibtex_path) == 0
+
+
+def test_bib_create_recent_bibtex_older_revision(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    local = tmp_path / "ids"
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), local)
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="ids", bibxml_ids={"remote": "foobar::test", "local": str(local)}
+        ),
+        str(tmp_path),
+    )
+    mocker.patch.object(ietfbib2bibtex.sources, "TIMESTAMP_SLACK", 0)
+    since = time.time()
+    time.sleep(0.05)
+    (local / "reference.I-D.draft-ietf-core-dns-over-coap-00.xml").touch()
+    bib.create_recent_bibtex(since)
+    # the unversioned key stays with the latest revision in the base file
+    assert list(pybtex.database.parse_file(bib.recent_bibtex_path).entries) == [
+        "draft-ietf-core-dns-over-coap-00"
+    ]
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.bib.Bib(
+            ietfbib2bibtex.config.Bib(
+                name="rfcs", rfc_index={"remote": "http://example.org"}
+            ),
+            str(tmp_path),
+        ).create_recent_bibtex(since)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import json
+
+import pybtex.database
+import pytest
+
+import ietfbib2bibtex.bibfile
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def make_data(titles):
+    data = pybtex.database.BibliographyData()
+    for key, title in titles.items():
+        data.entries[key] = pybtex.database.Entry(
+            "misc", fields={"title": f"{{{title}}}", "year": "2024"}
+        )
+    return data
+
+
+def full_rebuild(tmp_path, data):
+    path = tmp_path / "full.bib"
+    data.to_file(str(path), "bibtex")
+    return path.read_bytes()
+
+
+def test_serialize_entry():
+    data = make_data({"a": "Title"})
+    assert ietfbib2bibtex.bibfile.serialize_entry(
+        "a", data.entries["a"]
+    ) == data.to_bytes("bibtex")
+
+
+@pytest.mark.parametrize(
+    "titles",
+    [
+        pytest.param({}, id="empty"),
+        pytest.param({"a": "A", "b": "B", "c": "C"}, id="entries"),
+    ],
+)
+def test_indexed_bib_file_rewrite(tmp_path, titles):
+    data = make_data(titles)
+    path = tmp_path / "test.bib"
+    bib_file = ietfbib2bibtex.bibfile.IndexedBibFile(str(path))
+    assert bib_file.write(data) == "rewritten"
+    assert path.read_bytes() == full_rebuild(tmp_path, data)
+    with open(bib_file.index_path, encoding="utf-8") as index_file:
+        index = json.load(index_file)
+    assert [entry[0] for entry in index["entries"]] == list(titles)
+    content = path.read_bytes()
+    for _, offset, length, _ in index["entries"]:
+        assert content[offset:].startswith(b"@misc{")
+        assert content[offset:][:length].endswith(b"\n}\n")
+
+
+@pytest.mark.parametrize(
+    "new_titles, exp_garbage",
+    [
+        pytest.param({"a": "A", "b": "B", "c": "C"}, 0, id="unchanged"),
+        pytest.param({"a": "A", "b": "X", "c": "C"}, 0, id="same length"),
+        pytest.param({"a": "A", "b": "BBB", "c": "C"}, 1, id="longer"),
+        pytest.param({"a": "A", "b": "B", "c": "C", "d": "D"}, 0, id="new"),
+        pytest.param({"a": "A", "c": "C"}, 1, id="removed"),
+    ],
+)
+def test_indexed_bib_file_patch(tmp_path, new_titles, exp_garbage):
+    path = tmp_path / "test.bib"
+    bib_file = ietfbib2bibtex.bibfile.IndexedBibFile(str(path), compact_threshold=1)
+    bib_file.write(make_data({"a": "A", "b": "B", "c": "C"}))
+    data = make_data(new_titles)
+    assert bib_file.write(data) == "patched"
+    # entries are appended, so only the order may differ from a full rebuild
+    parsed = pybtex.database.parse_file(str(path))
+    assert sorted(parsed.entries) == sorted(new_titles)
+    for key, entry in parsed.entries.items():
+        assert entry.fields == data.entries[key].fields
+    with open(bib_file.index_path, encoding="utf-8") as index_file:
+        index = json.load(index_file)
+    assert (index["garbage"] > 0) == bool(exp_garbage)
+    assert sorted(entry[0] for entry in index["entries"]) == sorted(new_titles)
+    # patching again from the new index is a no-op
+    content = path.read_bytes()
+    assert bib_file.write(data) == "patched"
+    assert path.read_bytes() == content
+    # compacting results in a full rebuild
+    bib_file.compact_threshold = 0
+    data = make_data({**new_titles, "a": "Z"})
+    bib_file.write(data)
+    assert path.read_bytes() == full_rebuild(tmp_path, data)
+
+
+def test_indexed_bib_file_compact(tmp_path):
+    path = tmp_path / "test.bib"
+    bib_file = ietfbib2bibtex.bibfile.IndexedBibFile(str(path), compact_threshold=0.5)
+    bib_file.write(make_data({"a": "A", "b": "B", "c": "C"}))
+    assert bib_file.write(make_data({"a": "A", "b": "BB", "c": "C"})) == "patched"
+    data = make_data({"a": "AA", "b": "BBB", "c": "CC"})
+    assert bib_file.write(data) == "rewritten"
+    assert path.read_bytes() == full_rebuild(tmp_path, data)
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        pytest.param(lambda p: p.write_bytes(b""), id="bib changed"),
+        pytest.param(lambda p: p.with_suffix(".bib.idx").write_text("{"), id="bad"),
+        pytest.param(lambda p: p.with_suffix(".bib.idx").write_text("[]"), id="list"),
+        pytest.param(lambda p: p.with_suffix(".bib.idx").unlink(), id="no index"),
+    ],
+)
+def test_indexed_bib_file_stale_index(tmp_path, tamper):
+    path = tmp_path / "test.bib"
+    bib_file = ietfbib2bibtex.bibfile.IndexedBibFile(str(path))
+    data = make_data({"a": "A", "b": "B"})
+    bib_file.write(data)
+    tamper(path)
+    assert bib_file.write(data) == "rewritten"
+    assert path.read_bytes() == full_rebuild(tmp_path, data)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+import concurrent.futures
+import datetime
+import json
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+import ietfbib2bibtex
+import ietfbib2bibtex.cache
+import ietfbib2bibtex.config
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ietfbib2bibtex.cache.Cache(str(tmp_path / "cache"))
+
+
+def test_cache_from_config(tmp_path):
+    cache = ietfbib2bibtex.cache.Cache.from_config(
+        ietfbib2bibtex.config.Cache(
+            path=str(tmp_path), max_size=1024, ttl=datetime.timedelta(hours=1)
+        )
+    )
+    assert cache.path == str(tmp_path)
+    assert cache.max_size == 1024
+    assert cache.ttl == 3600
+
+
+def test_cache_put_get(cache):
+    assert cache.get(ietfbib2bibtex.cache.digest(b"test")) is None
+    assert cache.object_path(ietfbib2bibtex.cache.digest(b"test")) is None
+    key = cache.put(b"test")
+    assert key == ietfbib2bibtex.cache.digest("test")
+    assert cache.get(key) == b"test"
+    with open(cache.object_path(key), "rb") as obj:
+        assert obj.read() == b"test"
+    assert cache.put(b"foobar", key="abcdef") == "abcdef"
+    assert cache.get("abcdef") == b"foobar"
+
+
+def test_cache_modes(mocker, cache):
+    mocker.patch("ietfbib2bibtex.atomic._UMASK", 0o002)
+    key = cache.put(b"test")
+    assert stat.S_IMODE(os.stat(cache.object_path(key)).st_mode) == 0o664
+    cache.memoize("test", lambda: None)
+    for dirpath, _, filenames in os.walk(os.path.join(cache.path, "objects")):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o664
+
+
+def test_cache_permission_error(mocker, cache):
+    key = cache.put(b"test")
+    mocker.patch("ietfbib2bibtex.cache.open", side_effect=PermissionError, create=True)
+    mocker.patch("os.access", return_value=False)
+    assert cache.get(key) is None
+    assert cache.object_path(key) is None
+
+
+def test_cache_memoize(cache):
+    calls = []
+
+    def func():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"test": [1, 2, 3]}
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: cache.memoize("test", func), range(4)))
+    assert len(calls) == 1
+    assert all(result == {"test": [1, 2, 3]} for result in results)
+    assert cache.memoize("test", func) == {"test": [1, 2, 3]}
+    assert len(calls) == 1
+    assert cache.memoize("test2", func) == {"test": [1, 2, 3]}
+    assert len(calls) == 2
+    # values are stored as JSON, not pickled
+    key = ietfbib2bibtex.cache.digest(f"{ietfbib2bibtex.__version__}:json:test")
+    assert json.loads(cache.get(key)) == {"test": [1, 2, 3]}
+
+
+def test_cache_memoize_locks(cache):
+    for i in range(1000):
+        cache.memoize(f"test{i}", lambda: None)
+    # the lock files are shared between values
+    assert len(os.listdir(os.path.join(cache.path, "locks"))) <= 16**2
+
+
+def test_cache_fetch(mocker, cache):
+    get = mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(
+            status_code=200,
+            content=b"foobar",
+            headers={"ETag": '"abcdef"', "Last-Modified": "Tue, 15 Nov 1994"},
+        ),
+    )
+    key, validator = cache.fetch("http://example.org")
+    assert cache.get(key) == b"foobar"
+    assert validator == '"abcdef"'
+    get.assert_called_once_with("http://example.org", headers={}, timeout=5)
+    get.return_value.raise_for_status.assert_called_once_with()
+    # fresh download is reused
+    assert cache.fetch("http://example.org") == (key, validator)
+    get.assert_called_once()
+    # stale download is revalidated
+    cache.ttl = 0
+    get.return_value.status_code = 304
+    assert cache.fetch("http://example.org") == (key, validator)
+    get.assert_called_with(
+        "http://example.org",
+        headers={"If-None-Match": '"abcdef"', "If-Modified-Since": "Tue, 15 Nov 1994"},
+        timeout=5,
+    )
+    get.return_value = mocker.Mock(status_code=200, content=b"test", headers={})
+    key, validator = cache.fetch("http://example.org")
+    assert cache.get(key) == b"test"
+    assert validator is None
+    # evicted content is downloaded again
+    os.remove(cache.object_path(key))
+    cache.ttl = 300
+    assert cache.fetch("http://example.org") == (key, None)
+    assert get.call_count == 4
+
+
+def test_cache_fetch_concurrent(mocker, cache):
+    def get(*args, **kwargs):  # pylint: disable=unused-argument
+        time.sleep(0.05)
+        return mocker.Mock(status_code=200, content=b"foobar", headers={})
+
+    get = mocker.patch("requests.get", side_effect=get)
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        results = list(
+            executor.map(lambda _: cache.fetch("http://example.org"), range(4))
+        )
+    assert get.call_count == 1
+    assert len(set(results)) == 1
+
+
+def test_cache_sync_mirror(cache):
+    synced = threading.Event()
+
+    def sync():
+        synced.set()
+        return "changes"
+
+    mirror = cache.mirror_path("foobar::test")
+    assert mirror.startswith(cache.path)
+    assert mirror != cache.mirror_path("foobar::test2")
+    assert cache.sync_mirror("foobar::test", sync) == "changes"
+    assert synced.is_set()
+    synced.clear()
+    assert cache.sync_mirror("foobar::test", sync) is None
+    assert not synced.is_set()
+    cache.ttl = 0
+    assert cache.sync_mirror("foobar::test", sync) == "changes"
+    assert synced.is_set()
+
+
+def test_cache_read_mirror_blocks_sync(cache):
+    events = []
+
+    def sync():
+        events.append("sync")
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        with cache.read_mirror("foobar::test"):
+            future = executor.submit(cache.sync_mirror, "foobar::test", sync)
+            time.sleep(0.05)
+            events.append("read")
+        future.result()
+    assert events == ["read", "sync"]
+
+
+def test_cache_evict(cache):
+    cache.evict()
+    keys = [cache.put(bytes([i]) * 100) for i in range(5)]
+    for i, key in enumerate(keys):
+        os.utime(cache.object_path(key), (i, i))
+    # access makes the first object the most recently used
+    cache.get(keys[0])
+    cache.max_size = 250
+    cache.evict()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is None
+    assert cache.get(keys[3]) is None
+    assert cache.get(keys[4]) is not None
+
+
+def test_cache_downloaded(mocker, cache):
+    mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(status_code=200, content=b"foobar", headers={}),
+    )
+    assert cache.downloaded("http://example.org") is None
+    key, _ = cache.fetch("http://example.org")
+    cache.ttl = 0
+    assert cache.downloaded("http://example.org") == key
+    os.remove(cache.object_path(key))
+    assert cache.downloaded("http://example.org") is None
@@ -12,11 +12,13 @@
 import argparse
 import sys
 
+import pybtex.database
 import pytest
 
 import ietfbib2bibtex.bib
 import ietfbib2bibtex.cli
 import ietfbib2bibtex.config
+import ietfbib2bibtex.state
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2022 Freie Universität Berlin"
@@ -27,8 +29,144 @@ __email__ = "m.lenders@fu-berlin.de"
 @pytest.mark.parametrize(
     "argv, exp_args",
     [
-        (["cmd"], argparse.Namespace(config_file=None)),
-        (["cmd", "-c", "test.yaml"], argparse.Namespace(config_file="test.yaml")),
+        (
+            ["cmd"],
+            argparse.Namespace(
+                config_file=None,
+                command="run",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+            ),
+        ),
+        (
+            ["cmd", "-c", "test.yaml"],
+            argparse.Namespace(
+                config_file="test.yaml",
+                command="run",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+            ),
+        ),
+        (
+            ["cmd", "run", "--due-only"],
+            argparse.Namespace(
+                config_file=None,
+                command="run",
+                due_only=True,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+            ),
+        ),
+        (
+            ["cmd", "-c", "test.yaml", "run", "--due-only", "--check-upstream"],
+            argparse.Namespace(
+                config_file="test.yaml",
+                command="run",
+                due_only=True,
+                check_upstream=True,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+            ),
+        ),
+        (
+            ["cmd", "get", "RFC-9325", "draft-foo-bar", "-b", "rfcs", "-b", "ids"],
+            argparse.Namespace(
+                config_file=None,
+                command="get",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+                keys=["RFC-9325", "draft-foo-bar"],
+                bib_names=["rfcs", "ids"],
+            ),
+        ),
+        (
+            ["cmd", "run", "--profile", "cpu", "--profile-top", "5"],
+            argparse.Namespace(
+                config_file=None,
+                command="run",
+                due_only=False,
+                check_upstream=False,
+                profile="cpu",
+                profile_top=5,
+                partitions=None,
+            ),
+        ),
+        (
+            ["cmd", "run", "--partitions", "4"],
+            argparse.Namespace(
+                config_file=None,
+                command="run",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=4,
+            ),
+        ),
+        (
+            ["cmd", "partition", "-b", "ids", "--index", "1", "--count", "4"]
+            + ["-o", "ids.1.bib"],
+            argparse.Namespace(
+                config_file=None,
+                command="partition",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+                bib_name="ids",
+                index=1,
+                count=4,
+                output="ids.1.bib",
+                state_file=None,
+                cache=None,
+            ),
+        ),
+        (
+            ["cmd", "partition", "-b", "ids", "--index", "1", "--count", "4"]
+            + ["-o", "ids.1.bib", "--state-file", "state.json", "--cache", "cache"],
+            argparse.Namespace(
+                config_file=None,
+                command="partition",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+                bib_name="ids",
+                index=1,
+                count=4,
+                output="ids.1.bib",
+                state_file="state.json",
+                cache="cache",
+            ),
+        ),
+        (
+            ["cmd", "merge", "-b", "ids", "ids.0.bib", "ids.1.bib"],
+            argparse.Namespace(
+                config_file=None,
+                command="merge",
+                due_only=False,
+                check_upstream=False,
+                profile=None,
+                profile_top=10,
+                partitions=None,
+                bib_name="ids",
+                partials=["ids.0.bib", "ids.1.bib"],
+            ),
+        ),
     ],
 )
 def test_parse_args(monkeypatch, argv, exp_args):
@@ -43,7 +181,139 @@ def test_main(mocker):
     create_all_bibtexs = mocker.patch.object(
         ietfbib2bibtex.bib.Bib, "create_all_bibtexs"
     )
-    ietfbib2bibtex.cli.main()
+    parse_args.return_value.command = "run"
+    assert ietfbib2bibtex.cli.main() == 0
     parse_args.assert_called_once_with()
     config_from_file.assert_called_once_with(parse_args.return_value.config_file)
-    create_all_bibtexs.assert_called_once_with(config_from_file.return_value)
+    create_all_bibtexs.assert_called_once_with(
+        config_from_file.return_value,
+        due_only=parse_args.return_value.due_only,
+        check_upstream=parse_args.return_value.check_upstream,
+        profile=parse_args.return_value.profile,
+        profile_top=parse_args.return_value.profile_top,
+        partitions=parse_args.return_value.partitions,
+        config_file=parse_args.return_value.config_file,
+    )
+
+
+@pytest.mark.parametrize("cache", [None, {"path": "old", "max_size": 1024}])
+def test_main_partition(mocker, tmp_path, cache):
+    parse_args = mocker.patch.object(ietfbib2bibtex.cli, "parse_args")
+    parse_args.return_value.command = "partition"
+    parse_args.return_value.state_file = str(tmp_path / "state.json")
+    parse_args.return_value.cache = str(tmp_path / "cache")
+    config = ietfbib2bibtex.config.Config(cache=cache)
+    mocker.patch.object(ietfbib2bibtex.config.Config, "from_file", return_value=config)
+    by_name = mocker.patch.object(ietfbib2bibtex.bib.Bib, "by_name")
+
+    def create_partial_bibtex(*_):
+        # malformed bibxml files are quarantined in the given state file
+        by_name.call_args.args[2]["quarantine"]["bad.xml"] = {"digest": "abcdef"}
+
+    by_name.return_value.create_partial_bibtex.side_effect = create_partial_bibtex
+    assert ietfbib2bibtex.cli.main() == 0
+    assert config.state_file == str(tmp_path / "state.json")
+    assert config.cache.path == str(tmp_path / "cache")
+    assert config.cache.max_size == (None if cache is None else 1024)
+    by_name.assert_called_once_with(
+        config, parse_args.return_value.bib_name, mocker.ANY
+    )
+    by_name.return_value.create_partial_bibtex.assert_called_once_with(
+        parse_args.return_value.index,
+        parse_args.return_value.count,
+        parse_args.return_value.output,
+    )
+    assert ietfbib2bibtex.state.State(config.state_file)["quarantine"] == {
+        "bad.xml": {"digest": "abcdef"}
+    }
+
+
+def test_main_merge(mocker):
+    parse_args = mocker.patch.object(ietfbib2bibtex.cli, "parse_args")
+    parse_args.return_value.command = "merge"
+    mocker.patch.object(ietfbib2bibtex.config.Config, "from_file")
+    by_name = mocker.patch.object(ietfbib2bibtex.bib.Bib, "by_name")
+    assert ietfbib2bibtex.cli.main() == 0
+    by_name.return_value.merge_bibtex.assert_called_once_with(
+        parse_args.return_value.partials
+    )
+
+
+def test_main_recent(mocker):
+    parse_args = mocker.patch.object(ietfbib2bibtex.cli, "parse_args")
+    parse_args.return_value.command = "recent"
+    config_from_file = mocker.patch.object(ietfbib2bibtex.config.Config, "from_file")
+    create_recent_bibtexs = mocker.patch.object(
+        ietfbib2bibtex.bib.Bib, "create_recent_bibtexs"
+    )
+    create_all_bibtexs = mocker.patch.object(
+        ietfbib2bibtex.bib.Bib, "create_all_bibtexs"
+    )
+    assert ietfbib2bibtex.cli.main() == 0
+    create_recent_bibtexs.assert_called_once_with(config_from_file.return_value)
+    create_all_bibtexs.assert_not_called()
+
+
+def test_parse_args_invalid_profile(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["cmd", "run", "--profile", "foobar"])
+    with pytest.raises(SystemExit):
+        ietfbib2bibtex.cli.parse_args()
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["cmd", "run", "--partitions", "0"],
+        ["cmd", "run", "--partitions", "-1"],
+        ["cmd", "run", "--partitions", "foo"],
+        ["cmd", "run", "--profile-top", "0"],
+        ["cmd", "run", "--profile-top", "-3"],
+        ["cmd", "partition", "-b", "ids", "--index", "0", "--count", "0", "-o", "x"],
+        ["cmd", "partition", "-b", "ids", "--index", "4", "--count", "4", "-o", "x"],
+        ["cmd", "partition", "-b", "ids", "--index", "-1", "--count", "4", "-o", "x"],
+    ],
+)
+def test_parse_args_invalid_counts(monkeypatch, argv):
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit):
+        ietfbib2bibtex.cli.parse_args()
+
+
+@pytest.mark.parametrize("missing", [[], ["foobar"]])
+def test_main_get(mocker, capsys, missing):
+    parse_args = mocker.patch.object(ietfbib2bibtex.cli, "parse_args")
+    parse_args.return_value.command = "get"
+    config_from_file = mocker.patch.object(ietfbib2bibtex.config.Config, "from_file")
+    data = pybtex.database.BibliographyData(
+        {"RFC-1": pybtex.database.Entry("techreport", {"title": "{Test}"})}
+    )
+    lookup_all = mocker.patch.object(
+        ietfbib2bibtex.bib.Bib, "lookup_all", return_value=(data, missing)
+    )
+    create_all_bibtexs = mocker.patch.object(
+        ietfbib2bibtex.bib.Bib, "create_all_bibtexs"
+    )
+    assert ietfbib2bibtex.cli.main() == (1 if missing else 0)
+    lookup_all.assert_called_once_with(
+        config_from_file.return_value,
+        parse_args.return_value.keys,
+        names=parse_args.return_value.bib_names,
+    )
+    create_all_bibtexs.assert_not_called()
+    captured = capsys.readouterr()
+    assert captured.out == data.to_string("bibtex")
+    assert ("foobar not found" in captured.err) == bool(missing)
+
+
+def test_main_get_not_found(mocker, capsys):
+    mocker.patch.object(ietfbib2bibtex.cli, "parse_args").return_value.command = "get"
+    mocker.patch.object(ietfbib2bibtex.config.Config, "from_file")
+    mocker.patch.object(
+        ietfbib2bibtex.bib.Bib,
+        "lookup_all",
+        return_value=(pybtex.database.BibliographyData(), ["foobar"]),
+    )
+    assert ietfbib2bibtex.cli.main() == 1
+    captured = capsys.readouterr()
+    assert not captured.out
+    assert "foobar not found" in captured.err
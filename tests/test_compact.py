@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import os
+
+import pybtex.database
+import pytest
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.compact
+import ietfbib2bibtex.config
+
+from .test_sources import MODULE_PATH
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def resolved(data):
+    """Fields and persons of each entry as BibTeX resolves them via crossref."""
+    result = {}
+    for key, entry in data.entries.items():
+        if "crossref" in entry.fields:
+            assert list(entry.fields) == ["crossref"]
+            target = entry.fields["crossref"]
+            # BibTeX requires the referred entry to follow the referring one
+            assert list(data.entries).index(target) > list(data.entries).index(key)
+            entry = data.entries[target]
+        result[key] = (
+            entry.type,
+            dict(entry.fields),
+            {
+                role: [str(p) for p in persons]
+                for role, persons in entry.persons.items()
+            },
+        )
+    return result
+
+
+def ids_bib(tmp_path, name="ids", **kwargs):
+    return ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name=name,
+            bibxml_ids={
+                "remote": "foobar::test",
+                "local": os.path.join(MODULE_PATH, "test_ids"),
+            },
+            **kwargs,
+        ),
+        str(tmp_path),
+    )
+
+
+def test_alias_duplicates():
+    first = pybtex.database.Entry("techreport", {"title": "a"})
+    second = pybtex.database.Entry("techreport", {"title": "b"})
+    entries = [
+        ("a-00", first),
+        ("b-01", second),
+        ("b", pybtex.database.Entry("techreport", {"title": "b"})),
+        ("a", first),
+        ("c", pybtex.database.Entry("misc", {"title": "b"})),
+    ]
+    aliased = list(ietfbib2bibtex.compact.alias_duplicates(entries))
+    assert [key for key, _ in aliased] == ["a", "a-00", "b", "b-01", "c"]
+    assert dict(aliased[0][1].fields) == {"crossref": "a-00"}
+    assert aliased[0][1].type == "techreport"
+    assert aliased[1][1] is first
+    assert dict(aliased[2][1].fields) == {"crossref": "b-01"}
+
+
+def test_writer_macros():
+    data = pybtex.database.BibliographyData()
+    for i in range(10):
+        data.entries[f"e{i}"] = pybtex.database.Entry(
+            "techreport",
+            {
+                "institution": "Internet Engineering Task Force",
+                "number": "00",
+                "month": "October",
+                "note": "only once" if i == 0 else "x",
+            },
+        )
+    writer = ietfbib2bibtex.compact.Writer()
+    assert writer.macros(data) == {"Internet Engineering Task Force": "internetengi"}
+    output = writer.to_string(data)
+    assert output.startswith(
+        '@string{internetengi = "Internet Engineering Task Force"}\n\n@techreport{e0,'
+    )
+    assert "    institution = internetengi,\n" in output
+    assert "    month = oct,\n" in output
+    assert '    number = "00",\n' in output
+    assert output.count("Internet Engineering Task Force") == 1
+    assert resolved(pybtex.database.parse_string(output, "bibtex")) == resolved(data)
+
+
+def test_writer_macro_name_clashes():
+    data = pybtex.database.BibliographyData()
+    for i in range(20):
+        data.entries[f"e{i}"] = pybtex.database.Entry(
+            "misc",
+            {
+                "a": "0 - Internet Standard",
+                "b": "Internet Standard (draft)",
+                "c": "Octopus Octopus Octopus",
+                "d": "Oct.",
+            },
+        )
+    macros = ietfbib2bibtex.compact.Writer().macros(data)
+    assert macros["0 - Internet Standard"] == "s0internetst"
+    assert macros["Internet Standard (draft)"] == "internetstan"
+    assert macros["Octopus Octopus Octopus"] == "octopusoctop"
+    assert len(set(macros.values())) == len(macros)
+    output = ietfbib2bibtex.compact.Writer().to_string(data)
+    assert resolved(pybtex.database.parse_string(output, "bibtex")) == resolved(data)
+
+
+def test_create_bibtex_compact(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    full = ids_bib(tmp_path, "full")
+    full.create_bibtex()
+    compact = ids_bib(tmp_path, "compact", compact=True)
+    compact.create_bibtex()
+    assert os.path.getsize(compact.bibtex_path) < os.path.getsize(full.bibtex_path)
+    compact_data = pybtex.database.parse_file(compact.bibtex_path)
+    full_data = pybtex.database.parse_file(full.bibtex_path)
+    assert resolved(compact_data) == resolved(full_data)
+    assert dict(compact_data.entries["draft-ietf-core-dns-over-coap"].fields) == {
+        "crossref": "draft-ietf-core-dns-over-coap-01"
+    }
+
+
+def test_create_bibtex_compact_pipelined(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    compact = ids_bib(tmp_path, "compact", compact=True)
+    compact.create_bibtex()
+    pipelined = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="pipelined",
+            bibxml_ids={
+                "remote": "foobar::test",
+                "local": os.path.join(MODULE_PATH, "test_ids"),
+                "pipeline_depth": 2,
+            },
+            compact=True,
+        ),
+        str(tmp_path),
+    )
+    pipelined.create_bibtex()
+    with open(compact.bibtex_path, "rb") as compact_file, open(
+        pipelined.bibtex_path, "rb"
+    ) as pipelined_file:
+        assert compact_file.read() == pipelined_file.read()
+
+
+def test_merge_bibtex_compact(tmp_path):
+    compact = ids_bib(tmp_path, "compact", compact=True)
+    partials = [str(tmp_path / f"ids.{index}.bib") for index in range(2)]
+    for index, partial in enumerate(partials):
+        compact.create_partial_bibtex(index, 2, partial)
+    compact.merge_bibtex(partials)
+    full = ids_bib(tmp_path, "full")
+    full.merge_bibtex(partials)
+    assert resolved(pybtex.database.parse_file(compact.bibtex_path)) == resolved(
+        pybtex.database.parse_file(full.bibtex_path)
+    )
+    with open(compact.bibtex_path, encoding="utf-8") as bib_file:
+        assert "crossref" in bib_file.read()
+
+
+def test_compact_not_incremental():
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test", incremental=True, compact=True)
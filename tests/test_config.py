@@ -9,6 +9,7 @@
 # pylint: disable=missing-function-docstring
 # pylint: disable=missing-module-docstring
 
+import datetime
 import logging
 
 import pytest
@@ -33,12 +34,140 @@ def test_rfc_index_source():
     assert source.remote == "http://example.org"
     source = ietfbib2bibtex.config.RFCIndexSource(remote="https://example.org")
     assert source.remote == "https://example.org"
+    assert source.processes is None
+    source = ietfbib2bibtex.config.RFCIndexSource(
+        remote="https://example.org", processes=4
+    )
+    assert source.processes == 4
+    source = ietfbib2bibtex.config.RFCIndexSource(remote="file:///srv/rfc-index.xml")
+    assert source.remote == "file:///srv/rfc-index.xml"
+    source = ietfbib2bibtex.config.RFCIndexSource(remote="/srv/rfc-index.xml")
+    assert source.remote == "/srv/rfc-index.xml"
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.RFCIndexSource(remote="https://example.org", processes=0)
+    assert not source.mirrors
+    assert source.remotes == ["/srv/rfc-index.xml"]
+    assert source.timeout == 5
+    assert source.retries == 0
+    source = ietfbib2bibtex.config.RFCIndexSource(
+        remote="https://example.org", mirrors=["https://mirror.example.org"]
+    )
+    assert source.remotes == ["https://example.org", "https://mirror.example.org"]
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.RFCIndexSource(
+            remote="https://example.org", mirrors=["foobar://example.org"]
+        )
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.RFCIndexSource(remote="https://example.org", timeout=0)
 
 
 def test_bibxml_ids_source():
     source = ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test", local="test")
     assert source.remote == "foobar::test"
     assert source.local == "test"
+    assert not source.checksum
+    assert not source.rsync_args
+    assert source.shards == 1
+    assert source.connections == 8
+    assert not source.delete
+    source = ietfbib2bibtex.config.BibXMLIDsSource(
+        remote="foobar::test",
+        local="test",
+        checksum=True,
+        rsync_args=["--delete"],
+        shards=4,
+    )
+    assert source.checksum
+    assert source.rsync_args == ["--delete"]
+    assert source.shards == 4
+    source = ietfbib2bibtex.config.BibXMLIDsSource(
+        remote="https://example.org/bibxml-ids/",
+        local="test",
+        connections=16,
+        delete=True,
+    )
+    assert source.connections == 16
+    assert source.delete
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.BibXMLIDsSource(
+            remote="foobar::test", local="test", shards=0
+        )
+    source = ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test")
+    assert source.local is None
+
+
+def test_sink():
+    sink = ietfbib2bibtex.config.Sink(sqlite="test.sqlite")
+    assert sink.sqlite == "test.sqlite"
+    assert sink.file is None
+    assert sink.http is None
+    assert sink.batch_size == 500
+    assert sink.flush_interval == 1
+    assert sink.timeout == 30
+    sink = ietfbib2bibtex.config.Sink(http="http://localhost:8080/", batch_size=10)
+    assert sink.http == "http://localhost:8080/"
+    assert sink.batch_size == 10
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Sink()
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Sink(file="test.jsonl", sqlite="test.sqlite")
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Sink(http="localhost:8080")
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Sink(file="test.jsonl", batch_size=0)
+
+
+def test_bib_fields():
+    assert ietfbib2bibtex.config.Bib(name="test").fields is None
+    bib = ietfbib2bibtex.config.Bib(name="test", fields=["title", "abstract"])
+    assert bib.fields == ["title", "abstract"]
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test", fields=[])
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test", fields=["title", "title"])
+
+
+def test_cache():
+    cache = ietfbib2bibtex.config.Cache()
+    assert cache.path == ietfbib2bibtex.config.DEFAULT_CACHE_DIR
+    assert cache.max_size is None
+    assert cache.ttl == datetime.timedelta(minutes=5)
+    cache = ietfbib2bibtex.config.Cache(path="test", max_size=1024, ttl=3600)
+    assert cache.path == "test"
+    assert cache.max_size == 1024
+    assert cache.ttl == datetime.timedelta(hours=1)
+
+
+def test_filter():
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Filter(key="RFC-(")
+    entry_filter = ietfbib2bibtex.config.Filter()
+    assert entry_filter.key is None
+    assert not entry_filter.prefixes
+    assert entry_filter.year_from is None
+    assert entry_filter.year_to is None
+    assert not entry_filter.status
+    bib = ietfbib2bibtex.config.Bib(
+        name="test",
+        rfc_index={"remote": "http://example.org"},
+        filter={"key": "RFC-9", "year_from": 2020, "status": ["INTERNET STANDARD"]},
+    )
+    assert bib.filter.key == "RFC-9"
+    assert bib.filter.year_from == 2020
+    assert bib.filter.status == ["INTERNET STANDARD"]
+
+
+def test_config_local_or_cache():
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Config(
+            bibs=[{"name": "test", "bibxml_ids": {"remote": "foobar::test"}}]
+        )
+    conf = ietfbib2bibtex.config.Config(
+        cache={"path": "test"},
+        bibs=[{"name": "test", "bibxml_ids": {"remote": "foobar::test"}}],
+    )
+    assert conf.cache.path == "test"
+    assert conf.bibs[0].bibxml_ids.local is None
 
 
 def test_bib():
@@ -67,6 +196,28 @@ def test_bib():
     assert bib.bibxml_ids.remote == "foobar::test"
     assert bib.bibxml_ids.local == "test"
     assert bib.rfc_index is None
+    assert bib.filter is None
+    assert bib.refresh_interval is None
+    assert bib.max_age is None
+    assert not bib.incremental
+    assert bib.compact_threshold == 0.25
+    assert bib.sort is None
+    assert bib.sort_memory == 64 * 1024 * 1024
+    assert not bib.sinks
+    bib = ietfbib2bibtex.config.Bib(
+        name="test3",
+        rfc_index=ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org"),
+        refresh_interval=3600,
+        max_age="P1D",
+        incremental=True,
+        compact_threshold=0.5,
+    )
+    assert bib.refresh_interval == datetime.timedelta(hours=1)
+    assert bib.max_age == datetime.timedelta(days=1)
+    assert bib.incremental
+    assert bib.compact_threshold == 0.5
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test4", compact_threshold=2)
 
 
 def test_config_default_does_not_exist(mocker, caplog):
@@ -74,6 +225,8 @@ def test_config_default_does_not_exist(mocker, caplog):
     with caplog.at_level(logging.WARNING):
         conf = ietfbib2bibtex.config.Config.from_file()
     assert conf.bibpath is None
+    assert conf.state_file == ietfbib2bibtex.config.DEFAULT_STATE_FILE
+    assert conf.cache is None
     assert len(conf.bibs) == 0
     assert len(caplog.text) > 0
 
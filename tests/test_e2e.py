@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-class-docstring
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+# End-to-end performance regression tests: ietfbib2bibtex is run against a local
+# HTTP server and a local rsync remote serving generated sources. Wall time and
+# peak memory of each scenario are compared against E2E_BASELINES. Set
+# IETFBIB2BIBTEX_E2E_RECORD=1 to record new baselines instead. As the baselines
+# depend on the machine, the tests are deselected by default; select them with
+# "-m e2e".
+
+import functools
+import http.server
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+
+import pybtex.database
+import pytest
+import yaml
+
+import ietfbib2bibtex.cli
+
+from .test_sync import ListingHandler
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+E2E_BASELINES = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "e2e_baselines.json"
+)
+RECORD = os.environ.get("IETFBIB2BIBTEX_E2E_RECORD", "0") == "1"
+TOLERANCE = float(os.environ.get("IETFBIB2BIBTEX_E2E_TOLERANCE", "2.0"))
+# absolute slack in seconds, so very short runs do not fail on jitter
+WALL_TIME_SLACK = 0.5
+RFC_COUNT = 500
+DRAFT_COUNT = 100
+DRAFT_REVISIONS = 3
+SCENARIOS = ("cold", "warm", "changed")
+
+pytestmark = pytest.mark.e2e
+
+
+def rfc_entry(number, title=None):
+    if title is None:
+        title = f"Generated Specification Number {number}"
+    return f"""  <rfc-entry>
+    <doc-id>RFC{number:04d}</doc-id>
+    <title>{title}</title>
+    <author><name>A. Author{number}</name></author>
+    <author><name>B. Coauthor</name></author>
+    <date><month>May</month><year>{1980 + number % 45}</year></date>
+    <current-status>PROPOSED STANDARD</current-status>
+    <doi>10.17487/RFC{number:04d}</doi>
+  </rfc-entry>
+"""
+
+
+def write_rfc_index(path, changed=None):
+    with open(path, "w", encoding="utf-8") as rfc_index:
+        rfc_index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rfc-index xmlns="https://www.rfc-editor.org/rfc-index">\n'
+        )
+        for number in range(1, RFC_COUNT + 1):
+            rfc_index.write(
+                rfc_entry(number, "Changed Title" if number == changed else None)
+            )
+        rfc_index.write("</rfc-index>\n")
+
+
+def write_bibxml(directory, draft, revision, title=None):
+    name = f"draft-test-generated-{draft}-{revision:02d}"
+    if title is None:
+        title = f"Generated Draft Number {draft}"
+    with open(
+        os.path.join(directory, f"reference.I-D.{name}.xml"), "w", encoding="utf-8"
+    ) as bibxml:
+        bibxml.write(f"""<?xml version="1.0" encoding="UTF-8"?>
+<reference anchor="I-D.test-generated-{draft}">
+   <front>
+      <title>{title}</title>
+      <author initials="A." surname="Author" fullname="Alice Author{draft}" />
+      <author initials="B." surname="Coauthor" fullname="Bob Coauthor" />
+      <date month="October" day="24" year="2022" />
+   </front>
+   <seriesInfo name="Internet-Draft" value="{name}" />
+</reference>
+""")
+
+
+@pytest.fixture(scope="module")
+def http_server(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("www")
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        functools.partial(ListingHandler, directory=str(directory)),
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", directory
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(scope="module")
+def baselines():
+    try:
+        with open(E2E_BASELINES, encoding="utf-8") as baselines_file:
+            values = json.load(baselines_file)
+    except FileNotFoundError:
+        values = {}
+    yield values
+    if RECORD:
+        with open(E2E_BASELINES, "w", encoding="utf-8") as baselines_file:
+            json.dump(values, baselines_file, indent=2, sort_keys=True)
+            baselines_file.write("\n")
+
+
+def run_main(mocker, config_file):
+    mocker.patch.object(sys, "argv", ["cmd", "-c", str(config_file), "run"])
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        ietfbib2bibtex.cli.main()
+        wall_time = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return wall_time, peak_memory
+
+
+def check_baseline(baselines, name, wall_time, peak_memory):
+    if RECORD:
+        baselines[name] = {"wall_time": wall_time, "peak_memory": peak_memory}
+        return
+    baseline = baselines.get(name)
+    if baseline is None:
+        pytest.fail(f"No baseline for {name}, record with IETFBIB2BIBTEX_E2E_RECORD=1")
+    assert wall_time <= baseline["wall_time"] * TOLERANCE + WALL_TIME_SLACK, (
+        f"{name}: wall time {wall_time:.3f}s exceeds baseline "
+        f"{baseline['wall_time']:.3f}s"
+    )
+    assert peak_memory <= baseline["peak_memory"] * TOLERANCE, (
+        f"{name}: peak memory {peak_memory}B exceeds baseline "
+        f"{baseline['peak_memory']}B"
+    )
+
+
+def run_scenarios(mocker, tmp_path, baselines, source, bib_config, change):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(
+        yaml.dump(
+            {
+                "bibpath": str(tmp_path),
+                "state_file": str(tmp_path / "state.json"),
+                "cache": {"path": str(tmp_path / "cache"), "ttl": 0},
+                "bibs": [{"name": source, **bib_config}],
+            }
+        )
+    )
+    results = {}
+    for scenario in SCENARIOS:
+        if scenario == "changed":
+            change()
+        wall_time, peak_memory = run_main(mocker, config_file)
+        results[scenario] = pybtex.database.parse_file(tmp_path / f"{source}.bib")
+        check_baseline(baselines, f"{source}-{scenario}", wall_time, peak_memory)
+    return results
+
+
+def test_e2e_rfc_index(mocker, tmp_path, http_server, baselines):
+    url, directory = http_server
+    rfc_index = os.path.join(directory, "rfc-index.xml")
+    write_rfc_index(rfc_index)
+
+    def change():
+        write_rfc_index(rfc_index, changed=42)
+        # Last-Modified has a resolution of seconds
+        mtime = time.time() + 10
+        os.utime(rfc_index, (mtime, mtime))
+
+    results = run_scenarios(
+        mocker,
+        tmp_path,
+        baselines,
+        "rfc_index",
+        {"rfc_index": {"remote": f"{url}/rfc-index.xml"}},
+        change,
+    )
+    for scenario in SCENARIOS:
+        assert len(results[scenario].entries) == RFC_COUNT
+    assert results["warm"].entries["RFC-42"].fields["title"] == (
+        "{Generated Specification Number 42}"
+    )
+    assert results["changed"].entries["RFC-42"].fields["title"] == "{Changed Title}"
+
+
+# both transports share the baselines of the bibxml_ids scenarios
+@pytest.mark.parametrize(
+    "transport",
+    [
+        "http",
+        pytest.param(
+            "rsync",
+            marks=pytest.mark.skipif(
+                shutil.which("rsync") is None, reason="rsync not installed"
+            ),
+        ),
+    ],
+)
+def test_e2e_bibxml_ids(mocker, tmp_path, http_server, baselines, transport):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    url, directory = http_server
+    if transport == "http":
+        remote = directory / "bibxml-ids"
+        bibxml_ids = {"remote": f"{url}/bibxml-ids/"}
+    else:
+        remote = tmp_path / "bibxml-ids"
+        bibxml_ids = {"remote": os.path.join(remote, ""), "checksum": True}
+    remote.mkdir()
+    for draft in range(DRAFT_COUNT):
+        for revision in range(DRAFT_REVISIONS):
+            write_bibxml(remote, draft, revision)
+
+    def change():
+        # the size changes, as HTTP listings have a resolution of minutes
+        write_bibxml(remote, 42, DRAFT_REVISIONS - 1, title="Changed Title")
+
+    results = run_scenarios(
+        mocker, tmp_path, baselines, "bibxml_ids", {"bibxml_ids": bibxml_ids}, change
+    )
+    for scenario in SCENARIOS:
+        # each revision and an unversioned alias per draft
+        assert len(results[scenario].entries) == DRAFT_COUNT * (DRAFT_REVISIONS + 1)
+    key = "draft-test-generated-42"
+    assert results["warm"].entries[key].fields["title"] == (
+        "{Generated Draft Number 42}"
+    )
+    assert results["changed"].entries[key].fields["title"] == "{Changed Title}"
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import pickle
+
+import pytest
+
+import ietfbib2bibtex.config
+import ietfbib2bibtex.filters
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+@pytest.mark.parametrize(
+    "filter_config, doc_id, key, exp_match",
+    [
+        pytest.param({}, "RFC0781", "RFC-781", True, id="no filter"),
+        pytest.param({"key": "RFC-7"}, "RFC0781", "RFC-781", True, id="key"),
+        pytest.param({"key": "RFC07"}, "RFC0781", "RFC-781", False, id="not key"),
+        pytest.param({"key": "RFC07"}, "RFC0781", None, True, id="doc-id as key"),
+        pytest.param(
+            {"prefixes": ["RFC9", "RFC07"]}, "RFC0781", None, True, id="prefix"
+        ),
+        pytest.param({"prefixes": ["RFC9"]}, "RFC0781", None, False, id="not prefix"),
+    ],
+)
+def test_entry_filter_match_name(filter_config, doc_id, key, exp_match):
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(**filter_config)
+    )
+    assert entry_filter.match_name(doc_id, key) == exp_match
+
+
+@pytest.mark.parametrize(
+    "filter_config, year, status, exp_match",
+    [
+        pytest.param({}, None, None, True, id="no filter"),
+        pytest.param({"year_to": 2000}, "1981", None, True, id="year to"),
+        pytest.param({"year_to": 2000}, "2022", None, False, id="not year to"),
+        pytest.param({"year_from": 2000}, "foo", None, False, id="invalid year"),
+        pytest.param({"year_from": 2000}, None, None, False, id="no year"),
+        pytest.param({"status": ["UNKNOWN"]}, "1981", "unknown", True, id="status"),
+        pytest.param(
+            {"status": ["UNKNOWN"]}, "1981", "HISTORIC", False, id="not status"
+        ),
+        pytest.param({"status": ["UNKNOWN"]}, "1981", None, True, id="no status"),
+    ],
+)
+def test_entry_filter_match_fields(filter_config, year, status, exp_match):
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(**filter_config)
+    )
+    assert entry_filter.match_fields(year, status) == exp_match
+
+
+def test_entry_filter_name():
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(key="RFC-9")
+    )
+    assert ietfbib2bibtex.filters.filter_name(None) == ""
+    assert ietfbib2bibtex.filters.filter_name(entry_filter) == entry_filter.name
+    assert (
+        entry_filter.name
+        != ietfbib2bibtex.filters.EntryFilter(
+            ietfbib2bibtex.config.Filter(key="RFC-8")
+        ).name
+    )
+    # filters are handed to worker processes
+    unpickled = pickle.loads(pickle.dumps(entry_filter))
+    assert unpickled.name == entry_filter.name
+    assert unpickled.match_name("RFC9325", "RFC-9325")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-class-docstring
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+import requests
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.config
+import ietfbib2bibtex.mirrors
+import ietfbib2bibtex.sources
+import ietfbib2bibtex.state
+
+from .test_sources import RFC_INDEX_XML, assert_rfc_index_entries
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    delay = 0
+    get_status = 200
+    head_status = 200
+    requests = None
+
+    def _respond(self, status, content):
+        self.requests.append(self.command)
+        time.sleep(self.delay)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", f'"{self.server.server_port}"')
+        self.end_headers()
+        return content
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        self._respond(self.head_status, RFC_INDEX_XML)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        content = RFC_INDEX_XML if self.get_status == 200 else b""
+        self.wfile.write(self._respond(self.get_status, content))
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(delay=0, get_status=200, head_status=200):
+        handler = type(
+            "Handler",
+            (StandInHandler,),
+            {
+                "delay": delay,
+                "get_status": get_status,
+                "head_status": head_status,
+                "requests": [],
+            },
+        )
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/rfc-index.xml", handler.requests
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def rfc_index_source(remotes, last_mirrors=None, **kwargs):
+    return ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(
+            remote=remotes[0], mirrors=remotes[1:], timeout=1, **kwargs
+        ),
+        last_mirrors=last_mirrors,
+    )
+
+
+def test_probe(stand_in, tmp_path):
+    fast, _ = stand_in()
+    slow, _ = stand_in(delay=0.2)
+    failing, _ = stand_in(head_status=503)
+    assert ietfbib2bibtex.mirrors.probe(fast) < ietfbib2bibtex.mirrors.probe(slow)
+    assert ietfbib2bibtex.mirrors.probe(slow) >= 0.2
+    assert ietfbib2bibtex.mirrors.probe(failing) is None
+    assert ietfbib2bibtex.mirrors.probe(slow, timeout=0.05) is None
+    rfc_index = tmp_path / "rfc-index.xml"
+    assert ietfbib2bibtex.mirrors.probe(str(rfc_index)) is None
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    assert ietfbib2bibtex.mirrors.probe(str(rfc_index)) is not None
+    assert ietfbib2bibtex.mirrors.probe(rfc_index.as_uri()) is not None
+
+
+def test_rank(stand_in):
+    slow, _ = stand_in(delay=0.2)
+    unreachable, _ = stand_in(head_status=405)
+    fast, _ = stand_in()
+    mirrors = ietfbib2bibtex.mirrors.Mirrors([unreachable, slow, fast, slow])
+    assert mirrors.remotes == [unreachable, slow, fast]
+    assert mirrors.rank() == [fast, slow, unreachable]
+    assert mirrors.rank([slow]) == [slow]
+
+
+def test_rfcindexsource_fastest_mirror(stand_in):
+    slow, slow_requests = stand_in(delay=0.2)
+    fast, fast_requests = stand_in()
+    last_mirrors = {}
+    source = rfc_index_source([slow, fast], last_mirrors)
+    assert source.remote == slow
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    assert source.remote == fast
+    assert slow_requests == ["HEAD"]
+    assert fast_requests == ["HEAD", "GET"]
+    assert last_mirrors[slow]["remote"] == fast
+    # the last good mirror is used on later runs without probing
+    source = rfc_index_source([slow, fast], last_mirrors)
+    assert source.remote == fast
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    assert slow_requests == ["HEAD"]
+    assert fast_requests == ["HEAD", "GET", "GET"]
+
+
+def test_rfcindexsource_mirror_failover(stand_in, caplog):
+    slow, slow_requests = stand_in(delay=0.2)
+    broken, broken_requests = stand_in(get_status=500)
+    last_mirrors = {}
+    source = rfc_index_source([broken, slow], last_mirrors)
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    assert source.remote == slow
+    assert broken_requests == ["HEAD", "GET"]
+    assert slow_requests == ["HEAD", "GET"]
+    assert last_mirrors[broken]["remote"] == slow
+    assert f"Unable to fetch {broken}" in caplog.text
+
+
+def test_rfcindexsource_last_good_mirror_fails(stand_in):
+    slow, slow_requests = stand_in(delay=0.1)
+    broken, broken_requests = stand_in(get_status=500)
+    fast, fast_requests = stand_in()
+    last_mirrors = {slow: {"remote": broken, "since": time.time()}}
+    source = rfc_index_source([slow, broken, fast], last_mirrors)
+    assert source.remote == broken
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    # only the other mirrors are probed after the last good mirror failed
+    assert broken_requests == ["GET"]
+    assert slow_requests == ["HEAD"]
+    assert fast_requests == ["HEAD", "GET"]
+    assert last_mirrors[slow]["remote"] == fast
+
+
+def test_rfcindexsource_last_good_mirror_reprobed(stand_in):
+    slow, slow_requests = stand_in(delay=0.1)
+    fast, fast_requests = stand_in()
+    since = time.time() - ietfbib2bibtex.mirrors.REPROBE_INTERVAL.total_seconds() - 1
+    last_mirrors = {fast: {"remote": slow, "since": since}}
+    source = rfc_index_source([fast, slow], last_mirrors)
+    assert source.remote == fast
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    assert slow_requests == ["HEAD"]
+    assert fast_requests == ["HEAD", "GET"]
+    assert last_mirrors[fast]["remote"] == fast
+    assert last_mirrors[fast]["since"] > since
+
+
+def test_rfcindexsource_mirrors_retries(mocker, stand_in):
+    sleep = mocker.patch("time.sleep")
+    first, first_requests = stand_in(get_status=502)
+    second, second_requests = stand_in(get_status=503)
+    last_mirrors = {}
+    source = rfc_index_source([first, second], last_mirrors, retries=2, backoff=0.5)
+    with pytest.raises(requests.HTTPError):
+        list(source.iterate_entries())
+    assert first_requests.count("GET") == 3
+    assert second_requests.count("GET") == 3
+    assert [call.args[0] for call in sleep.call_args_list if call.args[0]] == [0.5, 1]
+    assert not last_mirrors
+
+
+def test_mirrors_afetch():
+    mirrors = ietfbib2bibtex.mirrors.Mirrors(["/nonexistent/a", "/nonexistent/b"])
+    fetched = []
+
+    async def fetch_from(remote):
+        fetched.append(remote)
+        if remote.endswith("a"):
+            raise OSError("failed")
+        return remote
+
+    assert asyncio.run(mirrors.afetch(fetch_from)) == "/nonexistent/b"
+    assert fetched == ["/nonexistent/a", "/nonexistent/b"]
+    assert mirrors.last_good == "/nonexistent/b"
+    fetched.clear()
+    with pytest.raises(OSError):
+        asyncio.run(
+            ietfbib2bibtex.mirrors.Mirrors(["/nonexistent/a"]).afetch(fetch_from)
+        )
+
+
+def test_create_all_bibtexs_records_last_good_mirror(stand_in, tmp_path):
+    broken, _ = stand_in(get_status=500)
+    fast, _ = stand_in()
+    the_config = ietfbib2bibtex.config.Config(
+        bibpath=str(tmp_path),
+        state_file=str(tmp_path / "state.json"),
+        bibs=[{"name": "rfcs", "rfc_index": {"remote": broken, "mirrors": [fast]}}],
+    )
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(the_config)
+    assert (tmp_path / "rfcs.bib").exists()
+    the_state = ietfbib2bibtex.state.State(the_config.state_file)
+    assert the_state["mirrors"][broken]["remote"] == fast
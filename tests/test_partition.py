@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+import os
+import subprocess
+
+import pybtex.database
+import pytest
+import yaml
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.config
+import ietfbib2bibtex.partition
+import ietfbib2bibtex.sources
+import ietfbib2bibtex.state
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+FAMILIES = [
+    f"draft-{name}-{i}"
+    for name in ("foo", "foo-bar", "foo0", "ietf-core-test")
+    for i in range(5)
+]
+
+
+def write_bibxml(directory, family, revision):
+    name = f"{family}-{revision:02d}"
+    with open(
+        os.path.join(directory, f"reference.I-D.{name}.xml"), "w", encoding="utf-8"
+    ) as bibxml:
+        bibxml.write(f"""<?xml version="1.0" encoding="UTF-8"?>
+<reference anchor="I-D.{family}">
+   <front>
+      <title>Title of {name}</title>
+      <author initials="A." surname="Author" fullname="Alice Author" />
+      <date month="October" day="24" year="2022" />
+   </front>
+   <seriesInfo name="Internet-Draft" value="{name}" />
+</reference>
+""")
+
+
+@pytest.fixture
+def ids_config(tmp_path):
+    local = tmp_path / "bibxml-ids"
+    local.mkdir()
+    for i, family in enumerate(FAMILIES):
+        for revision in range(i % 3 + 1):
+            write_bibxml(local, family, revision)
+    the_config = ietfbib2bibtex.config.Config(
+        bibpath=str(tmp_path),
+        state_file=str(tmp_path / "state.json"),
+        bibs=[
+            {
+                "name": "ids",
+                "bibxml_ids": {"remote": "foobar::test", "local": str(local)},
+            }
+        ],
+    )
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(yaml.dump(the_config.model_dump(exclude_none=True)))
+    yield the_config, str(config_file)
+
+
+def full_build(the_config, tmp_path):
+    bib = ietfbib2bibtex.bib.Bib.by_name(the_config, "ids")
+    data = pybtex.database.BibliographyData()
+    for key, entry in bib.source.iterate_local():
+        data.entries[key] = entry
+    output = tmp_path / "full.bib"
+    data.to_file(str(output), "bibtex")
+    return output.read_bytes()
+
+
+def test_sort_key_partition_order():
+    keys = ["draft-foo-00", "draft-foo-01", "draft-foo", "draft-foo-bar-00"]
+    assert sorted(reversed(keys), key=ietfbib2bibtex.partition.sort_key) == keys
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7])
+def test_partial_bibtexs_merge(tmp_path, ids_config, count):
+    the_config, _ = ids_config
+    bib = ietfbib2bibtex.bib.Bib.by_name(the_config, "ids")
+    partials = [str(tmp_path / f"ids.{index}.bib") for index in range(count)]
+    for index, partial in enumerate(partials):
+        bib.create_partial_bibtex(index, count, partial)
+    keys = [
+        key
+        for partial in partials
+        for key, _ in ietfbib2bibtex.partition.iterate_chunks(partial)
+    ]
+    # each entry is in exactly one partition
+    assert len(keys) == len(set(keys))
+    bib.merge_bibtex(partials)
+    with open(bib.bibtex_path, "rb") as bib_file:
+        assert bib_file.read() == full_build(the_config, tmp_path)
+
+
+def test_create_all_bibtexs_partitioned(mocker, monkeypatch, tmp_path, ids_config):
+    the_config, config_file = ids_config
+    monkeypatch.setenv("PYTHONPATH", REPO_PATH)
+    sync = mocker.patch.object(ietfbib2bibtex.sources.BibXMLIDsSource, "sync")
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(
+        the_config, partitions=3, config_file=config_file
+    )
+    sync.assert_called_once_with()
+    with open(tmp_path / "ids.bib", "rb") as bib_file:
+        assert bib_file.read() == full_build(the_config, tmp_path)
+    # temporary partial files are removed
+    assert not list(tmp_path.glob("tmp*"))
+
+
+def test_create_all_bibtexs_partitioned_quarantine(
+    mocker, monkeypatch, tmp_path, ids_config
+):
+    the_config, config_file = ids_config
+    bad = tmp_path / "bibxml-ids" / "reference.I-D.draft-bad-00.xml"
+    bad.write_text("<reference")
+    # the workers use the state file of the parent, not the one of config_file
+    the_config.state_file = str(tmp_path / "parent.json")
+    monkeypatch.setenv("PYTHONPATH", REPO_PATH)
+    mocker.patch.object(ietfbib2bibtex.sources.BibXMLIDsSource, "sync")
+    reload = mocker.spy(ietfbib2bibtex.state.State, "reload")
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(
+        the_config, partitions=3, config_file=config_file
+    )
+    reload.assert_called_once()
+    assert list(ietfbib2bibtex.state.State(the_config.state_file)["quarantine"]) == [
+        str(bad)
+    ]
+    assert not (tmp_path / "state.json").exists()
+    with open(tmp_path / "ids.bib", "rb") as bib_file:
+        assert b"draft-bad" not in bib_file.read()
+
+
+def test_run_workers_failure(monkeypatch, tmp_path, ids_config):
+    _, config_file = ids_config
+    monkeypatch.setenv("PYTHONPATH", REPO_PATH)
+    with pytest.raises(subprocess.CalledProcessError):
+        ietfbib2bibtex.partition.run_workers("unknown", 2, str(tmp_path), config_file)
+
+
+def test_run_workers_invalid_count(mocker, tmp_path):
+    popen = mocker.patch("subprocess.Popen")
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.partition.run_workers("ids", 0, str(tmp_path))
+    popen.assert_not_called()
+
+
+def test_merge_no_partials(tmp_path):
+    output = tmp_path / "ids.bib"
+    output.write_text("@misc{foo,\n}\n")
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.partition.merge([], str(output))
+    # the existing bibtex file is kept
+    assert output.read_text() == "@misc{foo,\n}\n"
+
+
+@pytest.mark.parametrize("index", [-1, 2])
+def test_create_partial_bibtex_invalid_index(tmp_path, ids_config, index):
+    the_config, _ = ids_config
+    bib = ietfbib2bibtex.bib.Bib.by_name(the_config, "ids")
+    output = tmp_path / "ids.0.bib"
+    with pytest.raises(ValueError):
+        bib.create_partial_bibtex(index, 2, str(output))
+    assert not output.exists()
+
+
+def test_worker_command():
+    command = ietfbib2bibtex.partition.worker_command("ids", 1, 4, "ids.1.bib")
+    assert command[1:] == [
+        "-m",
+        "ietfbib2bibtex",
+        "partition",
+        "-b",
+        "ids",
+        "--index",
+        "1",
+        "--count",
+        "4",
+        "-o",
+        "ids.1.bib",
+    ]
+
+
+def test_worker_command_state_cache():
+    command = ietfbib2bibtex.partition.worker_command(
+        "ids",
+        1,
+        4,
+        "ids.1.bib",
+        config_file="config.yaml",
+        state_file="state.json",
+        cache_path="cache",
+    )
+    assert command[1:] == [
+        "-m",
+        "ietfbib2bibtex",
+        "-c",
+        "config.yaml",
+        "partition",
+        "-b",
+        "ids",
+        "--index",
+        "1",
+        "--count",
+        "4",
+        "-o",
+        "ids.1.bib",
+        "--state-file",
+        "state.json",
+        "--cache",
+        "cache",
+    ]
+
+
+def test_bib_by_name_unknown(ids_config):
+    the_config, _ = ids_config
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.bib.Bib.by_name(the_config, "unknown")
+
+
+def test_create_partial_bibtex_not_partitionable(tmp_path):
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="rfcs", rfc_index={"remote": "http://example.org"}
+        ),
+        str(tmp_path),
+    )
+    with pytest.raises(ValueError):
+        bib.create_partial_bibtex(0, 2, str(tmp_path / "rfcs.0.bib"))
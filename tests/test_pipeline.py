@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import logging
+import threading
+import time
+
+import pytest
+
+import ietfbib2bibtex.pipeline
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def slow_square(item):
+    time.sleep(0.001)
+    return item * item
+
+
+@pytest.mark.parametrize("depth", [1, 4, 64])
+def test_pipeline_run(caplog, depth):
+    pipeline = ietfbib2bibtex.pipeline.Pipeline(
+        [("add", lambda i: i + 1), ("square", slow_square), ("str", str)], depth
+    )
+    assert list(pipeline.run(range(100))) == [str((i + 1) ** 2) for i in range(100)]
+    assert [stats.name for stats in pipeline.stats] == ["add", "square", "str"]
+    for stats in pipeline.stats:
+        assert stats.items == 100
+        assert stats.max_depth <= depth
+        assert 0 <= stats.mean_depth <= stats.max_depth
+        assert 0 < stats.utilisation(pipeline.wall_time) <= 1
+    # the slowest stage sets the throughput
+    square = pipeline.stats[1]
+    assert square.busy_time >= 0.1
+    assert square.busy_time == max(stats.busy_time for stats in pipeline.stats)
+    with caplog.at_level(logging.INFO):
+        pipeline.log("test")
+    assert "Pipeline of test" in caplog.text
+    assert "square" in caplog.text
+    assert "mean depth" in caplog.text
+
+
+def test_pipeline_empty():
+    pipeline = ietfbib2bibtex.pipeline.Pipeline([("str", str)])
+    assert not list(pipeline.run([]))
+    assert pipeline.stats[0].items == 0
+    assert pipeline.stats[0].mean_depth == 0
+    assert pipeline.stats[0].utilisation(0) == 0
+    assert "str" in pipeline.report()
+
+
+def test_pipeline_stage_error():
+    def fail(item):
+        if item == 42:
+            raise ValueError("42")
+        return item
+
+    pipeline = ietfbib2bibtex.pipeline.Pipeline([("fail", fail), ("str", str)], 2)
+    results = []
+    with pytest.raises(ValueError):
+        for result in pipeline.run(range(100)):
+            results.append(result)
+    assert results == [str(i) for i in range(42)]
+
+
+def test_pipeline_items_error():
+    def items():
+        yield 1
+        raise KeyError("foobar")
+
+    pipeline = ietfbib2bibtex.pipeline.Pipeline([("str", str)])
+    with pytest.raises(KeyError):
+        list(pipeline.run(items()))
+
+
+def test_pipeline_close_early():
+    threads = threading.active_count()
+    pipeline = ietfbib2bibtex.pipeline.Pipeline([("str", str), ("int", int)], 1)
+    results = pipeline.run(range(1000))
+    assert next(results) == 0
+    results.close()
+    # all threads of the pipeline are stopped
+    assert threading.active_count() == threads
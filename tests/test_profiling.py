@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import io
+import os
+import pstats
+
+import pytest
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.config
+import ietfbib2bibtex.profiling
+import ietfbib2bibtex.sources
+
+from .test_sources import MODULE_PATH, RFC_INDEX_XML
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def test_report_files():
+    stream = io.StringIO()
+    ietfbib2bibtex.profiling.report_files(
+        [
+            ietfbib2bibtex.sources.FileStats("small-slow.xml", 10, 3.0),
+            ietfbib2bibtex.sources.FileStats("large-fast.xml", 3000, 0.001),
+            ietfbib2bibtex.sources.FileStats("medium.xml", 500, 0.5),
+        ],
+        top=2,
+        stream=stream,
+    )
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "2 slowest files:"
+    assert lines[1].endswith("small-slow.xml")
+    assert lines[2].endswith("medium.xml")
+    assert lines[3] == "2 largest files:"
+    assert lines[4].endswith("large-fast.xml")
+    assert lines[5].endswith("medium.xml")
+    assert len(lines) == 6
+
+
+def test_profile_none():
+    with ietfbib2bibtex.profiling.profile(None, []):
+        pass
+
+
+def test_profile_unknown_mode():
+    with pytest.raises(ValueError):
+        with ietfbib2bibtex.profiling.profile("foobar", []):
+            pass  # pragma: no cover
+
+
+def test_profile_cpu(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    config = ietfbib2bibtex.config.Config(
+        bibpath=str(tmp_path),
+        state_file=str(tmp_path / "state.json"),
+        bibs=[
+            {
+                "name": name,
+                "bibxml_ids": {
+                    "remote": "foobar::test",
+                    "local": os.path.join(MODULE_PATH, "test_ids"),
+                },
+            }
+            for name in ("test", "test2")
+        ],
+    )
+    stream = mocker.patch("sys.stderr", new_callable=io.StringIO)
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(config, profile="cpu", profile_top=3)
+    report = stream.getvalue()
+    assert "Profile of test, test2:" in report
+    for name in ("test", "test2"):
+        path = tmp_path / f"{name}.pstats"
+        assert f"CPU profile written to {path}" in report
+        stats = pstats.Stats(str(path))
+        assert any(
+            func[2] == "bibxml_to_bibtex"
+            for func in stats.stats  # pylint: disable=no-member
+        )
+    assert "3 slowest files:" in report
+    assert "3 largest files:" in report
+    assert "draft-ietf-core-dns-over-coap-00.xml" in report
+
+
+def test_profile_memory(mocker):
+    mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(content=RFC_INDEX_XML, headers={}),
+    )
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="test", rfc_index={"remote": "http://example.org"}
+        )
+    )
+    mocker.patch.object(bib, "store")
+    stream = io.StringIO()
+    with ietfbib2bibtex.profiling.profile("memory", [bib], top=2, stream=stream):
+        bib.create_bibtex()
+    report = stream.getvalue()
+    assert "Peak traced memory:" in report
+    assert "2 top allocation sites:" in report
+    assert "slowest files" not in report
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import os
+import shutil
+
+import lxml.etree
+import pybtex.database
+import pytest
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.cache
+import ietfbib2bibtex.config
+import ietfbib2bibtex.filters
+import ietfbib2bibtex.projection
+import ietfbib2bibtex.sources
+
+from .test_compact import ids_bib
+from .test_sources import MODULE_PATH, RFC_INDEX_XML
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def test_plan_unsupported():
+    with pytest.raises(ValueError, match="foo, bar"):
+        ietfbib2bibtex.projection.Plan(
+            {"title": ietfbib2bibtex.projection.Extractor("title", str)},
+            ["foo", "title", "bar"],
+        )
+
+
+def test_plan_extract():
+    calls = []
+
+    def text(element):
+        calls.append(element.tag)
+        return element.text
+
+    plan = ietfbib2bibtex.projection.Plan(
+        {
+            "title": ietfbib2bibtex.projection.Extractor("title", text),
+            "note": ietfbib2bibtex.projection.Extractor("note", text),
+            "kw": ietfbib2bibtex.projection.Extractor("kw", text, join=", ".join),
+        },
+        ["kw", "title"],
+    )
+    element = lxml.etree.fromstring(
+        "<ref><title>A</title><note>N</note><title>B</title></ref>"
+    )
+    assert plan.extract(element) == {"kw": "", "title": "A"}
+    # the note is never looked into, and only the first title
+    assert calls == ["title"]
+    assert plan.extract(element, children=element[1:]) == {"kw": "", "title": "B"}
+
+
+def rfc_entries(**kwargs):
+    ((start, end),) = ietfbib2bibtex.sources.rfc_index_chunks(RFC_INDEX_XML, 1)
+    return dict(
+        ietfbib2bibtex.sources.parse_rfc_index_chunk(RFC_INDEX_XML[start:end], **kwargs)
+    )
+
+
+def test_rfc_index_default_fields():
+    default = rfc_entries()
+    projected = rfc_entries(fields=ietfbib2bibtex.sources.RFC_INDEX_DEFAULT_FIELDS)
+    assert list(projected) == list(default) == ["RFC-781", "RFC-9325"]
+    for key, entry in default.items():
+        # the authors are persons, not fields
+        assert tuple(entry.fields) + ("author",) == (
+            ietfbib2bibtex.sources.RFC_INDEX_DEFAULT_FIELDS
+        )
+        assert entry == projected[key]
+
+
+def test_rfc_index_fields():
+    entries = rfc_entries(
+        fields=["title", "obsoletes", "updates", "stream", "status", "author"]
+    )
+    assert dict(entries["RFC-9325"].fields) == {
+        "title": "{Recommendations for Secure Use of TLS and DTLS}",
+        "obsoletes": "RFC-7525",
+        "updates": "RFC-5288, RFC-6066",
+        "stream": "IETF",
+        "status": "BEST CURRENT PRACTICE",
+    }
+    assert [str(p) for p in entries["RFC-9325"].persons["author"]] == [
+        "Sheffer, Y.",
+        "Saint-Andre, P.",
+        "Fossati, T.",
+    ]
+    entries = rfc_entries(fields=["title"])
+    assert dict(entries["RFC-781"].fields) == {
+        "title": "{Specification of the Internet Protocol (IP) timestamp option}"
+    }
+    assert not entries["RFC-781"].persons
+
+
+def test_rfc_index_fields_filtered():
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(status=["BEST CURRENT PRACTICE"])
+    )
+    entries = rfc_entries(entry_filter=entry_filter, fields=["title"])
+    assert list(entries) == ["RFC-9325"]
+    assert list(entries["RFC-9325"].fields) == ["title"]
+
+
+@pytest.mark.parametrize("cached", [False, True])
+@pytest.mark.parametrize("pipeline_depth", [None, 2])
+def test_bibxml_fields(mocker, tmp_path, cached, pipeline_depth):
+    default = dict(ids_bib(tmp_path).source.iterate_local(fields=["title", "year"]))
+    if cached:
+        source = ietfbib2bibtex.sources.BibXMLIDsSource(
+            ietfbib2bibtex.config.BibXMLIDsSource(
+                remote="foobar::test", pipeline_depth=pipeline_depth
+            ),
+            cache=ietfbib2bibtex.cache.Cache(str(tmp_path)),
+        )
+        shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), source.local)
+    else:
+        source = ids_bib(tmp_path).source
+        source.pipeline_depth = pipeline_depth
+    bibxml_to_bibtex = mocker.spy(ietfbib2bibtex.sources, "bibxml_to_bibtex")
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(year_from=2022)
+    )
+    calls = []
+    for _ in range(2):
+        projected = dict(
+            source.iterate_local(entry_filter, fields=["title", "abstract"])
+        )
+        assert projected
+        for key, entry in projected.items():
+            assert int(default[key].fields["year"]) >= 2022
+            assert list(entry.fields) == ["title", "abstract"]
+            assert entry.fields["title"] == default[key].fields["title"]
+            assert not entry.persons
+        calls.append(bibxml_to_bibtex.call_count)
+    abstract = projected["draft-ietf-core-dns-over-coap-00"].fields["abstract"]
+    assert abstract.startswith("This document defines a protocol for sending DNS")
+    assert "  " not in abstract
+    if cached:
+        # the year for the filter is cached with the projected fields, so only
+        # the malformed file is parsed again
+        assert calls[1] - calls[0] == 1
+
+
+def test_bib_fields(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    bib = ids_bib(tmp_path, fields=["title", "year"])
+    bib.create_bibtex()
+    data = pybtex.database.parse_file(bib.bibtex_path)
+    assert data.entries
+    for entry in data.entries.values():
+        assert set(entry.fields) == {"title", "year"}
+        assert not entry.persons
+    _, entry = bib.lookup("draft-yangcan-cloud-intelligence-web-platform")
+    assert set(entry.fields) == {"title", "year"}
+    with pytest.raises(ValueError, match="doi"):
+        ids_bib(tmp_path, fields=["title", "doi"])
+
+
+def test_create_shared_bibtexs_fields(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    full = ids_bib(tmp_path, "full")
+    titles = ietfbib2bibtex.bib.Bib(
+        full.config.model_copy(update={"name": "titles", "fields": ["title"]}),
+        str(tmp_path),
+        source=full.source,
+    )
+    iterate_local = mocker.spy(full.source, "iterate_local")
+    ietfbib2bibtex.bib.Bib.create_shared_bibtexs([full, titles])
+    assert iterate_local.call_count == 2
+    full_data = pybtex.database.parse_file(full.bibtex_path)
+    titles_data = pybtex.database.parse_file(titles.bibtex_path)
+    # without authors, a draft with a malformed author name is not skipped
+    assert set(full_data.entries) < set(titles_data.entries)
+    for key, entry in full_data.entries.items():
+        assert dict(titles_data.entries[key].fields) == {"title": entry.fields["title"]}
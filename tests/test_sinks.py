@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-class-docstring
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import http.server
+import json
+import sqlite3
+import shutil
+import threading
+import time
+
+import pybtex.database
+import pytest
+import requests
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.config
+import ietfbib2bibtex.partition
+import ietfbib2bibtex.sinks
+import ietfbib2bibtex.sources
+
+from .test_compact import ids_bib
+from .test_sorting import rfc_entries
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+class RecordingSink(ietfbib2bibtex.sinks.Sink):
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.fail_after = fail_after
+        self.closed = False
+        self.aborted = False
+
+    def write(self, batch):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise OSError("sink failed")
+        self.batches.append([key for key, _ in batch])
+
+    def close(self):
+        self.closed = True
+
+    def abort(self):
+        self.aborted = True
+
+
+class EndpointHandler(http.server.BaseHTTPRequestHandler):
+    status = 200
+    bodies = None
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        length = int(self.headers["Content-Length"])
+        self.bodies.append(json.loads(self.rfile.read(length)))
+        self.send_response(self.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    servers = []
+
+    def start(status=200):
+        handler = type("Handler", (EndpointHandler,), {"status": status, "bodies": []})
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/entries", handler.bodies
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_file_sink(tmp_path):
+    path = tmp_path / "entries.jsonl"
+    sink = ietfbib2bibtex.sinks.FileSink(str(path))
+    entries = rfc_entries([1, 2, 3])
+    sink.write(entries[:2])
+    sink.write(entries[2:])
+    assert not path.exists()
+    sink.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        ietfbib2bibtex.sinks.entry_to_dict(key, entry) for key, entry in entries
+    ]
+    sink = ietfbib2bibtex.sinks.FileSink(str(path))
+    sink.write(entries[:1])
+    sink.abort()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+    assert [p.name for p in tmp_path.iterdir()] == ["entries.jsonl"]
+
+
+def test_sqlite_sink(tmp_path):
+    path = str(tmp_path / "entries.sqlite")
+    sink = ietfbib2bibtex.sinks.SQLiteSink(path)
+    sink.write(rfc_entries([1, 2]))
+    sink.write([("RFC-2", pybtex.database.Entry("misc", {"title": "{Replaced}"}))])
+    sink.close()
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            "SELECT key, type, fields, persons FROM entries ORDER BY key"
+        ).fetchall()
+    assert [(key, entry_type) for key, entry_type, _, _ in rows] == [
+        ("RFC-1", "techreport"),
+        ("RFC-2", "misc"),
+    ]
+    assert json.loads(rows[1][2]) == {"title": "{Replaced}"}
+    assert json.loads(rows[1][3]) == {}
+
+
+def test_http_sink(endpoint):
+    url, bodies = endpoint()
+    sink = ietfbib2bibtex.sinks.HTTPSink(url)
+    entries = rfc_entries([1, 2, 3])
+    sink.write(entries[:2])
+    sink.write(entries[2:])
+    sink.close()
+    assert [[entry["key"] for entry in body] for body in bodies] == [
+        ["RFC-1", "RFC-2"],
+        ["RFC-3"],
+    ]
+    url, _ = endpoint(status=500)
+    with pytest.raises(requests.HTTPError):
+        ietfbib2bibtex.sinks.HTTPSink(url).write(entries)
+
+
+def test_sinks_batch_size():
+    first = RecordingSink()
+    second = RecordingSink()
+    with ietfbib2bibtex.sinks.Sinks([(first, 3, 60), (second, 5, 60)]) as the_sinks:
+        entries = rfc_entries(range(7))
+        assert list(the_sinks.tee(entries)) == entries
+    assert [len(batch) for batch in first.batches] == [3, 3, 1]
+    assert [len(batch) for batch in second.batches] == [5, 2]
+    assert first.batches[0] == ["RFC-0", "RFC-1", "RFC-2"]
+    assert first.closed and second.closed
+
+
+def test_sinks_flush_interval():
+    sink = RecordingSink()
+    with ietfbib2bibtex.sinks.Sinks([(sink, 100, 0.05)]) as the_sinks:
+        the_sinks.put(*rfc_entries([1])[0])
+        start = time.monotonic()
+        while not sink.batches and time.monotonic() - start < 5:
+            time.sleep(0.01)
+        assert sink.batches == [["RFC-1"]]
+        the_sinks.put(*rfc_entries([2])[0])
+    assert sink.batches == [["RFC-1"], ["RFC-2"]]
+
+
+def test_sinks_failure(caplog):
+    failing = RecordingSink(fail_after=1)
+    working = RecordingSink()
+    with pytest.raises(OSError):
+        with ietfbib2bibtex.sinks.Sinks([(failing, 2, 60), (working, 2, 60)]) as s:
+            for key, entry in rfc_entries(range(100)):
+                s.put(key, entry)
+    assert failing.aborted and not failing.closed
+    assert "Unable to write to" in caplog.text
+    # the failure surfaces either in put() or when closing the sinks
+    assert working.aborted or working.closed
+
+
+def test_sinks_abort():
+    sink = RecordingSink()
+    with pytest.raises(ValueError):
+        with ietfbib2bibtex.sinks.Sinks([(sink, 2, 60)]) as the_sinks:
+            the_sinks.put(*rfc_entries([1])[0])
+            raise ValueError("parsing failed")
+    assert sink.aborted and not sink.closed
+
+
+def test_sinks_from_config_failure(tmp_path):
+    with pytest.raises(sqlite3.Error):
+        ietfbib2bibtex.sinks.Sinks.from_config(
+            [
+                ietfbib2bibtex.config.Sink(file=str(tmp_path / "ids.jsonl")),
+                ietfbib2bibtex.config.Sink(sqlite=str(tmp_path / "foo" / "ids.sqlite")),
+            ]
+        )
+    # the temporary file of the file sink created before is removed
+    assert not list(tmp_path.iterdir())
+
+
+def test_create_bibtex_sinks(mocker, tmp_path, endpoint):
+    mocker.patch("subprocess.check_output", return_value="")
+    url, bodies = endpoint()
+    bib = ids_bib(
+        tmp_path,
+        sinks=[
+            {"file": str(tmp_path / "ids.jsonl")},
+            {"sqlite": str(tmp_path / "ids.sqlite"), "batch_size": 2},
+            {"http": url, "batch_size": 3},
+        ],
+    )
+    bib.create_bibtex()
+    data = pybtex.database.parse_file(bib.bibtex_path)
+    expected = [
+        ietfbib2bibtex.sinks.entry_to_dict(key, entry)
+        for key, entry in data.entries.items()
+    ]
+    with open(tmp_path / "ids.jsonl", encoding="utf-8") as jsonl:
+        assert [json.loads(line) for line in jsonl] == expected
+    with sqlite3.connect(tmp_path / "ids.sqlite") as connection:
+        assert sorted(
+            key for key, in connection.execute("SELECT key FROM entries")
+        ) == sorted(data.entries)
+    assert [entry for body in bodies for entry in body] == expected
+    assert all(len(body) <= 3 for body in bodies)
+
+
+def test_create_all_bibtexs_shared_sinks(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    bibxml_ids = ids_bib(tmp_path).config.bibxml_ids
+    the_config = ietfbib2bibtex.config.Config(
+        bibpath=str(tmp_path),
+        state_file=str(tmp_path / "state.json"),
+        bibs=[
+            {
+                "name": name,
+                "bibxml_ids": bibxml_ids,
+                "sinks": [{"file": str(tmp_path / f"{name}.jsonl")}],
+            }
+            for name in ("ids1", "ids2")
+        ],
+    )
+    ietfbib2bibtex.bib.Bib.create_all_bibtexs(the_config)
+    for name in ("ids1", "ids2"):
+        data = pybtex.database.parse_file(tmp_path / f"{name}.bib")
+        with open(tmp_path / f"{name}.jsonl", encoding="utf-8") as jsonl:
+            assert [json.loads(line)["key"] for line in jsonl] == list(data.entries)
+
+
+def jsonl_keys(path):
+    with open(path, encoding="utf-8") as jsonl:
+        return [json.loads(line)["key"] for line in jsonl]
+
+
+@pytest.mark.parametrize("bib_config", [{}, {"compact": True}, {"sort": "key"}])
+def test_merge_bibtex_sinks(mocker, tmp_path, bib_config):
+    bib = ids_bib(tmp_path, sinks=[{"file": str(tmp_path / "ids.jsonl")}], **bib_config)
+    partials = [str(tmp_path / f"ids.{index}.bib") for index in range(2)]
+    for index, partial in enumerate(partials):
+        bib.create_partial_bibtex(index, 2, partial)
+    parse_chunk = mocker.spy(ietfbib2bibtex.partition, "parse_chunk")
+    parse_file = mocker.spy(pybtex.database, "parse_file")
+    bib.merge_bibtex(partials)
+    keys = jsonl_keys(tmp_path / "ids.jsonl")
+    assert len(keys) == len(set(keys))
+    # each entry is parsed once while merging, the output is not parsed again
+    assert parse_chunk.call_count == len(keys)
+    parse_file.assert_not_called()
+    assert set(keys) == {key for key, _ in bib.source.iterate_local()}
+
+
+def test_acreate_bibtex_sinks(mocker, tmp_path):
+    mocker.patch.object(ietfbib2bibtex.sources.BibXMLIDsSource, "async_sync")
+    bib = ids_bib(tmp_path, sinks=[{"file": str(tmp_path / "ids.jsonl")}])
+    asyncio.run(bib.acreate_bibtex())
+    data = pybtex.database.parse_file(bib.bibtex_path)
+    assert jsonl_keys(tmp_path / "ids.jsonl") == list(data.entries)
+
+
+def test_acreate_bibtex_slow_sink(mocker, tmp_path):
+    # the sink only proceeds once a task on the event loop ran
+    released = threading.Event()
+    waits = []
+
+    class SlowSink(ietfbib2bibtex.sinks.Sink):
+        def write(self, batch):
+            waits.append(released.wait(2))
+
+    async def aiterate_entries(*_, **__):
+        for key, entry in rfc_entries(range(1, 51)):
+            yield key, entry
+
+    mocker.patch.object(
+        ietfbib2bibtex.sources.RFCIndexSource, "aiterate_entries", aiterate_entries
+    )
+    mocker.patch.object(ietfbib2bibtex.sinks, "create", return_value=SlowSink())
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="rfcs",
+            rfc_index={"remote": "http://example.org"},
+            sinks=[{"file": str(tmp_path / "rfcs.jsonl"), "batch_size": 1}],
+        ),
+        str(tmp_path),
+    )
+
+    async def release():
+        await asyncio.sleep(0.1)
+        released.set()
+
+    async def create():
+        await asyncio.gather(bib.acreate_bibtex(), release())
+
+    asyncio.run(create())
+    assert len(waits) == 50
+    assert all(waits)
+    assert len(pybtex.database.parse_file(bib.bibtex_path).entries) == 50
+
+
+def test_create_recent_bibtex_sinks(mocker, tmp_path):
+    local = tmp_path / "ids"
+    shutil.copytree(ids_bib(tmp_path).source.local, local)
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(
+            name="ids",
+            bibxml_ids={"remote": "foobar::test", "local": str(local)},
+            sinks=[
+                {"file": str(tmp_path / "ids.jsonl")},
+                {"sqlite": str(tmp_path / "ids.sqlite")},
+            ],
+        ),
+        str(tmp_path),
+    )
+    mocker.patch.object(ietfbib2bibtex.sources, "TIMESTAMP_SLACK", 0)
+    since = time.time()
+    time.sleep(0.05)
+    (local / "reference.I-D.draft-lenders-dns-cns-00.xml").touch()
+    bib.create_recent_bibtex(since)
+    with sqlite3.connect(tmp_path / "ids.sqlite") as connection:
+        assert sorted(
+            key for key, in connection.execute("SELECT key FROM entries")
+        ) == sorted(pybtex.database.parse_file(bib.recent_bibtex_path).entries)
+    # a file sink holds all entries, so it is not replaced by the recent ones
+    assert not (tmp_path / "ids.jsonl").exists()
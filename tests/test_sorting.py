@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import asyncio
+import os
+
+import pybtex.database
+import pytest
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.bibfile
+import ietfbib2bibtex.config
+import ietfbib2bibtex.sorting
+import ietfbib2bibtex.sources
+
+from .test_compact import ids_bib
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def rfc_entries(numbers):
+    return [
+        (
+            f"RFC-{number}",
+            pybtex.database.Entry(
+                "techreport",
+                {"title": f"{{RFC {number}}}", "year": str(2000 + number % 7)},
+            ),
+        )
+        for number in numbers
+    ]
+
+
+@pytest.mark.parametrize(
+    "order, exp_keys",
+    [
+        ("key", ["a-10", "A-9", "b-1", "b-100"]),
+        ("natural", ["A-9", "a-10", "b-1", "b-100"]),
+        ("year", ["b-100", "A-9", "b-1", "a-10"]),
+    ],
+)
+def test_sort_key(order, exp_keys):
+    entries = [
+        ("b-1", pybtex.database.Entry("misc", {"year": "2020"})),
+        ("a-10", pybtex.database.Entry("misc")),
+        ("A-9", pybtex.database.Entry("misc", {"year": "2020"})),
+        ("b-100", pybtex.database.Entry("misc", {"year": "999"})),
+    ]
+    assert [
+        key
+        for key, entry in sorted(
+            entries,
+            key=lambda e: ietfbib2bibtex.sorting.sort_key(order, *e),
+        )
+    ] == exp_keys
+
+
+def test_sort_key_unsupported():
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.sorting.sort_key("foobar", "RFC-1", None)
+
+
+@pytest.mark.parametrize("memory", [1, 1000, 1 << 20])
+@pytest.mark.parametrize("order", ietfbib2bibtex.sorting.ORDERS)
+def test_sorted_chunks(mocker, tmp_path, memory, order):
+    write_run = mocker.spy(ietfbib2bibtex.sorting, "_write_run")
+    entries = rfc_entries([(number * 37) % 101 for number in range(101)])
+    chunks = list(
+        ietfbib2bibtex.sorting.sorted_chunks(
+            iter(entries), order, memory, directory=str(tmp_path)
+        )
+    )
+    expected = sorted(entries, key=lambda e: ietfbib2bibtex.sorting.sort_key(order, *e))
+    assert chunks == [
+        (key, ietfbib2bibtex.bibfile.serialize_entry(key, entry))
+        for key, entry in expected
+    ]
+    if memory == 1:
+        assert write_run.call_count == len(entries)
+    elif memory == 1 << 20:
+        write_run.assert_not_called()
+    else:
+        assert 1 < write_run.call_count < len(entries)
+    # the runs are removed after merging
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize("memory", [1, 1 << 20])
+@pytest.mark.parametrize(
+    "order, exp_keys",
+    [
+        ("key", ["RFC-1", "rfc-2"]),
+        ("natural", ["RFC-1", "rfc-2"]),
+        # the duplicate is not sorted next to the entry it replaces
+        ("year", ["rfc-2", "RFC-1"]),
+    ],
+)
+def test_sorted_chunks_duplicates(memory, order, exp_keys):
+    entries = rfc_entries([2, 1]) + [
+        (
+            "rfc-2",
+            pybtex.database.Entry("misc", {"title": "{Duplicate}", "year": "1990"}),
+        )
+    ]
+    chunks = list(ietfbib2bibtex.sorting.sorted_chunks(entries, order, memory))
+    assert [key for key, _ in chunks] == exp_keys
+    assert b"Duplicate" in dict(chunks)["rfc-2"]
+
+
+def test_write(tmp_path):
+    entries = rfc_entries([10, 9, 100])
+    path = str(tmp_path / "rfcs.bib")
+    ietfbib2bibtex.sorting.write(entries, path, "natural", 1)
+    expected = pybtex.database.BibliographyData(
+        entries=sorted(entries, key=lambda e: int(e[0][4:]))
+    )
+    with open(path, encoding="utf-8") as bib_file:
+        assert bib_file.read() == expected.to_string("bibtex")
+    assert os.listdir(tmp_path) == ["rfcs.bib"]
+
+
+def test_create_bibtex_sorted(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    unsorted = ids_bib(tmp_path, "unsorted")
+    unsorted.create_bibtex()
+    ordered = ids_bib(tmp_path, "sorted", sort="natural", sort_memory=1)
+    ordered.create_bibtex()
+    unsorted_data = pybtex.database.parse_file(unsorted.bibtex_path)
+    sorted_data = pybtex.database.parse_file(ordered.bibtex_path)
+    assert list(sorted_data.entries) == sorted(
+        unsorted_data.entries, key=ietfbib2bibtex.sorting.natural_key
+    )
+    assert dict(sorted_data.entries) == dict(unsorted_data.entries)
+
+
+def test_merge_bibtex_sorted(tmp_path):
+    ordered = ids_bib(tmp_path, "sorted", sort="year", sort_memory=1)
+    partials = [str(tmp_path / f"ids.{index}.bib") for index in range(2)]
+    for index, partial in enumerate(partials):
+        ordered.create_partial_bibtex(index, 2, partial)
+    ordered.merge_bibtex(partials)
+    full = ids_bib(tmp_path, "full")
+    full.merge_bibtex(partials)
+    sorted_data = pybtex.database.parse_file(ordered.bibtex_path)
+    full_data = pybtex.database.parse_file(full.bibtex_path)
+    assert dict(sorted_data.entries) == dict(full_data.entries)
+    years = [entry.fields["year"] for entry in sorted_data.entries.values()]
+    assert years == sorted(years)
+
+
+def test_sorter(mocker):
+    write_run = mocker.spy(ietfbib2bibtex.sorting, "_write_run")
+    sorter = ietfbib2bibtex.sorting.Sorter("natural", 1)
+    for key, entry in rfc_entries([10, 9, 100]):
+        sorter.add(key, entry)
+    assert write_run.call_count == 3
+    runs = [call.spy_return for call in write_run.call_args_list]
+    assert [key for key, _ in sorter.chunks()] == ["RFC-9", "RFC-10", "RFC-100"]
+    assert all(run.closed for run in runs)
+
+
+def test_create_shared_bibtexs_sorted(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    unsorted = ids_bib(tmp_path, "unsorted")
+    bibs = [unsorted] + [
+        ietfbib2bibtex.bib.Bib(
+            unsorted.config.model_copy(
+                update={"name": order, "sort": order, "sort_memory": 1}
+            ),
+            str(tmp_path),
+            source=unsorted.source,
+        )
+        for order in ("natural", "year")
+    ]
+    store = mocker.spy(ietfbib2bibtex.bib.Bib, "store")
+    ietfbib2bibtex.bib.Bib.create_shared_bibtexs(bibs)
+    # only the unsorted bibliography collects all its entries
+    store.assert_called_once()
+    assert store.call_args[0][0] is unsorted
+    unsorted_data = pybtex.database.parse_file(unsorted.bibtex_path)
+    natural_data = pybtex.database.parse_file(bibs[1].bibtex_path)
+    year_data = pybtex.database.parse_file(bibs[2].bibtex_path)
+    assert list(natural_data.entries) == sorted(
+        unsorted_data.entries, key=ietfbib2bibtex.sorting.natural_key
+    )
+    assert dict(year_data.entries) == dict(unsorted_data.entries)
+    years = [entry.fields["year"] for entry in year_data.entries.values()]
+    assert years == sorted(years)
+
+
+def test_acreate_bibtex_sorted(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    mocker.patch.object(ietfbib2bibtex.sources.BibXMLIDsSource, "async_sync")
+    unsorted = ids_bib(tmp_path, "unsorted")
+    unsorted.create_bibtex()
+    ordered = ids_bib(tmp_path, "sorted", sort="natural", sort_memory=1)
+    store = mocker.spy(ietfbib2bibtex.bib.Bib, "store")
+    asyncio.run(ordered.acreate_bibtex())
+    store.assert_not_called()
+    unsorted_data = pybtex.database.parse_file(unsorted.bibtex_path)
+    sorted_data = pybtex.database.parse_file(ordered.bibtex_path)
+    assert list(sorted_data.entries) == sorted(
+        unsorted_data.entries, key=ietfbib2bibtex.sorting.natural_key
+    )
+
+
+@pytest.mark.parametrize("option", ["incremental", "compact"])
+def test_sort_exclusive(option):
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test", sort="key", **{option: True})
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.config.Bib(name="test", sort="foobar")
@@ -6,19 +6,31 @@
 # General Public License v2.1. See the file LICENSE in the top level
 # directory for more details.
 
+# pylint: disable=missing-class-docstring
 # pylint: disable=missing-function-docstring
 # pylint: disable=missing-module-docstring
 # pylint: disable=redefined-outer-name
+# pylint: disable=too-many-lines
 
+import asyncio
 import datetime
 import logging
 import re
 import os
+import shutil
+import time
 
+import lxml.etree
 import pytest
+import requests
 
+import ietfbib2bibtex.cache
 import ietfbib2bibtex.config
+import ietfbib2bibtex.filters
 import ietfbib2bibtex.sources
+import ietfbib2bibtex.sync
+
+from .test_sync import http_remote  # noqa: F401 pylint: disable=unused-import
 
 __author__ = "Martine S. Lenders"
 __copyright__ = "Copyright 2022 Freie Universität Berlin"
@@ -26,50 +38,7 @@ __license__ = "LGPL v2.1"
 __email__ = "m.lenders@fu-berlin.de"
 
 MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
-
-
-@pytest.fixture
-def mock_config(request):
-    return ietfbib2bibtex.config.Config(**request.param)
-
-
-def test_source_init():
-    with pytest.raises(TypeError):
-        # pylint: disable=abstract-class-instantiated
-        ietfbib2bibtex.sources.Source()
-
-
-@pytest.mark.parametrize(
-    "mock_config",
-    [
-        pytest.param(
-            {"bibs": [{"name": "test", "rfc_index": {"remote": "http://example.org"}}]},
-            id="with rfc_index config",
-        ),
-    ],
-    indirect=True,
-)
-def test_rfcindexsource_init_remote(mock_config):
-    source = ietfbib2bibtex.sources.RFCIndexSource(mock_config.bibs[0].rfc_index)
-    assert source.remote == "http://example.org"
-
-
-@pytest.mark.parametrize(
-    "mock_config",
-    [
-        pytest.param(
-            {"bibs": [{"name": "test", "rfc_index": {"remote": "http://example.org"}}]},
-            id="with rfc_index config",
-        ),
-    ],
-    indirect=True,
-)
-def test_rfcindexsource_iterate_entries(mocker, mock_config):
-    mocker.patch(
-        "requests.get",
-        mocker.Mock(
-            return_value=mocker.Mock(
-                content=b"""<?xml version="1.0" encoding="UTF-8"?>
+RFC_INDEX_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
 <rfc-index xmlns="https://www.rfc-editor.org/rfc-index"
            xmlns:xsi="https://www.w3.org/2001/XMLSchema-instance"
            xsi:schemaLocation="https://www.rfc-editor.org/rfc-index
@@ -138,11 +107,37 @@ def test_rfcindexsource_iterate_entries(mocker, mock_config):
     <doc-id>BCP0195</doc-id>
   </rfc-entry>
 </rfc-index>"""
-            ),
-        ),
+
+
+@pytest.fixture
+def mock_config(request, tmp_path):
+    return ietfbib2bibtex.config.Config(
+        **{"state_file": str(tmp_path / "state.json"), **request.param}
     )
+
+
+def test_source_init():
+    with pytest.raises(TypeError):
+        # pylint: disable=abstract-class-instantiated
+        ietfbib2bibtex.sources.Source()
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {"bibs": [{"name": "test", "rfc_index": {"remote": "http://example.org"}}]},
+            id="with rfc_index config",
+        ),
+    ],
+    indirect=True,
+)
+def test_rfcindexsource_init_remote(mock_config):
     source = ietfbib2bibtex.sources.RFCIndexSource(mock_config.bibs[0].rfc_index)
-    entries = list(source.iterate_entries())
+    assert source.remote == "http://example.org"
+
+
+def assert_rfc_index_entries(entries):
     assert len(entries) == 2
 
     assert entries[0][0] == "RFC-781"
@@ -184,6 +179,61 @@ def test_rfcindexsource_iterate_entries(mocker, mock_config):
     assert entries[1][1].persons["author"][2].last_names == ["Fossati"]
 
 
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {"bibs": [{"name": "test", "rfc_index": {"remote": "http://example.org"}}]},
+            id="with rfc_index config",
+        ),
+        pytest.param(
+            {
+                "bibs": [
+                    {
+                        "name": "test",
+                        "rfc_index": {"remote": "http://example.org", "processes": 2},
+                    }
+                ]
+            },
+            id="with multi-process rfc_index config",
+        ),
+    ],
+    indirect=True,
+)
+def test_rfcindexsource_iterate_entries(mocker, mock_config):
+    mocker.patch(
+        "requests.get",
+        mocker.Mock(
+            return_value=mocker.Mock(
+                content=RFC_INDEX_XML, headers={"ETag": '"abcdef"'}
+            ),
+        ),
+    )
+    source = ietfbib2bibtex.sources.RFCIndexSource(mock_config.bibs[0].rfc_index)
+    assert source.validator is None
+    entries = list(source.iterate_entries())
+    assert_rfc_index_entries(entries)
+    assert source.validator == '"abcdef"'
+
+
+@pytest.mark.parametrize("number", [1, 2, 3, 10])
+def test_rfc_index_chunks(number):
+    chunks = ietfbib2bibtex.sources.rfc_index_chunks(RFC_INDEX_XML, number)
+    assert len(chunks) == min(number, 3)
+    assert all(RFC_INDEX_XML[start:].startswith(b"<rfc-entry>") for start, _ in chunks)
+    assert RFC_INDEX_XML[: chunks[-1][1]].endswith(b"</rfc-entry>")
+    entries = []
+    for start, end in chunks:
+        entries.extend(
+            ietfbib2bibtex.sources.parse_rfc_index_chunk(RFC_INDEX_XML[start:end])
+        )
+    assert_rfc_index_entries(entries)
+
+
+def test_rfc_index_chunks_no_entries():
+    assert not ietfbib2bibtex.sources.rfc_index_chunks(b"<rfc-index/>", 4)
+
+
 @pytest.mark.parametrize(
     "mock_config",
     [
@@ -229,12 +279,13 @@ def test_bibxml_ids_init_remote_local(mock_config):
 )
 def test_bibxml_ids_iterate_entries(mocker, mock_config, caplog):
     # pylint: disable=too-many-statements
-    check_call = mocker.patch("subprocess.check_call")
+    check_output = mocker.patch("subprocess.check_output", return_value="")
     source = ietfbib2bibtex.sources.BibXMLIDsSource(mock_config.bibs[0].bibxml_ids)
     with caplog.at_level(logging.ERROR):
         entries = list(source.iterate_entries())
-    check_call.assert_called_once_with(
-        ["rsync", "-avcizxL", "foobar::test", os.path.join(MODULE_PATH, "test_ids")]
+    check_output.assert_called_once_with(
+        ["rsync", "-avizxL", "foobar::test", os.path.join(MODULE_PATH, "test_ids")],
+        text=True,
     )
     assert len(entries) == 5
     assert "draft-ietf-idn-amc-ace-v-00" in caplog.text
@@ -325,13 +376,830 @@ def test_bibxml_ids_iterate_entries(mocker, mock_config, caplog):
     indirect=True,
 )
 def test_bibxml_ids_iterate_entries_no_entry(mocker, mock_config):
-    check_call = mocker.patch("subprocess.check_call")
+    check_output = mocker.patch("subprocess.check_output", return_value="")
     iglob = mocker.patch("glob.iglob")
     iglob.return_value = []
     source = ietfbib2bibtex.sources.BibXMLIDsSource(mock_config.bibs[0].bibxml_ids)
     entries = list(source.iterate_entries())
     assert len(entries) == 0
-    check_call.assert_called_once_with(
-        ["rsync", "-avcizxL", "foobar::test", os.path.join(MODULE_PATH, "test_ids")]
+    check_output.assert_called_once_with(
+        ["rsync", "-avizxL", "foobar::test", os.path.join(MODULE_PATH, "test_ids")],
+        text=True,
     )
     iglob.assert_called_once_with(os.path.join(MODULE_PATH, "test_ids", "*[0-9].xml"))
+
+
+@pytest.mark.parametrize(
+    "mock_config",
+    [
+        pytest.param(
+            {
+                "bibs": [
+                    {
+                        "name": "test",
+                        "bibxml_ids": {
+                            "remote": "foobar::test",
+                            "local": "test",
+                            "checksum": True,
+                            "rsync_args": ["--delete"],
+                            "shards": 2,
+                        },
+                    }
+                ]
+            },
+            id="with sharded bibxml_ids config",
+        ),
+    ],
+    indirect=True,
+)
+def test_bibxml_ids_sync(mocker, mock_config):
+    check_output = mocker.patch(
+        "subprocess.check_output",
+        side_effect=[
+            ">f+++++++++ reference.I-D.draft-ietf-core-dns-over-coap-00.xml\n",
+            "*deleting   reference.I-D.draft-lenders-dns-cns-00.xml\n",
+        ],
+    )
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(mock_config.bibs[0].bibxml_ids)
+    assert source.changes is None
+    changes = source.sync()
+    assert check_output.call_count == 2
+    check_output.assert_has_calls(
+        [
+            mocker.call(
+                [
+                    "rsync",
+                    "-avcizxL",
+                    "--exclude=reference.I-D.draft-[ijklmnopqrstuvwxyz]*",
+                    "--delete",
+                    "foobar::test",
+                    "test",
+                ],
+                text=True,
+            ),
+            mocker.call(
+                [
+                    "rsync",
+                    "-avcizxL",
+                    "--include=reference.I-D.draft-[ijklmnopqrstuvwxyz]*",
+                    "--exclude=*",
+                    "--delete",
+                    "foobar::test",
+                    "test",
+                ],
+                text=True,
+            ),
+        ],
+        any_order=True,
+    )
+    assert source.changes is changes
+    assert changes.updated == [
+        os.path.join("test", "reference.I-D.draft-ietf-core-dns-over-coap-00.xml")
+    ]
+    assert changes.deleted == [
+        os.path.join("test", "reference.I-D.draft-lenders-dns-cns-00.xml")
+    ]
+
+
+def test_source_is_modified():
+    class TestSource(ietfbib2bibtex.sources.Source):
+        @property
+        def remote(self):
+            return "test"
+
+        def iterate_entries(self, entry_filter=None, refresh=True, fields=None):
+            yield from [("Foo", 0), ("bar", 1)]
+
+    source = TestSource()
+    assert source.remote == "test"
+    assert len(list(source.iterate_entries())) == 2
+    assert source.lookup("foo") == ("Foo", 0)
+    assert source.lookup("BAR") == ("bar", 1)
+    assert source.lookup("baz") is None
+    assert source.validator is None
+    assert source.is_modified()
+    assert source.is_modified("foobar")
+
+
+@pytest.mark.parametrize(
+    "validator, ok, headers, exp_modified",
+    [
+        pytest.param(None, True, {"ETag": '"abcdef"'}, True, id="no validator"),
+        pytest.param('"abcdef"', True, {"ETag": '"abcdef"'}, False, id="same ETag"),
+        pytest.param('"abcdef"', True, {"ETag": '"012345"'}, True, id="new ETag"),
+        pytest.param(
+            "Tue, 15 Nov 1994 12:45:26 GMT",
+            True,
+            {"Last-Modified": "Tue, 15 Nov 1994 12:45:26 GMT"},
+            False,
+            id="same Last-Modified",
+        ),
+        pytest.param('"abcdef"', False, {}, True, id="error"),
+    ],
+)
+def test_rfcindexsource_is_modified(mocker, validator, ok, headers, exp_modified):
+    head = mocker.patch(
+        "requests.head", return_value=mocker.Mock(ok=ok, headers=headers)
+    )
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org")
+    )
+    assert source.is_modified(validator) == exp_modified
+    if validator is None:
+        head.assert_not_called()
+    else:
+        head.assert_called_once_with("http://example.org", timeout=5)
+
+
+def test_rfcindexsource_is_modified_unreachable(mocker):
+    mocker.patch("requests.head", side_effect=requests.ConnectionError("foobar"))
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org")
+    )
+    assert source.is_modified('"abcdef"')
+
+
+@pytest.mark.parametrize(
+    "output, exp_modified",
+    [
+        pytest.param("", False, id="unchanged"),
+        pytest.param(
+            ">f+++++++++ reference.I-D.draft-foo-00.xml\n", True, id="new file"
+        ),
+        pytest.param(
+            "*deleting   reference.I-D.draft-foo-00.xml\n", True, id="deleted"
+        ),
+    ],
+)
+def test_bibxml_ids_is_modified(mocker, output, exp_modified):
+    check_output = mocker.patch("subprocess.check_output", return_value=output)
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test", local="test")
+    )
+    assert source.is_modified() == exp_modified
+    check_output.assert_called_once_with(
+        ["rsync", "-avizxL", "--dry-run", "foobar::test", "test"], text=True
+    )
+    assert source.changes is None
+
+
+def test_bibxml_ids_is_modified_synced(mocker, tmp_path):
+    check_output = mocker.patch("subprocess.check_output", return_value="")
+    local = tmp_path / "ids"
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test", local=str(local))
+    )
+    synced = time.time() - 10
+    # the local copy does not exist
+    assert source.is_modified(synced=synced)
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), local)
+    # the local copy was synchronized after the last iteration, e.g., by another
+    # process, so the remote does not need to be checked
+    assert source.is_modified(synced=synced)
+    check_output.assert_not_called()
+    assert not source.is_modified(synced=time.time() + 10)
+    check_output.assert_called_once()
+
+
+@pytest.mark.parametrize("http_remote", ["nginx"], indirect=True)
+def test_bibxml_ids_http_remote(tmp_path, http_remote):  # noqa: F811
+    remote, _, _ = http_remote
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(
+            remote=remote, local=str(tmp_path / "ids")
+        )
+    )
+    assert source.is_modified()
+    entries = list(source.iterate_entries())
+    assert len(source.changes.updated) == 5
+    assert "draft-lenders-dns-cns-00" in [key for key, _ in entries]
+    assert not source.is_modified()
+
+
+def test_rfcindexsource_cache(mocker, tmp_path):
+    get = mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(
+            status_code=200, content=RFC_INDEX_XML, headers={"ETag": '"abcdef"'}
+        ),
+    )
+    iterate_content = mocker.spy(
+        ietfbib2bibtex.sources.RFCIndexSource, "_iterate_content"
+    )
+    cache = ietfbib2bibtex.cache.Cache(str(tmp_path))
+    for _ in range(2):
+        source = ietfbib2bibtex.sources.RFCIndexSource(
+            ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org"),
+            cache=cache,
+        )
+        assert_rfc_index_entries(list(source.iterate_entries()))
+        assert source.validator == '"abcdef"'
+    get.assert_called_once()
+    iterate_content.assert_called_once()
+
+
+def test_bibxml_ids_cache(mocker, tmp_path, caplog):
+    cache = ietfbib2bibtex.cache.Cache(str(tmp_path))
+    check_output = mocker.patch("subprocess.check_output", return_value="")
+    bibxml_to_bibtex = mocker.spy(ietfbib2bibtex.sources, "bibxml_to_bibtex")
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test"), cache=cache
+    )
+    assert source.local == cache.mirror_path("foobar::test")
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), source.local)
+    with caplog.at_level(logging.ERROR):
+        entries = list(source.iterate_entries())
+    assert len(entries) == 5
+    assert "draft-ietf-idn-amc-ace-v-00" in caplog.text
+    assert "draft-yangcan-cloud-intelligence-web-platform-00" in caplog.text
+    check_output.assert_called_once_with(
+        ["rsync", "-avizxL", "foobar::test", source.local], text=True
+    )
+    assert bibxml_to_bibtex.call_count == 5
+    caplog.clear()
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test"), cache=cache
+    )
+    with caplog.at_level(logging.ERROR):
+        cached_entries = list(source.iterate_entries())
+    # mirror is still fresh
+    check_output.assert_called_once()
+    assert not source.changes.updated
+    # only the malformed files are parsed again
+    assert bibxml_to_bibtex.call_count == 7
+    assert "draft-ietf-idn-amc-ace-v-00" in caplog.text
+    assert [key for key, _ in cached_entries] == [key for key, _ in entries]
+    for (_, cached_entry), (_, entry) in zip(cached_entries, entries):
+        assert cached_entry.fields == entry.fields
+        assert [str(p) for p in cached_entry.persons["author"]] == [
+            str(p) for p in entry.persons["author"]
+        ]
+
+
+@pytest.mark.parametrize(
+    "entry_filter, exp_keys",
+    [
+        pytest.param({"key": "RFC-9"}, ["RFC-9325"], id="key"),
+        pytest.param({"prefixes": ["RFC07"]}, ["RFC-781"], id="prefix"),
+        pytest.param({"year_from": 2000}, ["RFC-9325"], id="year"),
+        pytest.param({"status": ["Best Current Practice"]}, ["RFC-9325"], id="status"),
+        pytest.param({"year_to": 1900}, [], id="none"),
+    ],
+)
+@pytest.mark.parametrize("processes", [None, 2])
+def test_rfcindexsource_iterate_entries_filter(
+    mocker, entry_filter, exp_keys, processes
+):
+    get = mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(content=RFC_INDEX_XML, headers={}),
+    )
+    if processes is None:
+        person = mocker.spy(ietfbib2bibtex.sources.pybtex.database, "Person")
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(
+            remote="http://example.org", processes=processes
+        )
+    )
+    entries = list(
+        source.iterate_entries(
+            ietfbib2bibtex.filters.EntryFilter(
+                ietfbib2bibtex.config.Filter(**entry_filter)
+            )
+        )
+    )
+    assert [key for key, _ in entries] == exp_keys
+    if processes is None:
+        # authors of filtered entries are never parsed
+        assert person.call_count == sum(len(e.persons["author"]) for _, e in entries)
+    # content is reused without refresh
+    assert [key for key, _ in source.iterate_entries(refresh=False)] == [
+        "RFC-781",
+        "RFC-9325",
+    ]
+    get.assert_called_once()
+
+
+def test_rfcindexsource_cache_filter(mocker, tmp_path):
+    get = mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(status_code=200, content=RFC_INDEX_XML, headers={}),
+    )
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org"),
+        cache=ietfbib2bibtex.cache.Cache(str(tmp_path)),
+    )
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(year_to=2000)
+    )
+    assert [key for key, _ in source.iterate_entries(entry_filter)] == ["RFC-781"]
+    assert_rfc_index_entries(list(source.iterate_entries(refresh=False)))
+    assert [key for key, _ in source.iterate_entries(entry_filter, refresh=False)] == [
+        "RFC-781"
+    ]
+    get.assert_called_once()
+
+
+def test_bibxml_doc_id():
+    assert ietfbib2bibtex.sources.bibxml_doc_id("foo/test-00.xml") == "test-00"
+
+
+@pytest.mark.parametrize(
+    "entry_filter, exp_keys, exp_opened",
+    [
+        pytest.param(
+            {"prefixes": ["draft-ietf-core-"]},
+            [
+                "draft-ietf-core-dns-over-coap-00",
+                "draft-ietf-core-dns-over-coap-01",
+                "draft-ietf-core-dns-over-coap",
+            ],
+            2,
+            id="prefix",
+        ),
+        pytest.param(
+            {"key": "draft-lenders-"},
+            ["draft-lenders-dns-cns-00", "draft-lenders-dns-cns"],
+            1,
+            id="key",
+        ),
+        pytest.param(
+            {"key": "draft-ietf-core-", "year_from": 2022, "year_to": 2022},
+            [
+                "draft-ietf-core-dns-over-coap-00",
+                "draft-ietf-core-dns-over-coap-01",
+                "draft-ietf-core-dns-over-coap",
+            ],
+            2,
+            id="year",
+        ),
+        pytest.param({"prefixes": ["draft-ietf-"], "year_to": 2021}, [], 3, id="none"),
+    ],
+)
+@pytest.mark.parametrize("cached", [False, True])
+def test_bibxml_ids_iterate_entries_filter(
+    mocker, tmp_path, entry_filter, exp_keys, exp_opened, cached
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    check_output = mocker.patch("subprocess.check_output", return_value="")
+    bibxml_to_bibtex = mocker.spy(ietfbib2bibtex.sources, "bibxml_to_bibtex")
+    if cached:
+        source = ietfbib2bibtex.sources.BibXMLIDsSource(
+            ietfbib2bibtex.config.BibXMLIDsSource(remote="foobar::test"),
+            cache=ietfbib2bibtex.cache.Cache(str(tmp_path)),
+        )
+        shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), source.local)
+    else:
+        source = ietfbib2bibtex.sources.BibXMLIDsSource(
+            ietfbib2bibtex.config.BibXMLIDsSource(
+                remote="foobar::test", local=os.path.join(MODULE_PATH, "test_ids")
+            )
+        )
+    entries = list(
+        source.iterate_entries(
+            ietfbib2bibtex.filters.EntryFilter(
+                ietfbib2bibtex.config.Filter(**entry_filter)
+            )
+        )
+    )
+    assert [key for key, _ in entries] == exp_keys
+    # files filtered by name are never opened
+    assert bibxml_to_bibtex.call_count == exp_opened
+    assert len(list(source.iterate_entries(refresh=False))) == 5
+    check_output.assert_called_once()
+
+
+def test_bibxml_ids_file_stats(mocker):
+    mocker.patch("subprocess.check_output", return_value="")
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(
+            remote="foobar::test", local=os.path.join(MODULE_PATH, "test_ids")
+        )
+    )
+    list(source.iterate_entries())
+    assert source.file_stats is None
+    source.file_stats = []
+    list(source.iterate_entries())
+    # malformed files are included
+    assert sorted(stats.path for stats in source.file_stats) == sorted(
+        os.path.join(MODULE_PATH, "test_ids", filename)
+        for filename in os.listdir(os.path.join(MODULE_PATH, "test_ids"))
+    )
+    for stats in source.file_stats:
+        assert stats.size == os.path.getsize(stats.path)
+        assert stats.parse_time > 0
+
+
+def test_bibxml_ids_quarantine(mocker, tmp_path, caplog):
+    # pylint: disable=too-many-statements
+    mocker.patch("subprocess.check_output", return_value="")
+    bibxml_to_bibtex = mocker.spy(ietfbib2bibtex.sources, "bibxml_to_bibtex")
+    local = tmp_path / "ids"
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), local)
+    bad = [
+        str(local / "reference.I-D.draft-ietf-idn-amc-ace-v-00.xml"),
+        str(
+            local / "reference.I-D.draft-yangcan-cloud-intelligence-web-platform-00.xml"
+        ),
+    ]
+    quarantine = {}
+
+    def iterate():
+        source = ietfbib2bibtex.sources.BibXMLIDsSource(
+            ietfbib2bibtex.config.BibXMLIDsSource(
+                remote="foobar::test", local=str(local)
+            ),
+            quarantine=quarantine,
+        )
+        caplog.clear()
+        bibxml_to_bibtex.reset_mock()
+        with caplog.at_level(logging.ERROR):
+            entries = list(source.iterate_entries())
+        errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+        assert len(errors) <= 1
+        return entries, errors
+
+    entries, errors = iterate()
+    assert len(entries) == 5
+    assert bibxml_to_bibtex.call_count == 5
+    assert sorted(quarantine) == bad
+    assert "Ignoring 2 malformed files" in errors[0].getMessage()
+    assert "(0 known from previous runs)" in errors[0].getMessage()
+    assert all(path in errors[0].getMessage() for path in bad)
+    assert "in author fullname" in quarantine[bad[1]]["error"]
+
+    # known malformed files are not parsed again
+    entries, errors = iterate()
+    assert len(entries) == 5
+    assert bibxml_to_bibtex.call_count == 3
+    assert "(2 known from previous runs)" in errors[0].getMessage()
+    assert not any(path in errors[0].getMessage() for path in bad)
+
+    # touched but unchanged files stay quarantined
+    os.utime(bad[0], ns=(0, 0))
+    iterate()
+    assert bibxml_to_bibtex.call_count == 3
+    assert quarantine[bad[0]]["mtime_ns"] == 0
+
+    # changed files are parsed again, deleted ones are released
+    with open(bad[0], "w", encoding="utf-8") as xml:
+        xml.write(
+            (local / "reference.I-D.draft-lenders-dns-cns-00.xml")
+            .read_text(encoding="utf-8")
+            .replace("draft-lenders-dns-cns-00", "draft-ietf-idn-amc-ace-v-00")
+        )
+    os.remove(bad[1])
+    entries, errors = iterate()
+    assert len(entries) == 7
+    assert bibxml_to_bibtex.call_count == 4
+    assert not errors
+    assert not quarantine
+
+
+@pytest.mark.parametrize(
+    "remote, exp_local_path",
+    [
+        pytest.param("https://example.org/rfc-index.xml", None, id="http"),
+        pytest.param("file:///srv/rfc-index.xml", "/srv/rfc-index.xml", id="file URL"),
+        pytest.param("/srv/rfc-index.xml", "/srv/rfc-index.xml", id="path"),
+        pytest.param(
+            "~/rfc-index.xml",
+            os.path.join(os.path.expanduser("~"), "rfc-index.xml"),
+            id="home path",
+        ),
+    ],
+)
+def test_rfcindexsource_local_path(remote, exp_local_path):
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=remote)
+    )
+    assert source.local_path == exp_local_path
+
+
+@pytest.mark.parametrize("file_url", [False, True])
+@pytest.mark.parametrize("processes", [None, 2])
+def test_rfcindexsource_local_iterate_entries(mocker, tmp_path, file_url, processes):
+    get = mocker.patch("requests.get")
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(
+            remote=rfc_index.as_uri() if file_url else str(rfc_index),
+            processes=processes,
+        )
+    )
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    stat = os.stat(rfc_index)
+    assert source.validator == f"{stat.st_mtime_ns}-{stat.st_size}"
+    # the mapped file can be iterated again
+    assert_rfc_index_entries(list(source.iterate_entries(refresh=False)))
+    get.assert_not_called()
+
+
+def test_rfcindexsource_local_empty(tmp_path):
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(b"")
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index))
+    )
+    with pytest.raises(lxml.etree.XMLSyntaxError):
+        list(source.iterate_entries())
+
+
+def test_rfcindexsource_local_is_modified(mocker, tmp_path):
+    head = mocker.patch("requests.head")
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index))
+    )
+    list(source.iterate_entries())
+    assert not source.is_modified(source.validator)
+    os.utime(rfc_index, ns=(0, 0))
+    assert source.is_modified(source.validator)
+    os.remove(rfc_index)
+    assert source.is_modified(source.validator)
+    head.assert_not_called()
+
+
+def test_rfcindexsource_local_cache(mocker, tmp_path):
+    iterate_content = mocker.spy(
+        ietfbib2bibtex.sources.RFCIndexSource, "_iterate_content"
+    )
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    cache = ietfbib2bibtex.cache.Cache(str(tmp_path / "cache"))
+    for _ in range(2):
+        source = ietfbib2bibtex.sources.RFCIndexSource(
+            ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index)), cache=cache
+        )
+        assert_rfc_index_entries(list(source.iterate_entries()))
+    iterate_content.assert_called_once()
+    # a changed file is parsed again
+    os.utime(rfc_index, ns=(0, 0))
+    assert_rfc_index_entries(list(source.iterate_entries()))
+    assert iterate_content.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "key, exp_key",
+    [
+        pytest.param("RFC-9325", "RFC-9325", id="key"),
+        pytest.param("rfc781", "RFC-781", id="lower case"),
+        pytest.param("RFC0781", "RFC-781", id="doc-id"),
+        pytest.param("RFC-7525", None, id="only obsoleted"),
+        pytest.param("RFC-1", None, id="missing"),
+        pytest.param("BCP0195", None, id="no RFC"),
+    ],
+)
+def test_rfcindexsource_lookup(mocker, tmp_path, key, exp_key):
+    get = mocker.patch("requests.get")
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index))
+    )
+    entry = source.lookup(key)
+    if exp_key is None:
+        assert entry is None
+    else:
+        assert entry[0] == exp_key
+        assert entry[1].fields["doi"] == f"10.17487/RFC{int(exp_key[4:]):04d}"
+    get.assert_not_called()
+
+
+def test_rfcindexsource_lookup_filter(tmp_path):
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index))
+    )
+    entry_filter = ietfbib2bibtex.filters.EntryFilter(
+        ietfbib2bibtex.config.Filter(year_from=2000)
+    )
+    assert source.lookup("RFC-781", entry_filter) is None
+    assert source.lookup("RFC-9325", entry_filter)[0] == "RFC-9325"
+
+
+def test_rfcindexsource_lookup_remote(mocker, tmp_path):
+    get = mocker.patch(
+        "requests.get",
+        return_value=mocker.Mock(status_code=200, content=RFC_INDEX_XML, headers={}),
+    )
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org")
+    )
+    # without cache, the rfc-index is downloaded once
+    assert source.lookup("RFC-781")[0] == "RFC-781"
+    assert source.lookup("RFC-9325")[0] == "RFC-9325"
+    get.assert_called_once()
+    cache = ietfbib2bibtex.cache.Cache(str(tmp_path))
+    cache.fetch("http://example.org")
+    cache.ttl = 0
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org"),
+        cache=cache,
+    )
+    # the last download in the cache is used even if it is stale
+    assert source.lookup("RFC-9325")[0] == "RFC-9325"
+    assert get.call_count == 2
+    os.remove(cache.object_path(cache.downloaded("http://example.org")))
+    assert source.lookup("RFC-9325")[0] == "RFC-9325"
+    assert get.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "key, entry_filter, exp_key, exp_number",
+    [
+        pytest.param(
+            "draft-ietf-core-dns-over-coap-00",
+            None,
+            "draft-ietf-core-dns-over-coap-00",
+            "00",
+            id="versioned",
+        ),
+        pytest.param(
+            "draft-ietf-core-dns-over-coap",
+            None,
+            "draft-ietf-core-dns-over-coap",
+            "01",
+            id="latest",
+        ),
+        pytest.param(
+            "draft-ietf-core-dns-over-coap-02", None, None, None, id="missing"
+        ),
+        pytest.param("draft-ietf-idn-amc-ace-v", None, None, None, id="malformed"),
+        pytest.param("RFC-9325", None, None, None, id="RFC"),
+        pytest.param(
+            "draft-lenders-dns-cns",
+            {"prefixes": ["draft-ietf-"]},
+            None,
+            None,
+            id="filtered name",
+        ),
+        pytest.param(
+            "draft-lenders-dns-cns",
+            {"year_to": 2000},
+            None,
+            None,
+            id="filtered year",
+        ),
+    ],
+)
+def test_bibxml_ids_lookup(mocker, key, entry_filter, exp_key, exp_number):
+    check_output = mocker.patch("subprocess.check_output")
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(
+            remote="foobar::test", local=os.path.join(MODULE_PATH, "test_ids")
+        )
+    )
+    if entry_filter is not None:
+        entry_filter = ietfbib2bibtex.filters.EntryFilter(
+            ietfbib2bibtex.config.Filter(**entry_filter)
+        )
+    entry = source.lookup(key, entry_filter)
+    if exp_key is None:
+        assert entry is None
+    else:
+        assert entry[0] == exp_key
+        assert entry[1].fields["number"] == exp_number
+    check_output.assert_not_called()
+
+
+async def collect(entries):
+    return [entry async for entry in entries]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_rfcindexsource_aiterate_entries(mocker, processes):
+    mocker.patch.object(ietfbib2bibtex.sources, "aiohttp", None)
+    mocker.patch.object(ietfbib2bibtex.sources.RFCIndexSource, "ASYNC_CHUNK_SIZE", 512)
+    get = mocker.patch(
+        "requests.get",
+        mocker.Mock(
+            return_value=mocker.Mock(
+                content=RFC_INDEX_XML, headers={"ETag": '"abcdef"'}
+            ),
+        ),
+    )
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(
+            remote="http://example.org", processes=processes
+        )
+    )
+    assert_rfc_index_entries(asyncio.run(collect(source.aiterate_entries())))
+    assert source.validator == '"abcdef"'
+    assert_rfc_index_entries(
+        asyncio.run(collect(source.aiterate_entries(refresh=False)))
+    )
+    get.assert_called_once()
+
+
+def test_rfcindexsource_aiterate_entries_aiohttp(mocker):
+    aiohttp = mocker.patch.object(ietfbib2bibtex.sources, "aiohttp")
+    get = mocker.patch("requests.get")
+    response = mocker.MagicMock(headers={"ETag": '"abcdef"'})
+    response.read = mocker.AsyncMock(return_value=RFC_INDEX_XML)
+    session = mocker.MagicMock()
+    session.get.return_value.__aenter__.return_value = response
+    aiohttp.ClientSession.return_value.__aenter__.return_value = session
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote="http://example.org")
+    )
+    assert_rfc_index_entries(asyncio.run(collect(source.aiterate_entries())))
+    assert source.validator == '"abcdef"'
+    session.get.assert_called_once_with("http://example.org")
+    get.assert_not_called()
+
+
+@pytest.mark.parametrize("with_cache", [False, True])
+def test_rfcindexsource_aiterate_entries_local(tmp_path, with_cache):
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    source = ietfbib2bibtex.sources.RFCIndexSource(
+        ietfbib2bibtex.config.RFCIndexSource(remote=str(rfc_index)),
+        cache=(
+            ietfbib2bibtex.cache.Cache(str(tmp_path / "cache")) if with_cache else None
+        ),
+    )
+    entries = asyncio.run(collect(source.aiterate_entries()))
+    assert_rfc_index_entries(entries)
+    assert source.validator is not None
+
+
+@pytest.mark.parametrize("with_cache", [False, True])
+def test_bibxml_ids_aiterate_entries(mocker, tmp_path, with_cache):
+    changes = ietfbib2bibtex.sync.Changes([], [])
+    async_sync = mocker.patch.object(
+        ietfbib2bibtex.sync.Rsync, "async_sync", mocker.AsyncMock(return_value=changes)
+    )
+    sync = mocker.patch.object(
+        ietfbib2bibtex.sync.Rsync, "sync", mocker.Mock(return_value=changes)
+    )
+    cache = None
+    if with_cache:
+        cache = ietfbib2bibtex.cache.Cache(str(tmp_path / "cache"))
+    source = ietfbib2bibtex.sources.BibXMLIDsSource(
+        ietfbib2bibtex.config.BibXMLIDsSource(
+            remote="foobar::test", local=os.path.join(MODULE_PATH, "test_ids")
+        ),
+        cache=cache,
+    )
+    if with_cache:
+        shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), source.local)
+    entries = asyncio.run(collect(source.aiterate_entries()))
+    assert source.changes == changes
+    assert [key for key, _ in entries] == [key for key, _ in source.iterate_local()]
+    asyncio.run(collect(source.aiterate_entries(refresh=False)))
+    if with_cache:
+        async_sync.assert_not_called()
+        sync.assert_called_once_with()
+    else:
+        async_sync.assert_called_once_with()
+        sync.assert_not_called()
+
+
+@pytest.mark.parametrize("with_cache", [False, True])
+def test_bibxml_ids_pipeline(mocker, tmp_path, caplog, with_cache):
+    mocker.patch("subprocess.check_output", return_value="")
+    local = tmp_path / "ids"
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), local)
+
+    def iterate(pipeline_depth, filter_config=None):
+        quarantine = {}
+        source = ietfbib2bibtex.sources.BibXMLIDsSource(
+            ietfbib2bibtex.config.BibXMLIDsSource(
+                remote="foobar::test", local=str(local), pipeline_depth=pipeline_depth
+            ),
+            cache=(
+                ietfbib2bibtex.cache.Cache(str(tmp_path / "cache"))
+                if with_cache
+                else None
+            ),
+            quarantine=quarantine,
+        )
+        source.file_stats = []
+        caplog.clear()
+        with caplog.at_level(logging.INFO):
+            entries = list(
+                source.iterate_local(
+                    None
+                    if filter_config is None
+                    else ietfbib2bibtex.filters.EntryFilter(
+                        ietfbib2bibtex.config.Filter(**filter_config)
+                    )
+                )
+            )
+        errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+        return entries, errors, quarantine, source.file_stats
+
+    for filter_config in (None, {"year_from": 2023}):
+        entries, errors, quarantine, file_stats = iterate(None, filter_config)
+        pipelined = iterate(2, filter_config)
+        assert [(k, e.fields, e.persons) for k, e in entries] == [
+            (k, e.fields, e.persons) for k, e in pipelined[0]
+        ]
+        assert errors == pipelined[1]
+        assert sorted(quarantine) == sorted(pipelined[2])
+        assert [s.path for s in file_stats] == [s.path for s in pipelined[3]]
+        assert [s.size for s in file_stats] == [s.size for s in pipelined[3]]
+        assert "Pipeline of" in caplog.text
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import logging
+
+import ietfbib2bibtex.state
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def test_state_roundtrip(tmp_path):
+    path = tmp_path / "foobar" / "state.json"
+    state = ietfbib2bibtex.state.State(str(path))
+    assert not state["bibs"]
+    state["bibs"]["test"] = {"last_success": 1337.0}
+    state.save()
+    assert path.exists()
+    state = ietfbib2bibtex.state.State(str(path))
+    assert state["bibs"] == {"test": {"last_success": 1337.0}}
+    assert not state["other"]
+
+
+def test_state_invalid(tmp_path, caplog):
+    path = tmp_path / "state.json"
+    path.write_text("{foobar")
+    with caplog.at_level(logging.WARNING):
+        state = ietfbib2bibtex.state.State(str(path))
+    assert not state["bibs"]
+    assert str(path) in caplog.text
+
+
+def test_state_save_fails(tmp_path, caplog):
+    blocker = tmp_path / "foobar"
+    blocker.write_text("")
+    state = ietfbib2bibtex.state.State(str(blocker / "state.json"))
+    state["bibs"]["test"] = {}
+    with caplog.at_level(logging.WARNING):
+        state.save()
+    assert "Unable to write state file" in caplog.text
+
+
+def test_state_concurrent_save(tmp_path):
+    path = str(tmp_path / "state.json")
+    state = ietfbib2bibtex.state.State(path)
+    state["quarantine"]["stale.xml"] = {"digest": "abcdef"}
+    state.save()
+    state1 = ietfbib2bibtex.state.State(path)
+    state2 = ietfbib2bibtex.state.State(path)
+    state1["bibs"]["test"] = {"last_success": 1337.0}
+    del state1["quarantine"]["stale.xml"]
+    state2["mirrors"]["remote"] = "mirror"
+    state2["quarantine"]["bad.xml"] = {"digest": "012345"}
+    state1.save()
+    state2.save()
+    # the second save keeps the changes of the first one
+    for state in (state2, ietfbib2bibtex.state.State(path)):
+        assert state["bibs"] == {"test": {"last_success": 1337.0}}
+        assert state["mirrors"] == {"remote": "mirror"}
+        assert state["quarantine"] == {"bad.xml": {"digest": "012345"}}
+    # only changed entries overwrite those of others
+    state1["bibs"]["other"] = {"last_success": 42.0}
+    state2["bibs"]["test"]["last_success"] = 1338.0
+    state2.save()
+    state1.save()
+    assert ietfbib2bibtex.state.State(path)["bibs"] == {
+        "test": {"last_success": 1338.0},
+        "other": {"last_success": 42.0},
+    }
+
+
+def test_state_save_invalid(tmp_path, caplog):
+    path = tmp_path / "state.json"
+    state = ietfbib2bibtex.state.State(str(path))
+    state["bibs"]["test"] = {"last_success": 1337.0}
+    state.save()
+    path.write_text("{foobar")
+    state["mirrors"]["remote"] = "mirror"
+    with caplog.at_level(logging.WARNING):
+        state.save()
+    assert str(path) in caplog.text
+    # the entries saved before are kept
+    state = ietfbib2bibtex.state.State(str(path))
+    assert state["bibs"] == {"test": {"last_success": 1337.0}}
+    assert state["mirrors"] == {"remote": "mirror"}
+
+
+def test_state_reload(tmp_path):
+    path = str(tmp_path / "state.json")
+    state = ietfbib2bibtex.state.State(path)
+    quarantine = state["quarantine"]
+    quarantine["stale.xml"] = {"digest": "abcdef"}
+    state.save()
+    other = ietfbib2bibtex.state.State(path)
+    other["quarantine"]["bad.xml"] = {"digest": "012345"}
+    other.save()
+    state["bibs"]["test"] = {"last_success": 1337.0}
+    state.reload()
+    # the section is updated in place
+    assert quarantine == {
+        "stale.xml": {"digest": "abcdef"},
+        "bad.xml": {"digest": "012345"},
+    }
+    assert state["bibs"] == {"test": {"last_success": 1337.0}}
+    # unsaved changes are still saved after reloading
+    state.save()
+    assert ietfbib2bibtex.state.State(path)["bibs"] == {
+        "test": {"last_success": 1337.0}
+    }
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-class-docstring
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import email.utils
+import functools
+import http.server
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import urllib.parse
+
+import pytest
+import requests
+
+import ietfbib2bibtex.sync
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+MODULE_PATH = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_parse_itemized_changes():
+    changes = ietfbib2bibtex.sync.parse_itemized_changes(
+        """receiving incremental file list
+created directory test
+cd+++++++++ ./
+>f+++++++++ reference.I-D.draft-foo-00.xml
+>f.st...... reference.I-D.draft-foo-01.xml
+.f....og... reference.I-D.draft-foo-02.xml
+cL+++++++++ reference.I-D.draft-foo.xml -> reference.I-D.draft-foo-02.xml
+*deleting   reference.I-D.draft-bar-00.xml
+
+sent 1,337 bytes  received 42 bytes  2,758.00 bytes/sec
+total size is 1,379  speedup is 1.00
+""",
+        "test",
+    )
+    assert changes.updated == [
+        os.path.join("test", "reference.I-D.draft-foo-00.xml"),
+        os.path.join("test", "reference.I-D.draft-foo-01.xml"),
+    ]
+    assert changes.deleted == [os.path.join("test", "reference.I-D.draft-bar-00.xml")]
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7, 36])
+def test_rsync_filters_partition(shards):
+    rsync = ietfbib2bibtex.sync.Rsync("foobar::test", "test", shards=shards)
+    assert rsync.shards == shards
+    if shards == 1:
+        assert not rsync.filters(0)
+        return
+    included = [rsync.filters(shard)[0] for shard in range(1, shards)]
+    assert all(f.startswith("--include=") for f in included)
+    assert [f"--exclude={f[len('--include='):]}" for f in included] == (
+        rsync.filters(0)
+    )
+    chars = "".join(f.split("[")[1].split("]")[0] for f in included)
+    assert len(chars) == len(set(chars))
+    assert rsync.SHARD_CHARS.endswith(chars)
+
+
+def test_rsync_shards_limited():
+    rsync = ietfbib2bibtex.sync.Rsync("foobar::test", "test", shards=100)
+    assert rsync.shards == len(rsync.SHARD_CHARS)
+
+
+def test_rsync_command():
+    rsync = ietfbib2bibtex.sync.Rsync(
+        "foobar::test", "test", checksum=True, args=["--delete"]
+    )
+    assert rsync.command(dry_run=True) == [
+        "rsync",
+        "-avcizxL",
+        "--dry-run",
+        "--delete",
+        "foobar::test",
+        "test",
+    ]
+
+
+@pytest.mark.skipif(shutil.which("rsync") is None, reason="rsync not installed")
+@pytest.mark.parametrize("shards", [1, 3])
+def test_rsync_local_directory_remote(tmp_path, shards):
+    local = tmp_path / "ids"
+    rsync = ietfbib2bibtex.sync.Rsync(
+        os.path.join(MODULE_PATH, "test_ids", ""), str(local), shards=shards
+    )
+    changes = rsync.sync(dry_run=True)
+    assert len(changes.updated) == 5
+    assert not local.exists() or not os.listdir(local)
+    changes = rsync.sync()
+    assert sorted(changes.updated) == sorted(
+        os.path.join(local, filename)
+        for filename in os.listdir(os.path.join(MODULE_PATH, "test_ids"))
+    )
+    assert not rsync.sync().updated
+
+
+@pytest.mark.parametrize("shards", [1, 3])
+def test_rsync_async_sync(mocker, shards):
+    process = mocker.Mock(returncode=0)
+    process.communicate = mocker.AsyncMock(
+        return_value=(b">f+++++++++ reference.I-D.draft-foo-00.xml\n", None)
+    )
+    create_subprocess_exec = mocker.patch(
+        "asyncio.create_subprocess_exec", mocker.AsyncMock(return_value=process)
+    )
+    rsync = ietfbib2bibtex.sync.Rsync("foobar::test", "test", shards=shards)
+    changes = asyncio.run(rsync.async_sync(dry_run=True))
+    assert (
+        changes.updated
+        == [os.path.join("test", "reference.I-D.draft-foo-00.xml")] * shards
+    )
+    assert not changes.deleted
+    assert create_subprocess_exec.call_args_list == [
+        mocker.call(*rsync.command(shard, True), stdout=asyncio.subprocess.PIPE)
+        for shard in range(shards)
+    ]
+
+
+def test_rsync_async_sync_error(mocker):
+    process = mocker.Mock(returncode=23)
+    process.communicate = mocker.AsyncMock(return_value=(b"", None))
+    mocker.patch(
+        "asyncio.create_subprocess_exec", mocker.AsyncMock(return_value=process)
+    )
+    rsync = ietfbib2bibtex.sync.Rsync("foobar::test", "test")
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(rsync.async_sync())
+
+
+def test_parse_listing_apache():
+    assert ietfbib2bibtex.sync.parse_listing(
+        '<tr><th><a href="?C=N;O=D">Name</a></th></tr>\n'
+        '<tr><td><a href="/public/">Parent Directory</a></td></tr>\n'
+        '<tr><td><a href="subdir/">subdir/</a></td></tr>\n'
+        '<tr><td><a href="reference.I-D.draft-foo-00.xml">'
+        "reference.I-D.draft-foo-00.xml</a></td>"
+        '<td align="right">2022-10-24 10:00  </td><td align="right">1.2K</td></tr>\n'
+        '<tr><td><a href="https://example.org/x.xml">x.xml</a></td></tr>\n'
+    ) == [
+        ietfbib2bibtex.sync.RemoteFile(
+            "reference.I-D.draft-foo-00.xml", None, 1666605600
+        )
+    ]
+
+
+def test_parse_listing_outside_mirror():
+    names = ["../x.xml", "a/../../x.xml", "/etc/x.xml", ".x.xml", "..", "a\\x.xml"]
+    assert not ietfbib2bibtex.sync.parse_listing(
+        "".join(
+            f'<a href="{urllib.parse.quote(name, safe="")}">x</a>\n' for name in names
+        )
+    )
+    assert not ietfbib2bibtex.sync.parse_listing(
+        json.dumps([{"name": name, "type": "file"} for name in names])
+    )
+    assert ietfbib2bibtex.sync.parse_listing(
+        json.dumps([{"name": "x.xml", "type": "file"}, {"type": "file"}])
+    ) == [ietfbib2bibtex.sync.RemoteFile("x.xml", None, None)]
+
+
+class ListingHandler(http.server.SimpleHTTPRequestHandler):
+    listing_format = "nginx"
+
+    def list_directory(self, path):
+        names = sorted(os.listdir(path))
+        stats = [os.stat(os.path.join(path, name)) for name in names]
+        if self.listing_format == "json":
+            content = json.dumps(
+                [
+                    {
+                        "name": name,
+                        "type": "file",
+                        "mtime": email.utils.formatdate(stat.st_mtime, usegmt=True),
+                        "size": stat.st_size,
+                    }
+                    for name, stat in zip(names, stats)
+                ]
+            )
+        elif self.listing_format == "nginx":
+            content = '<html><body><pre><a href="../">../</a>\n' + "".join(
+                f'<a href="{name}">{name[:50]}</a> '
+                f"{time.strftime('%d-%b-%Y %H:%M', time.gmtime(stat.st_mtime))} "
+                f"{stat.st_size}\n"
+                for name, stat in zip(names, stats)
+            )
+        else:
+            return super().list_directory(path)
+        encoded = content.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+        return None
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def http_remote(request, tmp_path):
+    directory = tmp_path / "remote"
+    shutil.copytree(os.path.join(MODULE_PATH, "test_ids"), directory)
+    # listings have a resolution of minutes
+    for path in directory.iterdir():
+        os.utime(path, (1666605600, 1666605600))
+    handler = type("Handler", (ListingHandler,), {"listing_format": request.param})
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(handler, directory=str(directory))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/", directory, request.param
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("http_remote", ["nginx", "json", "plain"], indirect=True)
+def test_http_sync(tmp_path, http_remote):
+    remote, directory, listing_format = http_remote
+    local = tmp_path / "ids"
+    http_sync = ietfbib2bibtex.sync.HTTPSync(
+        remote, str(local), connections=2, delete=True
+    )
+    changes = http_sync.sync(dry_run=True)
+    assert len(changes.updated) == 5
+    assert not changes.deleted
+    assert not local.exists()
+    changes = http_sync.sync()
+    assert sorted(changes.updated) == sorted(
+        os.path.join(local, filename) for filename in os.listdir(directory)
+    )
+    assert sorted(os.listdir(local)) == sorted(os.listdir(directory))
+    for path in directory.iterdir():
+        assert (local / path.name).read_bytes() == path.read_bytes()
+    assert http_sync.sync() == ietfbib2bibtex.sync.Changes([], [])
+    changed = directory / "reference.I-D.draft-lenders-dns-cns-00.xml"
+    changed.write_bytes(changed.read_bytes() + b"\n")
+    removed = directory / "reference.I-D.draft-ietf-idn-amc-ace-v-00.xml"
+    removed.unlink()
+    changes = http_sync.sync()
+    assert changes.deleted == [str(local / removed.name)]
+    assert not (local / removed.name).exists()
+    if listing_format == "plain":
+        # without sizes and modification times only missing files are downloaded
+        assert not changes.updated
+    else:
+        assert changes.updated == [str(local / changed.name)]
+        assert (local / changed.name).read_bytes() == changed.read_bytes()
+    # no partial downloads are left behind
+    assert sorted(os.listdir(local)) == sorted(os.listdir(directory))
+
+
+@pytest.mark.parametrize("http_remote", ["nginx"], indirect=True)
+def test_http_sync_no_delete(tmp_path, http_remote):
+    remote, directory, _ = http_remote
+    local = tmp_path / "ids"
+    http_sync = ietfbib2bibtex.sync.HTTPSync(remote, str(local))
+    http_sync.sync()
+    removed = directory / "reference.I-D.draft-ietf-idn-amc-ace-v-00.xml"
+    removed.unlink()
+    assert http_sync.sync() == ietfbib2bibtex.sync.Changes([], [])
+    assert (local / removed.name).exists()
+
+
+@pytest.mark.parametrize("http_remote", ["nginx"], indirect=True)
+def test_http_sync_error(mocker, tmp_path, http_remote):
+    remote, _, _ = http_remote
+    local = tmp_path / "ids"
+    mocker.patch.object(
+        ietfbib2bibtex.sync,
+        "parse_listing",
+        return_value=[ietfbib2bibtex.sync.RemoteFile("reference.I-D.missing.xml")],
+    )
+    http_sync = ietfbib2bibtex.sync.HTTPSync(remote, str(local))
+    with pytest.raises(requests.HTTPError):
+        http_sync.sync()
+    assert not os.listdir(local)
+
+
+@pytest.mark.parametrize("http_remote", ["json"], indirect=True)
+def test_http_sync_async_sync(tmp_path, http_remote):
+    remote, _, _ = http_remote
+    http_sync = ietfbib2bibtex.sync.HTTPSync(remote.rstrip("/"), str(tmp_path / "ids"))
+    assert http_sync.remote == remote
+    changes = asyncio.run(http_sync.async_sync())
+    assert len(changes.updated) == 5
+
+
+def test_is_http_remote():
+    assert ietfbib2bibtex.sync.is_http_remote("http://example.org/bibxml-ids/")
+    assert not ietfbib2bibtex.sync.is_http_remote("rsync://rsync.ietf.org/bibxml-ids/")
+    assert not ietfbib2bibtex.sync.is_http_remote("/srv/bibxml-ids/")
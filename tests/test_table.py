@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2024 TU Dresden
+#
+# This file is subject to the terms and conditions of the GNU Lesser
+# General Public License v2.1. See the file LICENSE in the top level
+# directory for more details.
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-module-docstring
+
+import itertools
+import sys
+
+import pybtex.database
+import pytest
+
+import ietfbib2bibtex.bib
+import ietfbib2bibtex.config
+import ietfbib2bibtex.table
+
+from .test_compact import ids_bib
+from .test_sources import RFC_INDEX_XML
+
+__author__ = "Martine S. Lenders"
+__copyright__ = "Copyright 2024 TU Dresden"
+__license__ = "LGPL v2.1"
+__email__ = "m.lenders@fu-berlin.de"
+
+
+def draft_entries():
+    entries = []
+    for revision in range(3):
+        authors = [
+            pybtex.database.Person("Martine Lenders"),
+            pybtex.database.Person(f"Doe{revision}, Jane"),
+        ]
+        fields = {"title": "{Foo Bar}", "month": "March", "year": str(2020 + revision)}
+        entries.append(
+            (
+                f"draft-foo-bar-{revision:02d}",
+                pybtex.database.Entry("techreport", fields, {"author": authors}),
+            )
+        )
+    return entries + [
+        ("RFC-1", pybtex.database.Entry("techreport", {"title": "{One}"})),
+        ("foo", pybtex.database.Entry("misc", {"year": "n.d.", "month": "foo"})),
+    ]
+
+
+def build(entries, batch_size):
+    builder = ietfbib2bibtex.table.TableBuilder()
+    entries = iter(entries)
+    for batch in iter(lambda: list(itertools.islice(entries, batch_size)), []):
+        builder.add_batch(batch)
+    assert len(builder) == 5
+    return builder.build()
+
+
+def assert_table(table):
+    assert len(table) == 5
+    assert list(table.keys) == [
+        "draft-foo-bar-00",
+        "draft-foo-bar-01",
+        "draft-foo-bar-02",
+        "RFC-1",
+        "foo",
+    ]
+    assert table.keys[-1] == "foo"
+    assert list(table.family) == ["draft-foo-bar"] * 3 + ["RFC-1", "foo"]
+    assert list(table.family.values) == ["draft-foo-bar", "RFC-1", "foo"]
+    assert list(table.revision) == [0, 1, 2, -1, -1]
+    assert list(table.year) == [2020, 2021, 2022, 0, 0]
+    assert list(table.month) == [3, 3, 3, 0, 0]
+    assert list(table.title) == ["Foo Bar"] * 3 + ["One", None]
+    assert list(table.title.codes) == [0, 0, 0, 1, -1]
+    assert table.authors[1] == ["Martine Lenders", "Jane Doe1"]
+    assert table.authors[-1] == []
+    assert list(table.authors.values) == [
+        "Martine Lenders",
+        "Jane Doe0",
+        "Jane Doe1",
+        "Jane Doe2",
+    ]
+    assert table.row(3) == {
+        "key": "RFC-1",
+        "family": "RFC-1",
+        "revision": -1,
+        "year": 0,
+        "month": 0,
+        "title": "One",
+        "authors": [],
+    }
+    with pytest.raises(IndexError):
+        table.keys[5]  # pylint: disable=pointless-statement
+    with pytest.raises(IndexError):
+        table.authors[5]  # pylint: disable=pointless-statement
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_table_builder(batch_size):
+    assert_table(build(draft_entries(), batch_size))
+
+
+def test_table_builder_failing_batch():
+    def failing_batch():
+        yield from draft_entries()[:2]
+        raise RuntimeError
+
+    builder = ietfbib2bibtex.table.TableBuilder()
+    with pytest.raises(RuntimeError):
+        builder.add_batch(failing_batch())
+    assert not builder
+    builder.add_batch(draft_entries())
+    assert_table(builder.build())
+
+
+def test_table_builder_full_names():
+    builder = ietfbib2bibtex.table.TableBuilder()
+    builder.add_batch(
+        [
+            (
+                "RFC-1",
+                pybtex.database.Entry(
+                    "techreport",
+                    persons={
+                        "author": [pybtex.database.Person("van Beethoven, Jr., Ludwig")]
+                    },
+                ),
+            )
+        ]
+    )
+    assert builder.build().authors[0] == ["Ludwig van Beethoven"]
+
+
+def test_table_builder_rfc_numbers():
+    builder = ietfbib2bibtex.table.TableBuilder()
+    builder.add_batch(
+        (key, pybtex.database.Entry("techreport"))
+        for key in ["RFC-10", "RFC-42", "RFC-99", "draft-foo-42"]
+    )
+    table = builder.build()
+    # two-digit RFC numbers are no revisions of a family "RFC"
+    assert list(table.family) == ["RFC-10", "RFC-42", "RFC-99", "draft-foo"]
+    assert list(table.revision) == [-1, -1, -1, 42]
+
+
+def test_table_save_load(tmp_path):
+    path = tmp_path / "table.bin"
+    build(draft_entries(), 2).save(str(path))
+    assert path.stat().st_size % 8 == 0
+    with ietfbib2bibtex.table.Table.load(str(path)) as table:
+        assert_table(table)
+        # a loaded table can be saved again
+        table.save(str(tmp_path / "copy.bin"))
+    with pytest.raises(ValueError):
+        list(table.revision)
+    table.close()
+    assert (tmp_path / "copy.bin").read_bytes() == path.read_bytes()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["copy.bin", "table.bin"]
+
+
+def test_table_save_load_empty(tmp_path):
+    path = str(tmp_path / "table.bin")
+    ietfbib2bibtex.table.TableBuilder().build().save(path)
+    with ietfbib2bibtex.table.Table.load(path) as table:
+        assert len(table) == 0
+        assert not list(table.keys)
+
+
+def test_table_load_invalid(mocker, tmp_path):
+    path = tmp_path / "table.bin"
+    path.write_bytes(b"foobar" * 10)
+    with pytest.raises(ValueError):
+        ietfbib2bibtex.table.Table.load(str(path))
+    build(draft_entries(), 2).save(str(path))
+    mocker.patch("sys.byteorder", "big" if sys.byteorder == "little" else "little")
+    with pytest.raises(ValueError, match="byte order"):
+        ietfbib2bibtex.table.Table.load(str(path))
+
+
+def test_bib_to_table_bibxml_ids(mocker, tmp_path):
+    mocker.patch("subprocess.check_output", return_value="")
+    bib = ids_bib(tmp_path)
+    iterate_entries = mocker.spy(bib.source, "iterate_entries")
+    table = bib.to_table(batch_size=2)
+    iterate_entries.assert_called_once_with(
+        entry_filter=None, refresh=True, fields=ietfbib2bibtex.table.FIELDS
+    )
+    # drafts are contained once per revision, not again under their family
+    assert list(table.keys) == [
+        "draft-ietf-core-dns-over-coap-00",
+        "draft-ietf-core-dns-over-coap-01",
+        "draft-lenders-dns-cns-00",
+    ]
+    assert list(table.family) == [
+        "draft-ietf-core-dns-over-coap",
+        "draft-ietf-core-dns-over-coap",
+        "draft-lenders-dns-cns",
+    ]
+    assert list(table.revision) == [0, 1, 0]
+    assert table.year[0] == 2022
+    assert table.title[0] == "DNS over CoAP (DoC)"
+    assert "Martine Sophie Lenders" in table.authors[0]
+
+
+def test_bib_to_table_rfc_index(tmp_path):
+    rfc_index = tmp_path / "rfc-index.xml"
+    rfc_index.write_bytes(RFC_INDEX_XML)
+    bib = ietfbib2bibtex.bib.Bib(
+        ietfbib2bibtex.config.Bib(name="rfcs", rfc_index={"remote": str(rfc_index)})
+    )
+    table = bib.to_table()
+    assert list(table.keys) == ["RFC-781", "RFC-9325"]
+    assert list(table.family) == ["RFC-781", "RFC-9325"]
+    assert list(table.revision) == [-1, -1]
+    assert list(table.year) == [1981, 2022]
+    assert list(table.month) == [5, 11]
+    assert table.authors[1] == ["Y. Sheffer", "P. Saint-Andre", "T. Fossati"]